@@ -3,24 +3,24 @@ from typing import AsyncGenerator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud
 from core.config import settings
 from core.db import get_db
+from core.revocation import token_versions
 from core.security import ALGORITHM
 from models.user import User
-from schemas.auth import TokenPayload
+from schemas.auth import AuthUser, TokenPayload
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthUser:
     """
-    Get current user from token
+    Get current user from access token claims, without a database query
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,22 +29,41 @@ async def get_current_user(
     )
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: Optional[str] = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-        token_data = TokenPayload(sub=user_id)
-    except JWTError:
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
         raise credentials_exception
 
-    user = await crud.user.get(db, id=int(token_data.sub))
-    if user is None:
+    if (
+        token_data.sub is None
+        or token_data.type != "access"
+        or token_data.role is None
+        or token_data.active is None
+    ):
         raise credentials_exception
-    return user
+
+    # Without fresh revocation state a revoked token would pass; fail closed
+    if token_versions.age() > settings.TOKEN_REVOCATION_MAX_STALENESS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authorization is temporarily unavailable",
+            headers={"Retry-After": str(settings.TOKEN_REVOCATION_REFRESH_SECONDS)},
+        )
+
+    user_id = int(token_data.sub)
+    if not token_versions.is_current(user_id, token_data.ver):
+        raise credentials_exception
+
+    return AuthUser(
+        id=user_id,
+        role=token_data.role,
+        is_active=token_data.active,
+        token_version=token_data.ver,
+    )
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_user),
+) -> AuthUser:
     """
     Get current active user
     """
@@ -53,9 +72,27 @@ async def get_current_active_user(
     return current_user
 
 
-async def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user),
+async def get_current_user_record(
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
+    """
+    Load the current active user from the database, for routes that need
+    more than the token claims
+    """
+    user = await crud.user.get(db, id=current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+async def get_current_admin_user(
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> AuthUser:
     """
     Get current admin user
     """
@@ -67,8 +104,8 @@ async def get_current_admin_user(
 
 
 async def get_current_teacher_or_admin_user(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> AuthUser:
     """
     Get current teacher or admin user
     """
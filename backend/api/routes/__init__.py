@@ -1,8 +1,12 @@
 from fastapi import APIRouter
 
-from api.routes import auth, lessons, users
+from api.routes import admin, assets, auth, batch, events, lessons, users
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
-api_router.include_router(lessons.router, prefix="/lessons", tags=["Lessons"])
\ No newline at end of file
+api_router.include_router(lessons.router, prefix="/lessons", tags=["Lessons"])
+api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+api_router.include_router(events.router, prefix="/events", tags=["Events"])
+api_router.include_router(batch.router, prefix="/batch", tags=["Batch"])
+api_router.include_router(assets.router, prefix="/assets", tags=["Assets"])
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends
+
+from api.deps import get_current_admin_user
+from core import slow_queries
+from schemas.admin import SlowQueryResponse
+from schemas.auth import AuthUser
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+async def read_slow_queries(
+    current_user: AuthUser = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Recent slow queries with captured plans, most recent first (admin only)
+    """
+    return slow_queries.get_entries()
+
+
+@router.delete("/slow-queries", status_code=204)
+async def clear_slow_queries(
+    current_user: AuthUser = Depends(get_current_admin_user),
+) -> None:
+    """
+    Clear the slow query log (admin only)
+    """
+    slow_queries.clear()
@@ -0,0 +1,251 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+from api.deps import (
+    get_current_active_user,
+    get_current_teacher_or_admin_user,
+    get_db,
+)
+from core import assets
+from core.config import settings
+from models.asset import Asset, AssetVariant
+from models.lesson import LessonStatus
+from schemas.asset import AssetResponse
+from schemas.auth import AuthUser
+
+router = APIRouter()
+
+# Blobs are addressed by content, so a cached copy can never go stale
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def asset_response(
+    asset: Asset, variants: Sequence[AssetVariant] = ()
+) -> Dict[str, Any]:
+    """
+    Serialize an asset with the URLs of the blob and its variants
+    """
+    return {
+        **asset.model_dump(),
+        "url": assets.blob_url(asset.sha256),
+        "variants": [
+            {
+                "width": variant.width,
+                "height": variant.height,
+                "size": variant.size,
+                "url": assets.variant_url(asset.sha256, variant.width),
+            }
+            for variant in variants
+        ],
+        "srcset": assets.srcset(asset.sha256, (variant.width for variant in variants)),
+    }
+
+
+@router.post(
+    "",
+    response_model=AssetResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_asset(
+    request: Request,
+    module_id: Optional[int] = None,
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Upload a file as multipart/form-data (teachers and admins only)
+
+    The first file part is streamed to disk, never held in memory. Files
+    with the same content are stored once. Pass `module_id` to attach the
+    asset to a module of one of your lessons.
+    """
+    if module_id is not None:
+        module = await crud.module.get(db, id=module_id)
+        # Modules of a deleted lesson are gone too, even before the purge
+        lesson = await crud.lesson.get(db, id=module.lesson_id) if module else None
+        if not lesson:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Module not found",
+            )
+        if lesson.teacher_id != current_user.id and current_user.role != "admin":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+        # Don't hold the connection for the length of the upload
+        await db.commit()
+
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > settings.ASSET_MAX_BYTES + 65536:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Assets are limited to {settings.ASSET_MAX_BYTES} bytes",
+        )
+
+    try:
+        upload = await assets.store_multipart(
+            request.headers.get("content-type", ""), request.stream()
+        )
+    except assets.UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    asset = await crud.asset.create_from_upload(
+        db, upload=upload, module_id=module_id, uploaded_by=current_user.id
+    )
+    return asset_response(asset)
+
+
+@router.get("", response_model=List[AssetResponse])
+async def read_module_assets(
+    module_id: int,
+    skip: int = 0,
+    limit: int = Query(100, le=500),
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the assets attached to a module
+    """
+    module = await crud.module.get(db, id=module_id)
+    # Modules of a deleted lesson are gone too, even before the purge
+    lesson = await crud.lesson.get(db, id=module.lesson_id) if module else None
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found",
+        )
+
+    # Same rule as the lesson's modules: students see published lessons or
+    # ones they're enrolled in
+    if (
+        current_user.role == "student"
+        and lesson.status != LessonStatus.PUBLISHED
+        and not await crud.lesson.is_enrolled(
+            db, lesson_id=lesson.id, student_id=current_user.id
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    module_assets = await crud.asset.get_module_assets(
+        db, module_id=module_id, skip=skip, limit=limit
+    )
+    variants = await crud.asset.get_variants(
+        db, sha256s=[asset.sha256 for asset in module_assets]
+    )
+    return [
+        asset_response(asset, variants.get(asset.sha256, ())) for asset in module_assets
+    ]
+
+
+@router.get("/{sha256}", response_class=Response)
+async def download_asset(
+    sha256: str = Path(..., pattern=r"^[0-9a-f]{64}$"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Download an asset by its content hash
+
+    Not authenticated, so lesson pages can embed assets directly; the hash
+    is the capability. Supports Range and If-None-Match, and is cacheable
+    forever. Only images, audio, video, PDF and plain text are served
+    inline; other files are downloaded as application/octet-stream.
+    """
+    info = await crud.asset.get_blob_info(db, sha256=sha256)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asset not found",
+        )
+    content_type, filename = info
+    media_type, disposition_type = assets.served_type(content_type)
+    headers = {
+        "ETag": assets.etag(sha256),
+        "Cache-Control": IMMUTABLE,
+        **assets.SAFE_HEADERS,
+    }
+
+    if assets.etag_matches(if_none_match, sha256):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if settings.ASSET_ACCEL_REDIRECT:
+        # The proxy sends the file (and handles Range) with sendfile
+        headers["X-Accel-Redirect"] = (
+            f"{settings.ASSET_ACCEL_REDIRECT.rstrip('/')}/"
+            f"{assets.blob_relpath(sha256)}"
+        )
+        headers["Content-Disposition"] = assets.content_disposition(
+            disposition_type, filename
+        )
+        return Response(media_type=media_type, headers=headers)
+
+    path = assets.blob_path(sha256)
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Asset not found",
+        )
+    return assets.AssetFileResponse(
+        path,
+        media_type=media_type,
+        headers=headers,
+        filename=filename,
+        content_disposition_type=disposition_type,
+    )
+
+
+@router.get("/{sha256}/variants/{width}", response_class=Response)
+async def download_asset_variant(
+    sha256: str = Path(..., pattern=r"^[0-9a-f]{64}$"),
+    width: int = Path(..., ge=1, le=10000),
+    if_none_match: Optional[str] = Header(None),
+) -> Any:
+    """
+    Download a downscaled WebP variant of an image asset
+
+    Variants are listed in the asset's `srcset`. Cached like the original.
+    """
+    headers = {
+        "ETag": assets.etag(f"{sha256}-{width}"),
+        "Cache-Control": IMMUTABLE,
+        **assets.SAFE_HEADERS,
+    }
+    if assets.etag_matches(if_none_match, f"{sha256}-{width}"):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = assets.variant_path(sha256, width)
+    if settings.ASSET_ACCEL_REDIRECT:
+        headers["X-Accel-Redirect"] = (
+            f"{settings.ASSET_ACCEL_REDIRECT.rstrip('/')}/"
+            f"{path.relative_to(settings.ASSET_ROOT).as_posix()}"
+        )
+        return Response(media_type=assets.VARIANT_CONTENT_TYPE, headers=headers)
+
+    if not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Variant not found",
+        )
+    return assets.AssetFileResponse(
+        path,
+        media_type=assets.VARIANT_CONTENT_TYPE,
+        headers=headers,
+        content_disposition_type="inline",
+    )
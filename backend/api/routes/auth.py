@@ -3,20 +3,43 @@ from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud
-from api.deps import get_current_active_user
+from api.deps import get_current_user_record
 from core.config import settings
 from core.db import get_db
-from core.security import create_access_token
+from core.security import (
+    ALGORITHM,
+    create_access_token,
+    create_refresh_token,
+    user_claims,
+)
 from models.user import User
-from schemas.auth import Login, PasswordUpdate, Token
+from schemas.auth import Login, PasswordUpdate, RefreshRequest, Token, TokenPayload
 from schemas.user import UserCreate, UserResponse
 
 router = APIRouter()
 
 
+def create_tokens(user: User) -> dict:
+    """
+    Issue a short-lived access token carrying the user's claims and a
+    refresh token to renew it
+    """
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": create_access_token(
+            user.id, expires_delta=access_token_expires, claims=user_claims(user)
+        ),
+        "refresh_token": create_refresh_token(user.id, user.token_version),
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+    }
+
+
 @router.post("/login", response_model=Token)
 async def login_access_token(
     db: AsyncSession = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
@@ -38,13 +61,7 @@ async def login_access_token(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return create_tokens(user)
 
 
 @router.post("/login/json", response_model=Token)
@@ -65,13 +82,52 @@ async def login_json(login_data: Login, db: AsyncSession = Depends(get_db)) -> A
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return create_tokens(user)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    refresh_in: RefreshRequest, db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Exchange a refresh token for a new access and refresh token pair
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(
+            refresh_in.refresh_token, settings.SECRET_KEY, algorithms=[ALGORITHM]
+        )
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        raise credentials_exception
+    if token_data.sub is None or token_data.type != "refresh":
+        raise credentials_exception
+
+    # Refreshing is rare enough to check the user row directly
+    user = await crud.user.get(db, id=int(token_data.sub))
+    if not user or token_data.ver != user.token_version:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
+        )
+
+    return create_tokens(user)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    current_user: User = Depends(get_current_user_record),
+    db: AsyncSession = Depends(get_db),
+) -> None:
+    """
+    Revoke every access and refresh token issued to the current user
+    """
+    await crud.user.revoke_tokens(db, db_obj=current_user)
 
 
 @router.post("/register", response_model=UserResponse)
@@ -93,7 +149,7 @@ async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)) -> A
 @router.post("/password", response_model=UserResponse)
 async def update_password(
     password_update: PasswordUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
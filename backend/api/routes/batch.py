@@ -0,0 +1,55 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from api.deps import get_current_active_user
+from core import batch
+from core.config import settings
+from schemas.auth import AuthUser
+from schemas.batch import BatchRequest, BatchResponse
+
+router = APIRouter()
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch_in: BatchRequest,
+    request: Request,
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> Any:
+    """
+    Run several API calls in one request
+
+    Each entry names a method, an API path (with query string) and an
+    optional JSON body, and is answered with its own status and body in
+    the same order. Each call counts against the rate limit and may be
+    shed under load like a request of its own. Consecutive GETs run
+    concurrently; other methods run one at a time, in order. Streaming routes cannot be batched, and each
+    call is answered with a 504 if it takes longer than BATCH_TIMEOUT
+    seconds.
+    """
+    if len(batch_in.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BATCH_MAX_REQUESTS} requests per batch",
+        )
+    for item in batch_in.requests:
+        path, _ = batch.target(item)
+        if not path.startswith(f"{settings.API_V1_STR}/") or path.startswith(
+            request.url.path
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot batch {item.path}",
+            )
+        if batch.streams(request.app, item.method, path):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot batch {item.path}: it streams its response",
+            )
+
+    # Charged to the same bucket as the user's own requests
+    responses = await batch.run(
+        request, batch_in.requests, user_key=str(current_user.id)
+    )
+    return {"responses": responses}
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+
+from api.deps import get_current_active_user
+from core import events
+from core.config import settings
+from schemas.auth import AuthUser
+from schemas.event import EventBatch, EventBatchResponse
+
+router = APIRouter()
+
+
+@router.post(
+    "",
+    response_model=EventBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def ingest_events(
+    batch: EventBatch,
+    current_user: AuthUser = Depends(get_current_active_user),
+) -> Any:
+    """
+    Accept a batch of learning analytics events
+
+    Events are buffered and written in the background. When the buffer is
+    full, events that do not fit are dropped and reported in the response;
+    if none fit the request is rejected with 503 and Retry-After.
+    """
+    if not settings.EVENTS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    received_at = datetime.now(timezone.utc)
+    records = [
+        events.to_record(
+            user_id=current_user.id,
+            event_type=event.type,
+            occurred_at=event.occurred_at,
+            received_at=received_at,
+            lesson_id=event.lesson_id,
+            module_id=event.module_id,
+            dwell_ms=event.dwell_ms,
+            data=event.data,
+        )
+        for event in batch.events
+    ]
+    accepted = events.buffer.offer(records)
+    if not accepted:
+        return JSONResponse(
+            {"accepted": 0, "dropped": len(records)},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+    return {"accepted": accepted, "dropped": len(records) - accepted}
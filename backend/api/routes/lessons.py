@@ -1,6 +1,14 @@
 from typing import Any, List
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud
@@ -9,52 +17,76 @@ from api.deps import (
     get_current_teacher_or_admin_user,
     get_db,
 )
-from models.lesson import LessonStatus
-from models.user import User
+from api.routes.assets import asset_response
+from core import progress, push
+from core.config import settings
+from models.lesson import Lesson, LessonStatus
+from schemas.auth import AuthUser
 from schemas.lesson import (
     EnrollmentCreate,
     EnrollmentResponse,
     LessonCreate,
+    LessonDashboardItem,
     LessonDetailResponse,
     LessonResponse,
+    LessonSearchResult,
+    LessonSuggestion,
     LessonUpdate,
+    ModuleBatch,
     ModuleCreate,
+    ModuleOrder,
+    ModuleProgressResponse,
+    ModuleProgressUpdate,
     ModuleResponse,
     ModuleUpdate,
+    ModuleWithAssetsResponse,
 )
 
 router = APIRouter()
 
 
+async def restore_content(db: AsyncSession, lesson: Lesson) -> bool:
+    """
+    Bring a lesson's content back from cold storage; True if it was there
+
+    Only for routes that change the content: reads serve it from the archive
+    with crud.lesson.get_archived_content instead, so a GET never writes.
+    Call it after the access check, so refused requests leave archived
+    content where it is. Restoring expires everything the session loaded,
+    so load the lesson again before using it.
+    """
+    if lesson.archived_at is None:
+        return False
+    await crud.lesson.restore(db, lesson_id=lesson.id)
+    return True
+
+
 @router.get("", response_model=List[LessonResponse])
 async def read_lessons(
     skip: int = 0,
     limit: int = 100,
     status: LessonStatus = None,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Retrieve lessons
     """
-    # Filter by status if provided
-    if status:
-        # TODO: Implement status filtering
-        pass
-    
     # Regular users (students) can only see published lessons
-    if current_user.role == "student":
-        # TODO: Implement status filtering
-        pass
-    
-    lessons = await crud.lesson.get_multi(db, skip=skip, limit=limit)
+    lessons = await crud.lesson.get_multi_visible(
+        db,
+        status=status,
+        published_only=current_user.role == "student",
+        skip=skip,
+        limit=limit,
+    )
     return lessons
 
 
 @router.post("", response_model=LessonResponse)
 async def create_lesson(
     lesson_in: LessonCreate,
-    current_user: User = Depends(get_current_teacher_or_admin_user),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -70,7 +102,7 @@ async def create_lesson(
 async def read_teacher_lessons(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_teacher_or_admin_user),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -82,11 +114,39 @@ async def read_teacher_lessons(
     return lessons
 
 
+@router.get("/teacher/dashboard", response_model=List[LessonDashboardItem])
+async def read_teacher_dashboard(
+    skip: int = 0,
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the current teacher's lessons with enrollment counts by status,
+    module counts and latest activity
+    """
+    rows = await crud.lesson.get_teacher_dashboard(
+        db, teacher_id=current_user.id, skip=skip, limit=limit
+    )
+    return [
+        {
+            **LessonResponse.model_validate(row.Lesson, from_attributes=True).model_dump(),
+            "student_count": row.student_count or 0,
+            "enrollments_by_status": row.enrollments_by_status or {},
+            "module_count": row.module_count or 0,
+            "last_enrolled_at": row.last_enrolled_at,
+            "modules_updated_at": row.modules_updated_at,
+            "last_activity_at": row.last_activity_at,
+        }
+        for row in rows
+    ]
+
+
 @router.get("/enrolled", response_model=List[LessonResponse])
 async def read_enrolled_lessons(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -98,10 +158,68 @@ async def read_enrolled_lessons(
     return lessons
 
 
+@router.get("/suggest", response_model=List[LessonSuggestion])
+async def suggest_lessons(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(settings.SUGGEST_LIMIT, ge=1, le=20),
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Typeahead lookup of lessons by title
+    """
+    suggestions = await crud.lesson.suggest(
+        db,
+        q=q,
+        published_only=current_user.role == "student",
+        limit=limit,
+    )
+    if suggestions is None:
+        # Over the latency budget; the next keystroke will try again
+        return []
+    response.headers["Cache-Control"] = f"private, max-age={settings.SUGGEST_CACHE_TTL}"
+    return suggestions
+
+
+@router.get("/search", response_model=List[LessonSearchResult])
+async def search_lessons(
+    q: str = Query(..., min_length=2, max_length=200),
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    status: LessonStatus = None,
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Search lessons and their modules, best match first
+
+    Supports quoted phrases, `or` and `-excluded` terms. Matches are
+    highlighted with <mark> in the title and snippet.
+    """
+    rows = await crud.lesson.search(
+        db,
+        q=q,
+        status=status,
+        published_only=current_user.role == "student",
+        skip=skip,
+        limit=limit,
+    )
+    return [
+        {
+            **LessonResponse.model_validate(lesson, from_attributes=True).model_dump(),
+            "rank": rank,
+            "title_highlight": title_highlight,
+            "snippet": snippet or None,
+        }
+        for lesson, rank, title_highlight, snippet in rows
+    ]
+
+
 @router.get("/{lesson_id}", response_model=LessonDetailResponse)
 async def read_lesson(
     lesson_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -133,6 +251,15 @@ async def read_lesson(
     # Combine everything into a response
     response = lesson.__dict__.copy()
     response["student_count"] = student_count
+    if lesson.archived_at is not None:
+        content, module_content = await crud.lesson.get_archived_content(
+            db, lesson_id=lesson_id
+        )
+        response["content"] = content
+        response["modules"] = [
+            {**module.__dict__, "content": module_content.get(module.id)}
+            for module in lesson.modules
+        ]
     
     return response
 
@@ -141,7 +268,7 @@ async def read_lesson(
 async def update_lesson(
     lesson_id: int,
     lesson_in: LessonUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -164,6 +291,8 @@ async def update_lesson(
             detail="Not enough permissions",
         )
     
+    if await restore_content(db, lesson):
+        lesson = await crud.lesson.get(db, id=lesson_id)
     lesson = await crud.lesson.update(db, db_obj=lesson, obj_in=lesson_in)
     return lesson
 
@@ -171,11 +300,14 @@ async def update_lesson(
 @router.delete("/{lesson_id}", response_model=LessonResponse)
 async def delete_lesson(
     lesson_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Delete a lesson
+
+    The lesson disappears at once; its modules, enrollments and progress
+    are removed in the background.
     """
     lesson = await crud.lesson.get(db, id=lesson_id)
     if not lesson:
@@ -203,7 +335,7 @@ async def delete_lesson(
 async def create_module(
     lesson_id: int,
     module_in: ModuleCreate,
-    current_user: User = Depends(get_current_teacher_or_admin_user),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -232,16 +364,16 @@ async def create_module(
     return module
 
 
-@router.get("/{lesson_id}/modules", response_model=List[ModuleResponse])
+@router.get("/{lesson_id}/modules", response_model=List[ModuleWithAssetsResponse])
 async def read_modules(
     lesson_id: int,
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    Get modules for a lesson
+    Get modules for a lesson, with their assets and image variants
     """
     lesson = await crud.lesson.get(db, id=lesson_id)
     if not lesson:
@@ -266,6 +398,175 @@ async def read_modules(
     modules = await crud.module.get_lesson_modules(
         db, lesson_id=lesson_id, skip=skip, limit=limit
     )
+    module_content = {module.id: module.content for module in modules}
+    if lesson.archived_at is not None:
+        _, module_content = await crud.lesson.get_archived_content(
+            db, lesson_id=lesson_id
+        )
+    # Two queries for the whole page rather than two per module
+    module_assets = await crud.asset.get_for_modules(
+        db, module_ids=[module.id for module in modules]
+    )
+    variants = await crud.asset.get_variants(
+        db,
+        sha256s=[
+            asset.sha256 for assets in module_assets.values() for asset in assets
+        ],
+    )
+    return [
+        {
+            **ModuleResponse.model_validate(module, from_attributes=True).model_dump(),
+            "content": module_content.get(module.id),
+            "assets": [
+                asset_response(asset, variants.get(asset.sha256, ()))
+                for asset in module_assets.get(module.id, ())
+            ],
+        }
+        for module in modules
+    ]
+
+
+@router.get("/{lesson_id}/stream", response_class=StreamingResponse)
+async def stream_lesson_changes(
+    lesson_id: int,
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Stream changes to a lesson and its modules as server-sent events
+
+    Each event is named after the change (lesson.updated, module.created,
+    module.updated, module.deleted, modules.reordered, modules.updated,
+    lesson.deleted) and carries the lesson and module ids as JSON. A resync
+    event means changes may have been missed: reload the whole lesson, as
+    after reconnecting.
+    """
+    if not settings.PUSH_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    lesson = await crud.lesson.get(db, id=lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found",
+        )
+
+    # Same access rule as reading the modules
+    if (
+        current_user.role == "student"
+        and lesson.status != LessonStatus.PUBLISHED
+        and not await crud.lesson.is_enrolled(
+            db, lesson_id=lesson_id, student_id=current_user.id
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    if push.hub.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams, please retry",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+
+    # The stream stays open for the whole class; give the connection back now
+    await db.close()
+    return StreamingResponse(
+        push.stream(push.hub, lesson_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.put("/{lesson_id}/modules/order", response_model=List[ModuleResponse])
+async def reorder_modules(
+    lesson_id: int,
+    order_in: ModuleOrder,
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Reorder all modules of a lesson in one request
+
+    `module_ids` lists every module of the lesson in its new order.
+    """
+    lesson = await crud.lesson.get(db, id=lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found",
+        )
+
+    # Only the teacher who created the lesson or an admin can reorder modules
+    if lesson.teacher_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    await restore_content(db, lesson)
+    module_ids = await crud.module.get_lesson_module_ids(db, lesson_id=lesson_id)
+    if len(order_in.module_ids) != len(set(order_in.module_ids)) or set(
+        order_in.module_ids
+    ) != set(module_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="module_ids must list every module of the lesson exactly once",
+        )
+
+    await crud.module.reorder(db, lesson_id=lesson_id, module_ids=order_in.module_ids)
+    modules = await crud.module.get_lesson_modules(db, lesson_id=lesson_id, limit=None)
+    return modules
+
+
+@router.put("/{lesson_id}/modules", response_model=List[ModuleResponse])
+async def upsert_modules(
+    lesson_id: int,
+    batch_in: ModuleBatch,
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Create and update several modules of a lesson at once
+
+    Entries with an `id` update that module (omitted fields are kept);
+    entries without one create a module. Returns all modules of the lesson.
+    """
+    lesson = await crud.lesson.get(db, id=lesson_id)
+    if not lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found",
+        )
+
+    # Only the teacher who created the lesson or an admin can edit modules
+    if lesson.teacher_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+    await restore_content(db, lesson)
+    updated_ids = [item.id for item in batch_in.modules if item.id is not None]
+    if len(updated_ids) != len(set(updated_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each module may appear only once",
+        )
+    unknown = set(updated_ids) - set(
+        await crud.module.get_lesson_module_ids(db, lesson_id=lesson_id)
+    )
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Modules not found in this lesson: {sorted(unknown)}",
+        )
+
+    modules = await crud.module.upsert_many(
+        db, lesson_id=lesson_id, items=batch_in.modules
+    )
     return modules
 
 
@@ -274,7 +575,7 @@ async def update_module(
     lesson_id: int,
     module_id: int,
     module_in: ModuleUpdate,
-    current_user: User = Depends(get_current_teacher_or_admin_user),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -297,6 +598,7 @@ async def update_module(
             detail="Not enough permissions",
         )
     
+    await restore_content(db, lesson)
     module = await crud.module.get(db, id=module_id)
     if not module or module.lesson_id != lesson_id:
         raise HTTPException(
@@ -312,7 +614,7 @@ async def update_module(
 async def delete_module(
     lesson_id: int,
     module_id: int,
-    current_user: User = Depends(get_current_teacher_or_admin_user),
+    current_user: AuthUser = Depends(get_current_teacher_or_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -346,12 +648,88 @@ async def delete_module(
     return module
 
 
+# Progress routes
+@router.post(
+    "/{lesson_id}/modules/{module_id}/progress",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_class=Response,
+)
+async def record_module_progress(
+    lesson_id: int,
+    module_id: int,
+    progress_in: ModuleProgressUpdate,
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Record how far the current user got through a module
+
+    Progress is buffered and written in batches, so it is accepted rather
+    than stored when this returns.
+    """
+    ref = await crud.module.get_lesson_ref(db, module_id=module_id)
+    if not ref or ref[0] != lesson_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Module not found",
+        )
+    
+    # Student can only access published lessons or ones they're enrolled in
+    if (
+        current_user.role == "student"
+        and ref[1] != LessonStatus.PUBLISHED
+        and not await crud.lesson.is_enrolled(
+            db, lesson_id=lesson_id, student_id=current_user.id
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    
+    if not progress.buffer.record(
+        student_id=current_user.id,
+        lesson_id=lesson_id,
+        module_id=module_id,
+        progress=progress_in.progress,
+        completed=progress_in.completed,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress cannot be recorded right now",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        )
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/{lesson_id}/progress", response_model=List[ModuleProgressResponse])
+async def read_lesson_progress(
+    lesson_id: int,
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the current user's progress through the modules of a lesson
+    """
+    stored = await crud.progress.get_lesson_progress(
+        db, student_id=current_user.id, lesson_id=lesson_id
+    )
+    # Include progress recorded since the last flush
+    return progress.buffer.overlay(
+        current_user.id,
+        lesson_id,
+        [
+            ModuleProgressResponse.model_validate(row, from_attributes=True).model_dump()
+            for row in stored
+        ],
+    )
+
+
 # Enrollment routes
 @router.post("/{lesson_id}/enroll", response_model=EnrollmentResponse)
 async def enroll_in_lesson(
     lesson_id: int,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -374,11 +752,9 @@ async def enroll_in_lesson(
             detail="Lesson is not published",
         )
     
+    # Also enqueues the teacher notification, run by `manage.py worker`
     enrollment = await crud.enrollment.enroll_student(
         db, student_id=current_user.id, lesson_id=lesson_id
     )
     
-    # Add background task to send enrollment notification
-    # background_tasks.add_task(send_enrollment_notification, enrollment.id)
-    
     return enrollment
\ No newline at end of file
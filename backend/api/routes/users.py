@@ -1,20 +1,25 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import crud
 from api.deps import (
     get_current_active_user,
     get_current_admin_user,
+    get_current_user_record,
     get_db,
 )
+from core.config import settings
 from models.user import User
+from schemas.auth import AuthUser
+from schemas.lesson import LearningPage
 from schemas.user import (
     CurrentUser,
     UserCreate,
     UserDetailResponse,
     UserResponse,
+    UserSuggestion,
     UserUpdate,
 )
 
@@ -23,7 +28,7 @@ router = APIRouter()
 
 @router.get("/me", response_model=CurrentUser)
 async def read_current_user(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
 ) -> Any:
     """
     Get current user
@@ -34,7 +39,7 @@ async def read_current_user(
 @router.patch("/me", response_model=UserResponse)
 async def update_current_user(
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_user_record),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -44,11 +49,56 @@ async def update_current_user(
     return user
 
 
+@router.get("/me/learning", response_model=LearningPage)
+async def read_current_user_learning(
+    before: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    current_user: AuthUser = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the current user's enrollments with lesson summaries and progress
+
+    Newest enrollments first. Pass `next_cursor` from the response as
+    `before` to get the next page.
+    """
+    rows = await crud.enrollment.get_student_learning(
+        db, student_id=current_user.id, before=before, limit=limit
+    )
+    items = []
+    for row in rows:
+        module_count = row.module_count or 0
+        completed_modules = min(row.completed_modules or 0, module_count)
+        items.append(
+            {
+                "enrollment_id": row.Enrollment.id,
+                "status": row.Enrollment.status,
+                "enrolled_at": row.Enrollment.created_at,
+                "lesson": {
+                    "id": row.Enrollment.lesson_id,
+                    "title": row.title,
+                    "description": row.description,
+                    "status": row.lesson_status,
+                    "teacher_id": row.teacher_id,
+                    "updated_at": row.lesson_updated_at,
+                },
+                "module_count": module_count,
+                "completed_modules": completed_modules,
+                "completion": (
+                    completed_modules / module_count if module_count else 0.0
+                ),
+                "last_activity_at": row.last_activity_at,
+            }
+        )
+    next_cursor = items[-1]["enrollment_id"] if len(items) == limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
 @router.get("", response_model=List[UserResponse])
 async def read_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthUser = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -61,7 +111,7 @@ async def read_users(
 @router.post("", response_model=UserResponse)
 async def create_user(
     user_in: UserCreate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthUser = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -78,10 +128,29 @@ async def create_user(
     return user
 
 
+@router.get("/suggest", response_model=List[UserSuggestion])
+async def suggest_users(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(settings.SUGGEST_LIMIT, ge=1, le=20),
+    current_user: AuthUser = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Typeahead lookup of users by email or name (admin only)
+    """
+    suggestions = await crud.user.suggest(db, q=q, limit=limit)
+    if suggestions is None:
+        # Over the latency budget; the next keystroke will try again
+        return []
+    response.headers["Cache-Control"] = f"private, max-age={settings.SUGGEST_CACHE_TTL}"
+    return suggestions
+
+
 @router.get("/{user_id}", response_model=UserDetailResponse)
 async def read_user_by_id(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthUser = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -108,7 +177,7 @@ async def read_user_by_id(
 async def update_user(
     user_id: int,
     user_in: UserUpdate,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthUser = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
@@ -128,7 +197,7 @@ async def update_user(
 @router.delete("/{user_id}", response_model=UserResponse)
 async def delete_user(
     user_id: int,
-    current_user: User = Depends(get_current_admin_user),
+    current_user: AuthUser = Depends(get_current_admin_user),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
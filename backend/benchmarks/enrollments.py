@@ -0,0 +1,349 @@
+#!/usr/bin/env python
+"""
+Time the enrollment queries on a district-sized enrollments table
+
+Seeds students, teachers, lessons and enrollments server-side with
+generate_series (deterministically, so two databases seeded with the same
+--rows hold the same data), then times the CRUD queries that read
+enrollments by lesson and by student:
+
+    python manage.py bench-enrollments --output before.json
+    python manage.py db upgrade
+    python manage.py bench-enrollments --compare before.json
+
+Run the first pass on a database migrated to d8a3f6b2c4e9 (enrollments as a
+single table) and the second after upgrading to the partitioned layout.
+Seeding is idempotent: rows already present are kept.
+
+Partitioning by lesson has a price: a lookup by student alone (the enrolled
+lessons list, the learning page) cannot be pruned and probes the
+(student_id, lesson_id) index of every partition. student_lessons and
+student_learning time that path, and the partitions each lookup reads are
+counted from its plan and reported next to the timings.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+BULK_DOMAIN = "district.bench.edu-fi.local"
+ENROLLMENTS_PER_STUDENT = 20
+ENROLLMENTS_PER_LESSON = 500
+LESSONS_PER_TEACHER = 20
+# Students enrolled per INSERT, so each batch commits ~1M rows
+STUDENT_BATCH = 50_000
+
+SEED_USERS = text("""
+    INSERT INTO users (email, first_name, last_name, is_active, role,
+                       hashed_password, token_version)
+    SELECT :prefix || n || '@' || :domain, :first_name, n::text, true,
+           CAST(:role AS userrole), :hashed_password, 0
+    FROM generate_series(0, :count - 1) AS n
+    ON CONFLICT (email) DO NOTHING
+    """)
+
+SEED_LESSONS = text("""
+    INSERT INTO lessons (title, description, status, content, teacher_id)
+    SELECT 'District lesson ' || n, 'Enrollment benchmark lesson',
+           CAST('PUBLISHED' AS lessonstatus), 'Lorem ipsum dolor sit amet.', t.id
+    FROM generate_series(:start, :count - 1) AS n
+    JOIN (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn
+        FROM users WHERE email LIKE 'teacher%@' || :domain
+    ) AS t ON t.rn = n / :per_teacher
+    """)
+
+# Student n takes lessons n*31 + k*step (mod lessons) for k < per_student,
+# which never repeats a lesson for the same student while step*per_student
+# stays below the number of lessons
+SEED_ENROLLMENTS = text("""
+    INSERT INTO enrollments (student_id, lesson_id, status)
+    SELECT s.id, l.id, CASE WHEN (s.rn + k) % 10 = 0 THEN 'completed'
+                            ELSE 'active' END
+    FROM (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn
+        FROM users WHERE email LIKE 'student%@' || :domain
+    ) AS s
+    CROSS JOIN generate_series(0, :per_student - 1) AS k
+    JOIN (
+        SELECT id, row_number() OVER (ORDER BY id) - 1 AS rn
+        FROM lessons WHERE title LIKE 'District lesson %' AND teacher_id IN (
+            SELECT id FROM users WHERE email LIKE 'teacher%@' || :domain
+        )
+    ) AS l ON l.rn = (s.rn * 31 + k * :step) % :lessons
+    WHERE s.rn >= :start AND s.rn < :stop
+    ON CONFLICT DO NOTHING
+    """)
+
+
+async def seed(rows: int) -> Dict[str, List[int]]:
+    """
+    Seed about `rows` enrollments and return the ids the queries sample
+    """
+    from core.db import async_session
+    from core.security import get_password_hash
+    from models.base import UserRole
+
+    students = max(rows // ENROLLMENTS_PER_STUDENT, 1)
+    lessons = max(rows // ENROLLMENTS_PER_LESSON, ENROLLMENTS_PER_STUDENT)
+    teachers = -(-lessons // LESSONS_PER_TEACHER)
+    step = lessons // ENROLLMENTS_PER_STUDENT
+    hashed = get_password_hash("bench-password")
+
+    async with async_session() as db:
+        for prefix, role, count in (
+            ("teacher", UserRole.TEACHER, teachers),
+            ("student", UserRole.STUDENT, students),
+        ):
+            await db.execute(
+                SEED_USERS,
+                {
+                    "prefix": prefix,
+                    "domain": BULK_DOMAIN,
+                    "first_name": prefix.title(),
+                    "role": role.name,
+                    "hashed_password": hashed,
+                    "count": count,
+                },
+            )
+        await db.commit()
+
+        existing = await db.scalar(
+            text(
+                "SELECT count(*) FROM lessons WHERE title LIKE 'District lesson %' "
+                "AND teacher_id IN (SELECT id FROM users WHERE email LIKE "
+                "'teacher%@' || :domain)"
+            ),
+            {"domain": BULK_DOMAIN},
+        )
+        if existing < lessons:
+            await db.execute(
+                SEED_LESSONS,
+                {
+                    "start": existing,
+                    "count": lessons,
+                    "domain": BULK_DOMAIN,
+                    "per_teacher": LESSONS_PER_TEACHER,
+                },
+            )
+            await db.commit()
+
+        for start in range(0, students, STUDENT_BATCH):
+            started = time.perf_counter()
+            result = await db.execute(
+                SEED_ENROLLMENTS,
+                {
+                    "domain": BULK_DOMAIN,
+                    "per_student": ENROLLMENTS_PER_STUDENT,
+                    "step": step,
+                    "lessons": lessons,
+                    "start": start,
+                    "stop": start + STUDENT_BATCH,
+                },
+            )
+            await db.commit()
+            print(
+                f"Enrolled students {start}-{min(start + STUDENT_BATCH, students)}: "
+                f"{result.rowcount} rows in {time.perf_counter() - started:.1f}s"
+            )
+        await db.execute(text("ANALYZE users, lessons, enrollments"))
+        await db.commit()
+
+        ids = {}
+        for key, query in (
+            ("students", "SELECT id FROM users WHERE email LIKE 'student%@' || :d"),
+            ("teachers", "SELECT id FROM users WHERE email LIKE 'teacher%@' || :d"),
+            (
+                "lessons",
+                "SELECT id FROM lessons WHERE title LIKE 'District lesson %' "
+                "AND teacher_id IN (SELECT id FROM users WHERE email LIKE "
+                "'teacher%@' || :d)",
+            ),
+        ):
+            result = await db.execute(text(f"{query} ORDER BY id"), {"d": BULK_DOMAIN})
+            ids[key] = list(result.scalars().all())
+        return ids
+
+
+async def run_queries(
+    ids: Dict[str, List[int]], samples: int
+) -> Dict[str, Dict[str, float]]:
+    """Time each enrollment query on the same sampled ids"""
+    from benchmarks.scenarios import percentile
+    from core.db import async_session
+    from crud.lesson import enrollment, lesson
+
+    rng = random.Random(0)
+    students = rng.choices(ids["students"], k=samples)
+    teachers = rng.choices(ids["teachers"], k=samples)
+    lessons = rng.choices(ids["lessons"], k=samples)
+
+    async with async_session() as db:
+        # Enrollment ids to look up with their lesson, as the routes do
+        result = await db.execute(
+            text(
+                "SELECT id, lesson_id FROM enrollments WHERE student_id = ANY(:ids) "
+                "ORDER BY id"
+            ),
+            {"ids": students},
+        )
+        rows = result.all()
+        picks = [rows[rng.randrange(len(rows))] for _ in range(samples)]
+
+        queries: Dict[str, Callable[[int], Awaitable]] = {
+            "student_count": lambda i: lesson.get_student_count(
+                db, lesson_id=lessons[i]
+            ),
+            "is_enrolled": lambda i: lesson.is_enrolled(
+                db, lesson_id=lessons[i], student_id=students[i]
+            ),
+            "student_learning": lambda i: enrollment.get_student_learning(
+                db, student_id=students[i]
+            ),
+            "student_lessons": lambda i: lesson.get_student_lessons(
+                db, student_id=students[i]
+            ),
+            "teacher_dashboard": lambda i: lesson.get_teacher_dashboard(
+                db, teacher_id=teachers[i]
+            ),
+            "enrollment_by_lesson": lambda i: enrollment.get(
+                db, picks[i][0], lesson_id=picks[i][1]
+            ),
+        }
+        results = {}
+        for name, query in queries.items():
+            latencies = []
+            for i in range(samples):
+                started = time.perf_counter()
+                await query(i)
+                latencies.append(time.perf_counter() - started)
+                # Keep identity-map hits from masking the query cost
+                db.expunge_all()
+            latencies.sort()
+            results[name] = {
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            }
+            print(f"{name:<22} {json.dumps(results[name])}")
+        return results
+
+
+# Enrollment lookups whose plans are checked for partition pruning
+PRUNING_QUERIES = {
+    "by_lesson": "SELECT id FROM enrollments WHERE lesson_id = :lesson_id",
+    "by_student": "SELECT id FROM enrollments WHERE student_id = :student_id",
+    "by_lesson_and_student": (
+        "SELECT id FROM enrollments "
+        "WHERE lesson_id = :lesson_id AND student_id = :student_id"
+    ),
+}
+
+
+def _relations(plan: dict) -> set:
+    relations = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        relations |= _relations(child)
+    return relations
+
+
+async def partitions_read(ids: Dict[str, List[int]]) -> Dict[str, int]:
+    """Count the enrollment tables each lookup's plan reads"""
+    from core.db import async_session
+
+    params = {"lesson_id": ids["lessons"][0], "student_id": ids["students"][0]}
+    async with async_session() as db:
+        counts = {}
+        for name, query in PRUNING_QUERIES.items():
+            plan = await db.scalar(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            counts[name] = len(_relations(plan[0]["Plan"]))
+            print(f"{name:<22} reads {counts[name]} table(s)")
+        return counts
+
+
+async def table_layout() -> str:
+    from core.db import async_session
+
+    async with async_session() as db:
+        partitions = await db.scalar(
+            text(
+                "SELECT count(*) FROM pg_inherits "
+                "WHERE inhparent = 'enrollments'::regclass"
+            )
+        )
+    return f"{partitions} partitions" if partitions else "single table"
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Edu-Fi enrollment benchmark")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=10_000_000,
+        help="Enrollments to seed (default: 10,000,000)",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=200, help="Calls timed per query"
+    )
+    parser.add_argument("--output", type=Path, help="Write results to a JSON file")
+    parser.add_argument(
+        "--compare", type=Path, help="JSON file from an earlier run to compare with"
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    async def bench():
+        from core.db import engine
+
+        try:
+            ids = await seed(args.rows)
+            layout = await table_layout()
+            print(f"Enrollments: {layout}")
+            partitions = await partitions_read(ids)
+            return layout, partitions, await run_queries(ids, args.samples)
+        finally:
+            await engine.dispose()
+
+    layout, partitions, results = asyncio.run(bench())
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {"layout": layout, "partitions": partitions, "queries": results},
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"Results written to {args.output}")
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        print(f"Against {previous['layout']}:")
+        for name, current in results.items():
+            before = previous["queries"].get(name)
+            if not before:
+                continue
+            for key in ("p50_ms", "p95_ms"):
+                ratio = before[key] / current[key] if current[key] else 0.0
+                print(
+                    f"  {name:<22} {key} {before[key]} -> {current[key]} "
+                    f"({ratio:.2f}x)"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
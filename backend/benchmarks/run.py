@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+Run the classroom benchmark scenarios and compare them with a baseline
+
+The app is driven in process through httpx's ASGI transport against the
+database configured in .env, so point POSTGRES_DB (or SQLALCHEMY_DATABASE_URI)
+at a dedicated benchmark database:
+
+    python manage.py bench                     # compare with baseline.json
+    python manage.py bench --update-baseline   # record a new baseline
+    python manage.py bench -s lesson_reads -s login_storm
+
+Exits with status 1 when a scenario regresses beyond the tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+async def run_scenarios(names: List[str], rounds: int) -> Dict[str, Dict[str, float]]:
+    """Seed the classroom and run each scenario in turn"""
+    # One teacher editing every module of a lesson, round after round, runs
+    # past the per-user rate limit. Scenarios measure the app itself, not
+    # the shedding policy.
+    os.environ["ADMISSION_ENABLED"] = "False"
+
+    # Imported here so building the manage.py parser does not load the app
+    from benchmarks.scenarios import SCENARIOS, seed
+    from main import app
+
+    fixtures = await seed()
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    # ASGITransport does not send lifespan events, so run startup explicitly
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=120
+    ) as client:
+        for name in names:
+            result = await SCENARIOS[name](client, fixtures, rounds)
+            results[name] = result.summary()
+            print(f"{name:<20} {json.dumps(results[name])}")
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Return a description of every regression against the baseline
+
+    Latency and throughput may drift by `tolerance` (a fraction) before
+    failing, but query counts are deterministic and must not grow at all.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if current[key] > previous[key] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {key} {current[key]} > {previous[key]} (+{tolerance:.0%})"
+                )
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput_rps {current['throughput_rps']} < "
+                f"{previous['throughput_rps']} (-{tolerance:.0%})"
+            )
+        if current["queries_per_request"] > previous["queries_per_request"]:
+            regressions.append(
+                f"{name}: queries_per_request {current['queries_per_request']} > "
+                f"{previous['queries_per_request']}"
+            )
+        if current["errors"] > previous["errors"]:
+            regressions.append(
+                f"{name}: errors {current['errors']} > {previous['errors']}"
+            )
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Edu-Fi API benchmarks")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--scenario",
+        "-s",
+        action="append",
+        help="Scenario to run (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Repetitions per scenario"
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON file"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed latency/throughput regression as a fraction (default: 0.2)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write results to the baseline instead of comparing",
+    )
+
+
+def run(args: argparse.Namespace) -> int:
+    from benchmarks.scenarios import SCENARIOS
+
+    names = args.scenario or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        print(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        print(f"Available: {', '.join(SCENARIOS)}")
+        return 2
+    results = asyncio.run(run_scenarios(names, args.rounds))
+
+    if args.update_baseline or not args.baseline.exists():
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.tolerance
+    )
+    if regressions:
+        print("Performance regressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Classroom load scenarios run in process against main.app
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from sqlalchemy import delete, select
+from sqlmodel import SQLModel
+
+from core.db import async_session, engine
+from core.query_stats import capture_queries
+from core.security import create_access_token, get_password_hash, user_claims
+from models.lesson import Lesson, Module
+from models.base import LessonStatus, UserRole
+from models.user import Enrollment, User
+
+BENCH_PASSWORD = "bench-password"
+BENCH_DOMAIN = "bench.edu-fi.local"
+CLASS_SIZE = 40
+MODULES_PER_LESSON = 30
+
+
+@dataclass
+class Fixtures:
+    """Users, lessons and tokens shared by all scenarios"""
+
+    admin: User
+    teacher: User
+    students: List[User]
+    lessons: List[Lesson]
+    modules: Dict[int, List[Module]]
+    tokens: Dict[int, str] = field(default_factory=dict)
+
+    def headers(self, user: User) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[user.id]}"}
+
+
+@dataclass
+class ScenarioResult:
+    """Latencies and query counts collected from one scenario"""
+
+    name: str
+    latencies: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+    duration: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        requests = len(latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput_rps": (
+                round(requests / self.duration, 2) if self.duration else 0.0
+            ),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_per_request": (
+                round(sum(self.queries) / len(self.queries), 2) if self.queries else 0.0
+            ),
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+async def _get_or_create_user(db, *, email: str, role: UserRole, hashed: str) -> User:
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    if user is None:
+        user = User(
+            email=email,
+            first_name="Bench",
+            last_name=role.value.title(),
+            role=role,
+            hashed_password=hashed,
+        )
+        db.add(user)
+        await db.flush()
+    return user
+
+
+async def seed() -> Fixtures:
+    """
+    Create the benchmark classroom if it does not exist yet
+
+    All rows use the bench.edu-fi.local email domain, so seeding is
+    idempotent and never touches real users. The bench students'
+    enrollments are removed on every run, so enrollment_burst always
+    measures new enrollments rather than the "already enrolled" path.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    # One bcrypt hash shared by every bench account keeps seeding fast
+    hashed = get_password_hash(BENCH_PASSWORD)
+    async with async_session() as db:
+        admin = await _get_or_create_user(
+            db, email=f"admin@{BENCH_DOMAIN}", role=UserRole.ADMIN, hashed=hashed
+        )
+        teacher = await _get_or_create_user(
+            db, email=f"teacher@{BENCH_DOMAIN}", role=UserRole.TEACHER, hashed=hashed
+        )
+        students = [
+            await _get_or_create_user(
+                db,
+                email=f"student{i}@{BENCH_DOMAIN}",
+                role=UserRole.STUDENT,
+                hashed=hashed,
+            )
+            for i in range(CLASS_SIZE)
+        ]
+
+        result = await db.execute(
+            select(Lesson).where(Lesson.teacher_id == teacher.id).order_by(Lesson.id)
+        )
+        lessons = list(result.scalars().all())
+        while len(lessons) < 5:
+            lesson = Lesson(
+                title=f"Bench lesson {len(lessons) + 1}",
+                description="Benchmark lesson",
+                status=LessonStatus.PUBLISHED,
+                content="Lorem ipsum dolor sit amet. " * 200,
+                teacher_id=teacher.id,
+            )
+            db.add(lesson)
+            await db.flush()
+            db.add_all(
+                Module(
+                    title=f"Module {order + 1}",
+                    order=order,
+                    content="Consectetur adipiscing elit. " * 100,
+                    lesson_id=lesson.id,
+                )
+                for order in range(MODULES_PER_LESSON)
+            )
+            lessons.append(lesson)
+
+        await db.execute(
+            delete(Enrollment).where(
+                Enrollment.student_id.in_([student.id for student in students])
+            )
+        )
+        await db.commit()
+
+        modules = {}
+        for lesson in lessons:
+            result = await db.execute(
+                select(Module)
+                .where(Module.lesson_id == lesson.id)
+                .order_by(Module.order)
+            )
+            modules[lesson.id] = list(result.scalars().all())
+
+    fixtures = Fixtures(
+        admin=admin,
+        teacher=teacher,
+        students=students,
+        lessons=lessons,
+        modules=modules,
+    )
+    for user in [admin, teacher, *students]:
+        fixtures.tokens[user.id] = create_access_token(
+            user.id, claims=user_claims(user)
+        )
+    return fixtures
+
+
+async def _run(
+    name: str,
+    calls: List[Callable[[], Awaitable[httpx.Response]]],
+    concurrency: int,
+) -> ScenarioResult:
+    """Run calls with bounded concurrency, timing each one"""
+    result = ScenarioResult(name=name)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(call):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await call()
+            result.latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                result.errors += 1
+
+    with capture_queries() as captured:
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(call) for call in calls))
+        result.duration = time.perf_counter() - start
+    result.queries = [stats.count for stats in captured]
+    return result
+
+
+async def login_storm(client: httpx.AsyncClient, fixtures: Fixtures, rounds: int):
+    """Every student logs in at the start of class"""
+    calls = [
+        lambda student=student: client.post(
+            "/api/v1/auth/login",
+            data={"username": student.email, "password": BENCH_PASSWORD},
+        )
+        for _ in range(rounds)
+        for student in fixtures.students
+    ]
+    return await _run("login_storm", calls, concurrency=CLASS_SIZE)
+
+
+async def lesson_reads(client: httpx.AsyncClient, fixtures: Fixtures, rounds: int):
+    """The whole class opens the same lesson at once"""
+    lesson = fixtures.lessons[0]
+    calls = [
+        lambda student=student: client.get(
+            f"/api/v1/lessons/{lesson.id}", headers=fixtures.headers(student)
+        )
+        for _ in range(rounds)
+        for student in fixtures.students
+    ]
+    return await _run("lesson_reads", calls, concurrency=CLASS_SIZE)
+
+
+async def enrollment_burst(client: httpx.AsyncClient, fixtures: Fixtures, rounds: int):
+    """The whole class enrolls in the lessons the teacher just published"""
+    calls = [
+        lambda student=student, lesson=lesson: client.post(
+            f"/api/v1/lessons/{lesson.id}/enroll", headers=fixtures.headers(student)
+        )
+        for lesson in fixtures.lessons[:rounds]
+        for student in fixtures.students
+    ]
+    return await _run("enrollment_burst", calls, concurrency=CLASS_SIZE)
+
+
+async def module_editing(client: httpx.AsyncClient, fixtures: Fixtures, rounds: int):
+    """A teacher edits and reorders modules of a lesson"""
+    lesson = fixtures.lessons[1]
+    modules = fixtures.modules[lesson.id]
+    calls = [
+        lambda module=module, i=i: client.patch(
+            f"/api/v1/lessons/{lesson.id}/modules/{module.id}",
+            json={"title": f"Module {module.order + 1} (rev {i})"},
+            headers=fixtures.headers(fixtures.teacher),
+        )
+        for i in range(rounds)
+        for module in modules
+    ]
+    return await _run("module_editing", calls, concurrency=4)
+
+
+async def admin_user_listing(
+    client: httpx.AsyncClient, fixtures: Fixtures, rounds: int
+):
+    """An admin pages through the user list"""
+    calls = [
+        lambda skip=skip: client.get(
+            f"/api/v1/users?skip={skip}&limit=20",
+            headers=fixtures.headers(fixtures.admin),
+        )
+        for _ in range(rounds)
+        for skip in range(0, CLASS_SIZE, 20)
+    ]
+    return await _run("admin_user_listing", calls, concurrency=4)
+
+
+SCENARIOS = {
+    "login_storm": login_storm,
+    "lesson_reads": lesson_reads,
+    "enrollment_burst": enrollment_burst,
+    "module_editing": module_editing,
+    "admin_user_listing": admin_user_listing,
+}
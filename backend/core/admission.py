@@ -0,0 +1,227 @@
+"""
+Admission control and load shedding.
+
+Requests are classified into priority classes and admitted against two
+signals: the number of requests in flight and how long recent pool
+checkouts had to wait. As pressure rises the lowest priorities are shed
+first, with a 503 and Retry-After, so a saturated Pi answers quickly instead
+of letting every client hang for DATABASE_POOL_TIMEOUT.
+
+Per-client token buckets are applied on top: authenticated requests are
+limited per user and anonymous requests per IP. Authenticated traffic is
+not limited per IP because a whole classroom may share one address. For the
+same reason logins, which are anonymous by nature, draw on a separate and
+larger per-IP budget, so a class logging in at once behind one NAT address
+neither gets 429s nor uses up the budget of other anonymous requests.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import List, Optional, Tuple
+
+from core import metrics
+from core.config import settings
+
+
+class Priority(str, Enum):
+    CRITICAL = "critical"  # never shed (health and metrics)
+    HIGH = "high"  # lesson reads students are waiting on
+    NORMAL = "normal"
+    BULK = "bulk"  # admin and bulk routes, shed first
+
+
+# First matching (method, path prefix) wins; None matches any method
+PRIORITY_RULES: List[Tuple[Optional[str], str, Priority]] = [
+    (None, "/health", Priority.CRITICAL),
+    (None, "/metrics", Priority.CRITICAL),
+    (None, f"{settings.API_V1_STR}/admin", Priority.BULK),
+    (None, f"{settings.API_V1_STR}/events", Priority.BULK),
+    ("GET", f"{settings.API_V1_STR}/lessons", Priority.HIGH),
+    ("GET", f"{settings.API_V1_STR}/users/me", Priority.HIGH),
+    ("GET", f"{settings.API_V1_STR}/users", Priority.BULK),
+]
+
+
+LOGIN_PATHS = (
+    f"{settings.API_V1_STR}/auth/login",
+    f"{settings.API_V1_STR}/auth/login/json",
+)
+
+
+def classify(method: str, path: str) -> Priority:
+    for rule_method, prefix, priority in PRIORITY_RULES:
+        if (rule_method is None or rule_method == method) and path.startswith(prefix):
+            return priority
+    return Priority.NORMAL
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `rate` tokens per second
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def acquire(self, cost: float = 1.0) -> float:
+        """
+        Take `cost` tokens; return 0 on success, otherwise the seconds until
+        enough tokens will be available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class BucketTable:
+    """
+    Token buckets per client key, evicting the least recently used beyond
+    `max_size` so memory stays bounded under a flood of distinct clients
+    """
+
+    def __init__(self, rate: float, capacity: float, max_size: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_size:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.acquire(cost)
+
+
+class DecayingAverage:
+    """
+    Exponentially weighted average that also decays toward zero while no
+    samples arrive, so a burst of slow checkouts does not keep shedding
+    load after the pool has drained
+    """
+
+    def __init__(self, half_life: float):
+        self.decay = math.log(2) / half_life
+        self.value = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now: float) -> float:
+        return self.value * math.exp(-self.decay * (now - self.updated))
+
+    def observe(self, sample: float, weight: float = 0.2) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self.value = self._decayed(now) * (1 - weight) + sample * weight
+            self.updated = now
+
+    def get(self) -> float:
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+
+class AdmissionController:
+    """
+    Tracks load and decides whether to admit a request
+    """
+
+    # Pressure (0..1+) at which each priority starts being shed
+    SHED_AT = {
+        Priority.BULK: 0.5,
+        Priority.NORMAL: 0.8,
+        Priority.HIGH: 1.0,
+    }
+
+    def __init__(self):
+        self.in_flight = 0
+        self.pool_wait = DecayingAverage(half_life=5.0)
+        self.users = BucketTable(
+            settings.ADMISSION_USER_RATE, settings.ADMISSION_USER_BURST
+        )
+        self.ips = BucketTable(settings.ADMISSION_IP_RATE, settings.ADMISSION_IP_BURST)
+        self.logins = BucketTable(
+            settings.ADMISSION_LOGIN_RATE, settings.ADMISSION_LOGIN_BURST
+        )
+
+    def pressure(self) -> float:
+        """
+        Load as a fraction of capacity; 1.0 means saturated
+        """
+        in_flight = self.in_flight / max(settings.ADMISSION_MAX_IN_FLIGHT, 1)
+        pool_wait = (
+            self.pool_wait.get() * 1000 / max(settings.ADMISSION_POOL_WAIT_TARGET_MS, 1)
+        )
+        return max(in_flight, pool_wait)
+
+    def check_load(self, priority: Priority) -> bool:
+        """
+        Whether a request of this priority may enter at the current load
+        """
+        if priority == Priority.CRITICAL:
+            return True
+        return self.pressure() < self.SHED_AT[priority]
+
+    def check_rate(
+        self, user_key: Optional[str], client_ip: Optional[str], path: str = ""
+    ) -> float:
+        """
+        Apply the client's token bucket; return seconds to wait, 0 if admitted
+        """
+        if user_key is not None:
+            return self.users.acquire(user_key)
+        if client_ip is not None:
+            if path in LOGIN_PATHS:
+                return self.logins.acquire(client_ip)
+            return self.ips.acquire(client_ip)
+        return 0.0
+
+    def admit(
+        self,
+        method: str,
+        path: str,
+        user_key: Optional[str],
+        client_ip: Optional[str],
+    ) -> Optional[Tuple[int, str, int]]:
+        """
+        Classify a request and apply the rate limit, then the load check
+
+        Returns None if the request is admitted, otherwise the status code,
+        detail and Retry-After seconds to refuse it with.
+        """
+        priority = classify(method, path)
+        if priority == Priority.CRITICAL:
+            return None
+        retry_after = self.check_rate(user_key, client_ip, path)
+        if retry_after > 0:
+            metrics.REQUESTS_SHED.inc(reason="rate", priority=priority.value)
+            return 429, "Too many requests", math.ceil(retry_after)
+        if not self.check_load(priority):
+            metrics.REQUESTS_SHED.inc(reason="overload", priority=priority.value)
+            return 503, "Server is busy, please retry", settings.ADMISSION_RETRY_AFTER
+        return None
+
+
+controller = AdmissionController()
+metrics.ADMISSION_PRESSURE.set_function(controller.pressure)
+
+
+def record_pool_wait(seconds: float) -> None:
+    controller.pool_wait.observe(seconds)
@@ -0,0 +1,343 @@
+"""
+Content-addressed storage for lesson assets.
+
+Uploads are streamed straight from the request body to a temporary file
+under ASSET_ROOT while their SHA-256 is computed, then renamed to
+ASSET_ROOT/ab/cd/<sha256>. Identical uploads end up as one file on disk;
+each upload still gets its own assets row with its name and module.
+
+A blob's path never changes and its content never changes, so downloads
+are served with the hash as ETag and cached as immutable. Bodies are sent
+straight from the file: by the reverse proxy when ASSET_ACCEL_REDIRECT is
+set, with the ASGI zero-copy send extension when the server offers it, and
+otherwise in fixed-size chunks.
+
+Downloads are not authenticated and share the API's origin, so the type an
+uploader claims is only trusted for media a browser renders without running
+script (INLINE_TYPES). Anything else, HTML and SVG included, is sent as an
+application/octet-stream attachment. Every blob also carries nosniff and a
+sandboxing Content-Security-Policy.
+"""
+
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from core.config import settings
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Uploads of these types get downscaled variants (see core.variants)
+VARIANT_SOURCE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
+VARIANT_CONTENT_TYPE = "image/webp"
+
+# Served inline with the uploaded type; everything else is downloaded
+INLINE_TYPES = {
+    "application/pdf",
+    "audio/mpeg",
+    "audio/ogg",
+    "audio/wav",
+    "image/avif",
+    "image/gif",
+    "image/jpeg",
+    "image/png",
+    "image/webp",
+    "text/plain",
+    "video/mp4",
+    "video/webm",
+}
+DOWNLOAD_TYPE = "application/octet-stream"
+# Sent with every blob: no type sniffing, and anything the browser does
+# render gets a unique origin with scripts disabled
+SAFE_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "sandbox",
+}
+
+
+class UploadError(Exception):
+    """
+    The upload was malformed or too large; `status_code` says which
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def blob_path(sha256: str) -> Path:
+    """
+    Where the blob with this hash is stored
+    """
+    return Path(settings.ASSET_ROOT) / sha256[:2] / sha256[2:4] / sha256
+
+
+def blob_relpath(sha256: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def variant_path(sha256: str, width: int) -> Path:
+    """
+    Where the variant of a blob at this width is stored
+    """
+    root = Path(settings.ASSET_ROOT) / "variants"
+    return root / blob_relpath(sha256) / f"{width}.webp"
+
+
+def blob_url(sha256: str) -> str:
+    return f"{settings.API_V1_STR}/assets/{sha256}"
+
+
+def variant_url(sha256: str, width: int) -> str:
+    return f"{blob_url(sha256)}/variants/{width}"
+
+
+def srcset(sha256: str, widths: Iterable[int]) -> Optional[str]:
+    """
+    An HTML srcset listing the variants of a blob, or None without variants
+    """
+    candidates = [f"{variant_url(sha256, width)} {width}w" for width in widths]
+    return ", ".join(candidates) or None
+
+
+class StoredUpload:
+    """
+    Result of storing one uploaded file
+    """
+
+    def __init__(
+        self, sha256: str, size: int, content_type: str, filename: Optional[str]
+    ):
+        self.sha256 = sha256
+        self.size = size
+        self.content_type = content_type
+        self.filename = filename
+
+
+class _MultipartFile:
+    """
+    Collects the first file part of a multipart body as it is parsed
+
+    The parser is synchronous, so its callbacks only queue the file's bytes;
+    the caller writes them out between chunks of the request body.
+    """
+
+    def __init__(self, boundary: bytes):
+        self.parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._part_begin,
+                "on_header_field": self._header_field,
+                "on_header_value": self._header_value,
+                "on_header_end": self._header_end,
+                "on_headers_finished": self._headers_finished,
+                "on_part_data": self._part_data,
+                "on_part_end": self._part_end,
+            },
+        )
+        self.pending: List[bytes] = []
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.found = False
+        self.done = False
+        self._in_file = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+
+    def _part_begin(self) -> None:
+        self._headers = {}
+
+    def _header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _header_end(self) -> None:
+        self._headers[self._field.lower()] = self._value
+        self._field = b""
+        self._value = b""
+
+    def _headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        if self.found or b"filename" not in options:
+            return
+        self.found = self._in_file = True
+        self.filename = options[b"filename"].decode("utf-8", errors="replace")[:255]
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+        self.content_type = content_type.strip() or None
+
+    def _part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self.pending.append(data[start:end])
+
+    def _part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.done = True
+
+
+def _finish_blob(tmp: Path, sha256: str) -> None:
+    final = blob_path(sha256)
+    if final.exists():
+        # Same content uploaded before; keep the existing blob
+        tmp.unlink()
+        return
+    final.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, final)
+    os.chmod(final, 0o444)
+
+
+async def store_multipart(
+    content_type: str, body: AsyncIterator[bytes]
+) -> StoredUpload:
+    """
+    Stream the first file in a multipart/form-data body into the store
+
+    Memory use is bounded by the size of one body chunk, whatever the size
+    of the file.
+    """
+    media_type, options = parse_options_header(content_type)
+    if media_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError(415, "Expected a multipart/form-data upload")
+    upload = _MultipartFile(options[b"boundary"])
+
+    tmp_dir = Path(settings.ASSET_ROOT) / "tmp"
+    await anyio.to_thread.run_sync(lambda: tmp_dir.mkdir(parents=True, exist_ok=True))
+    tmp = tmp_dir / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    size = 0
+
+    def write(file, chunks: List[bytes]) -> None:
+        for chunk in chunks:
+            digest.update(chunk)
+            file.write(chunk)
+
+    file = await anyio.to_thread.run_sync(open, tmp, "xb")
+    try:
+        async for chunk in body:
+            try:
+                upload.parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadError(400, f"Malformed multipart body: {str(e)}")
+            if upload.pending:
+                chunks, upload.pending = upload.pending, []
+                size += sum(len(c) for c in chunks)
+                if size > settings.ASSET_MAX_BYTES:
+                    raise UploadError(
+                        413, f"Assets are limited to {settings.ASSET_MAX_BYTES} bytes"
+                    )
+                await anyio.to_thread.run_sync(write, file, chunks)
+            if upload.done:
+                break
+        if not upload.done:
+            raise UploadError(400, "No complete file part in the upload")
+        await anyio.to_thread.run_sync(file.flush)
+        await anyio.to_thread.run_sync(os.fsync, file.fileno())
+        await anyio.to_thread.run_sync(file.close)
+        sha256 = digest.hexdigest()
+        await anyio.to_thread.run_sync(_finish_blob, tmp, sha256)
+    except BaseException:
+        file.close()
+        tmp.unlink(missing_ok=True)
+        raise
+
+    return StoredUpload(
+        sha256=sha256,
+        size=size,
+        content_type=upload.content_type or "application/octet-stream",
+        filename=upload.filename,
+    )
+
+
+class AssetFileResponse(FileResponse):
+    """
+    FileResponse that hands whole files and single ranges to the server
+    with the zero-copy send extension (sendfile) when it is available
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _zerocopy_send(
+        self, send: Send, status_code: int, offset: int, count: int
+    ) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        with open(self.path, "rb") as file:
+            await send(
+                {
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file.fileno(),
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                }
+            )
+
+    async def _handle_simple(self, send: Send, send_header_only: bool) -> None:
+        if not self._zerocopy or send_header_only:
+            return await super()._handle_simple(send, send_header_only)
+        size = int(self.headers["content-length"])
+        await self._zerocopy_send(send, self.status_code, 0, size)
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if not self._zerocopy or send_header_only:
+            return await super()._handle_single_range(
+                send, start, end, file_size, send_header_only
+            )
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+        self.headers["content-length"] = str(end - start)
+        await self._zerocopy_send(send, 206, start, end - start)
+
+
+def served_type(content_type: str) -> Tuple[str, str]:
+    """
+    Media type and Content-Disposition type to serve an upload with
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in INLINE_TYPES:
+        return media_type, "inline"
+    return DOWNLOAD_TYPE, "attachment"
+
+
+def content_disposition(disposition_type: str, filename: Optional[str]) -> str:
+    """
+    A Content-Disposition header value, as FileResponse builds it
+    """
+    if not filename:
+        return disposition_type
+    return f"{disposition_type}; filename*=utf-8''{quote(filename)}"
+
+
+def etag(sha256: str) -> str:
+    return f'"{sha256}"'
+
+
+def etag_matches(if_none_match: Optional[str], sha256: str) -> bool:
+    """
+    Whether an If-None-Match header already names this blob
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag(sha256) in tags
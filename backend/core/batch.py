@@ -0,0 +1,246 @@
+"""
+In-process batch API.
+
+POST /batch carries a list of API calls and runs each one against the
+application's router without another HTTP round trip. Sub-requests inherit
+the batch's Authorization header, so they are authenticated exactly as if
+the client had sent them itself.
+
+Consecutive GETs run concurrently, up to BATCH_CONCURRENCY at a time; every
+other method runs alone and in order, so a write is always seen by the
+requests listed after it. Middleware is not run again for sub-requests,
+so the batch is measured as a whole, but each sub-request is admitted on its
+own: it costs the caller a rate-limit token and is shed at its own priority,
+so admin and bulk calls cannot slip past load shedding inside a batch.
+
+A batch answers once every sub-request has finished, so responses that
+never finish cannot be batched: routes that stream are refused up front,
+any other event stream is cut off when its response starts, and each
+sub-request gets BATCH_TIMEOUT seconds before it is answered with a 504.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+from starlette.routing import Match
+from starlette.types import Message
+
+from core import metrics
+from core.admission import controller
+from core.config import settings
+from schemas.batch import BatchRequestItem
+
+logger = logging.getLogger(__name__)
+
+# Headers copied from the batch request into every sub-request
+INHERITED_HEADERS = (b"authorization", b"accept-language", b"user-agent")
+# Response headers worth returning to the client
+RETURNED_HEADERS = ("cache-control", "etag", "location", "retry-after")
+
+
+class StreamNotBatchable(Exception):
+    """A sub-request started an event stream, which would never finish"""
+
+
+def streams(app: Starlette, method: str, path: str) -> bool:
+    """
+    Whether the route that would answer a request streams its response
+    """
+    scope = {"type": "http", "method": method, "path": path, "root_path": ""}
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            response_class = getattr(route, "response_class", None)
+            # FastAPI wraps the default response class in a placeholder
+            response_class = getattr(response_class, "value", response_class)
+            return isinstance(response_class, type) and issubclass(
+                response_class, StreamingResponse
+            )
+    return False
+
+
+def group(items: List[BatchRequestItem]) -> List[List[int]]:
+    """
+    Split a batch into steps: runs of consecutive GETs, and single writes
+    """
+    steps: List[List[int]] = []
+    for index, item in enumerate(items):
+        if item.method == "GET" and steps and items[steps[-1][0]].method == "GET":
+            steps[-1].append(index)
+        else:
+            steps.append([index])
+    return steps
+
+
+def _decode(content_type: str, body: bytes) -> Any:
+    if not body:
+        return None
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+def target(item: BatchRequestItem) -> Tuple[str, str]:
+    """
+    Percent-decoded path and raw query string of a sub-request, as a server
+    would put them into the scope
+    """
+    raw_path, _, query = item.path.partition("?")
+    return unquote(raw_path), query
+
+
+async def dispatch(
+    request: Request, item: BatchRequestItem, user_key: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Admit one sub-request, run it through the router and collect its response
+    """
+    path, query = target(item)
+    client = request.scope.get("client")
+    refusal = controller.admit(
+        item.method, path, user_key, client[0] if client else None
+    )
+    if refusal is not None:
+        status_code, detail, retry_after = refusal
+        metrics.BATCH_SUBREQUESTS.inc(method=item.method, status=str(status_code))
+        return {
+            "id": item.id,
+            "status": status_code,
+            "headers": {"retry-after": str(retry_after)},
+            "body": {"detail": detail},
+        }
+
+    body = b"" if item.body is None else json.dumps(item.body).encode()
+    headers: List[Tuple[bytes, bytes]] = [
+        (name, value)
+        for name, value in request.scope["headers"]
+        if name in INHERITED_HEADERS
+    ]
+    if body:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": item.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": item.path.partition("?")[0].encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        "app": request.app,
+        "state": {},
+        # Routes report HTTPException through the app's exception handlers
+        "starlette.exception_handlers": request.scope["starlette.exception_handlers"],
+    }
+
+    sent = False
+
+    async def receive() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Nothing else will arrive; behave like a client that hung up
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    response: Dict[str, Any] = {"status": 500, "headers": {}}
+    chunks: List[bytes] = []
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1").lower(): value.decode("latin-1")
+                for name, value in message.get("headers", [])
+            }
+            content_type = response["headers"].get("content-type", "")
+            if content_type.startswith("text/event-stream"):
+                raise StreamNotBatchable()
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await asyncio.wait_for(
+            request.app.router(scope, receive, send), settings.BATCH_TIMEOUT
+        )
+        content_type = response["headers"].get("content-type", "")
+        result = {
+            "id": item.id,
+            "status": response["status"],
+            "headers": {
+                name: value
+                for name, value in response["headers"].items()
+                if name in RETURNED_HEADERS
+            },
+            "body": _decode(content_type, b"".join(chunks)),
+        }
+    except StreamNotBatchable:
+        result = {
+            "id": item.id,
+            "status": 400,
+            "headers": {},
+            "body": {"detail": "Event streams cannot be batched"},
+        }
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Batch sub-request {item.method} {path} timed out after "
+            f"{settings.BATCH_TIMEOUT}s"
+        )
+        result = {
+            "id": item.id,
+            "status": 504,
+            "headers": {},
+            "body": {"detail": "Request timed out"},
+        }
+    except HTTPException as e:
+        # Raised by the router itself, e.g. 404 for an unknown path
+        result = {
+            "id": item.id,
+            "status": e.status_code,
+            "headers": {},
+            "body": {"detail": e.detail},
+        }
+    except Exception as e:
+        logger.exception(f"Batch sub-request {item.method} {path} failed: {str(e)}")
+        result = {
+            "id": item.id,
+            "status": 500,
+            "headers": {},
+            "body": {"detail": "Internal Server Error"},
+        }
+    metrics.BATCH_SUBREQUESTS.inc(method=item.method, status=str(result["status"]))
+    return result
+
+
+async def run(
+    request: Request, items: List[BatchRequestItem], user_key: Optional[str]
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Run a batch for the user with this rate-limit key and return the
+    responses in request order
+    """
+    metrics.BATCH_SIZE.observe(len(items))
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    semaphore = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+
+    async def limited(index: int) -> None:
+        async with semaphore:
+            results[index] = await dispatch(request, items[index], user_key)
+
+    for step in group(items):
+        await asyncio.gather(*(limited(index) for index in step))
+    return results
@@ -0,0 +1,65 @@
+"""
+Short-lived in-process result caches.
+
+Entries expire after a fixed TTL, so a cache may serve results up to that
+old; only use it where that staleness is acceptable, such as typeahead.
+Writes through CRUDBase also evict entries in every worker, for caches
+with a handler registered in core.invalidation.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from core import metrics
+
+
+class TTLCache:
+    """
+    Cache whose entries expire after `ttl` seconds, evicting the least
+    recently used entry beyond `max_size`
+    """
+
+    def __init__(self, name: str, ttl: float, max_size: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            metrics.CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+            return default
+        self._entries.move_to_end(key)
+        metrics.CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> None:
+        """
+        Drop every entry whose value matches `predicate`
+        """
+        matching = [
+            key for key, (_, value) in self._entries.items() if predicate(value)
+        ]
+        for key in matching:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
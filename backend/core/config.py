@@ -8,8 +8,16 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # How often each worker reloads revoked token versions from the database
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 5
+    # Tokens are refused (503) while the versions are older than this
+    TOKEN_REVOCATION_MAX_STALENESS: int = 60
     PROJECT_NAME: str = "Edu-Fi"
+    # Tune per device with `python manage.py user calibrate-bcrypt`
+    BCRYPT_ROUNDS: int = 12
+    DEBUG: bool = False
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
@@ -47,6 +55,123 @@ class Settings(BaseSettings):
     DATABASE_POOL_TIMEOUT: int = 30
     DATABASE_POOL_RECYCLE: int = 1800
     SQL_ECHO: bool = False
+    # Connections opened (and hot statements prepared on) at startup
+    DATABASE_POOL_WARMUP: int = 2
+    # Background readiness check for /health/ready
+    DATABASE_READINESS_INTERVAL: int = 5
+    DATABASE_READINESS_TIMEOUT: int = 2
+
+    # Slow query log (threshold 0 disables it)
+    SLOW_QUERY_THRESHOLD_MS: int = 200
+    SLOW_QUERY_LOG_SIZE: int = 100
+    SLOW_QUERY_EXPLAIN: bool = True
+    # ANALYZE re-runs the statement, doubling the cost of every slow query
+    SLOW_QUERY_EXPLAIN_ANALYZE: bool = False
+
+    # Background jobs (`python manage.py worker`)
+    JOB_WORKER_CONCURRENCY: int = 4
+    # Seconds between polls for due jobs while the queue is idle
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    # Retry backoff doubles from the base up to the max, with jitter
+    JOB_RETRY_BASE_SECONDS: int = 5
+    JOB_RETRY_MAX_SECONDS: int = 600
+    JOB_TIMEOUT: int = 300
+    # Running jobs locked longer than this belong to a crashed worker and are
+    # queued again; keep it above JOB_TIMEOUT
+    JOB_LOCK_TIMEOUT: int = 600
+    JOB_RETENTION_DAYS: int = 7
+    # Port for the worker's own /metrics endpoint (0 disables it)
+    JOB_WORKER_METRICS_PORT: int = 9101
+
+    # Deleted lessons are purged by the worker this many rows per transaction,
+    # pausing between batches so other writers get the locks in between
+    LESSON_PURGE_BATCH: int = 1000
+    LESSON_PURGE_PAUSE_MS: int = 50
+    # Lessons archived and left untouched this many days have their content
+    # moved to compressed cold storage (0 keeps them in place)
+    LESSON_ARCHIVE_AFTER_DAYS: int = 30
+
+    # Module progress is buffered in memory and written in batches, after
+    # this many milliseconds or this many events, whichever comes first
+    PROGRESS_FLUSH_INTERVAL_MS: int = 1000
+    PROGRESS_FLUSH_EVENTS: int = 500
+    # Progress kept in memory while the database is unreachable
+    PROGRESS_BUFFER_MAX: int = 50000
+
+    # Learning analytics events
+    EVENTS_ENABLED: bool = True
+    # Events held in memory before new ones are rejected
+    EVENTS_BUFFER_SIZE: int = 20000
+    EVENTS_FLUSH_INTERVAL_MS: int = 1000
+    # Events written per COPY
+    EVENTS_FLUSH_BATCH: int = 5000
+    # Events accepted per request
+    EVENTS_MAX_BATCH: int = 500
+    EVENTS_RETENTION_DAYS: int = 90
+    # Daily partitions created ahead of time
+    EVENTS_PARTITIONS_AHEAD: int = 3
+
+    # Lesson assets, stored on local disk by SHA-256
+    ASSET_ROOT: str = "data/assets"
+    ASSET_MAX_BYTES: int = 512 * 1024 * 1024
+    # When set, downloads are handed to the reverse proxy with
+    # X-Accel-Redirect under this internal location, which serves ASSET_ROOT
+    # with sendfile
+    ASSET_ACCEL_REDIRECT: str = ""
+    # Image variants made by the worker after upload; a source narrower than
+    # a width gets one variant at its own width instead
+    ASSET_VARIANT_WIDTHS: List[int] = [160, 320, 640, 1280]
+    ASSET_VARIANT_QUALITY: int = 80
+    # Processes decoding and resizing images in each worker
+    ASSET_VARIANT_PROCESSES: int = 1
+    # Larger images are not decoded (decompression bomb guard)
+    ASSET_VARIANT_MAX_PIXELS: int = 50_000_000
+
+    # Batch API: sub-requests per batch, and how many read-only ones run at
+    # once (each holds its own pooled connection)
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_CONCURRENCY: int = 4
+    # Seconds a single sub-request may run before it is answered with a 504
+    BATCH_TIMEOUT: int = 10
+
+    # Push of lesson changes to open streams (server-sent events)
+    PUSH_ENABLED: bool = True
+    # Messages queued per stream; a client that falls further behind is told
+    # to reload the lesson instead
+    PUSH_QUEUE_SIZE: int = 32
+    # Open streams per worker
+    PUSH_MAX_SUBSCRIBERS: int = 500
+    # Keepalive interval on idle streams, below proxy read timeouts
+    PUSH_HEARTBEAT_SECONDS: int = 15
+
+    # Typeahead: results per lookup and seconds a repeated lookup is cached
+    SUGGEST_LIMIT: int = 8
+    SUGGEST_CACHE_TTL: int = 10
+    # Lookups slower than this are cancelled and return no suggestions
+    SUGGEST_TIMEOUT_MS: int = 250
+
+    # Observability
+    METRICS_ENABLED: bool = True
+    QUERY_STATS_ENABLED: bool = True
+    # Warn (in DEBUG mode) when one statement shape runs this often in a request
+    QUERY_REPEAT_THRESHOLD: int = 3
+
+    # Admission control
+    ADMISSION_ENABLED: bool = True
+    # In-flight requests at which the server counts as saturated
+    ADMISSION_MAX_IN_FLIGHT: int = 60
+    # Average pool checkout wait at which the server counts as saturated
+    ADMISSION_POOL_WAIT_TARGET_MS: int = 500
+    ADMISSION_RETRY_AFTER: int = 2
+    # Token buckets: sustained requests per second and burst size
+    ADMISSION_USER_RATE: float = 10.0
+    ADMISSION_USER_BURST: int = 40
+    ADMISSION_IP_RATE: float = 5.0
+    ADMISSION_IP_BURST: int = 20
+    # Logins per IP, separate and larger: a school may log in from one address
+    ADMISSION_LOGIN_RATE: float = 2.0
+    ADMISSION_LOGIN_BURST: int = 150
 
     class Config:
         case_sensitive = True
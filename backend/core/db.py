@@ -4,19 +4,45 @@ import logging
 import asyncio
 from contextlib import asynccontextmanager
 
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 
+from core import admission, metrics, query_stats, slow_queries
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts wait for a free connection
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.POOL_CHECKOUT_WAIT.observe(waited)
+            admission.record_pool_wait(waited)
+
+
 # Create async engine with connection pooling and pre-ping
 engine = create_async_engine(
     str(settings.SQLALCHEMY_DATABASE_URI),
     echo=settings.SQL_ECHO,
+    poolclass=InstrumentedQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_timeout=settings.DATABASE_POOL_TIMEOUT,
@@ -24,6 +50,45 @@ engine = create_async_engine(
     pool_pre_ping=True,  # Check connection before using from pool
 )
 
+
+def instrument_engine(async_engine) -> None:
+    """
+    Feed pool events and pool state into the metrics registry
+    """
+    sync_engine = async_engine.sync_engine
+    pool = sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.POOL_CONNECTIONS_OPENED.inc()
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.POOL_CHECKOUTS.inc()
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.POOL_INVALIDATIONS.inc(soft="false")
+
+    @event.listens_for(pool, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_connection, connection_record, exception):
+        metrics.POOL_INVALIDATIONS.inc(soft="true")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        if context.is_pre_ping:
+            metrics.POOL_PRE_PING_FAILURES.inc()
+
+    metrics.POOL_SIZE.set_function(pool.size)
+    metrics.POOL_IN_USE.set_function(pool.checkedout)
+    metrics.POOL_IDLE.set_function(pool.checkedin)
+    metrics.POOL_OVERFLOW.set_function(pool.overflow)
+
+
+instrument_engine(engine)
+query_stats.instrument_engine(engine)
+slow_queries.configure(engine)
+
 # Session factory
 async_session = sessionmaker(
     engine,
@@ -34,6 +99,25 @@ async_session = sessionmaker(
 )
 
 
+async def connect_dedicated(purpose: str, **server_settings: str) -> asyncpg.Connection:
+    """
+    Open a plain asyncpg connection outside the pool for a background task
+
+    Long-running work (COPY, LISTEN) on its own connection never holds a
+    pooled connection a request is waiting for.
+    """
+    url = make_url(str(settings.SQLALCHEMY_DATABASE_URI))
+    url = url.set(drivername="postgresql")
+    return await asyncpg.connect(
+        url.render_as_string(hide_password=False),
+        timeout=settings.DATABASE_READINESS_TIMEOUT * 2,
+        server_settings={
+            "application_name": f"{settings.PROJECT_NAME} {purpose}",
+            **server_settings,
+        },
+    )
+
+
 # async def init_db(max_retries=5, retry_interval=2):
 #     """
 #     Initialize database tables with retry logic
@@ -107,7 +191,7 @@ async def check_db_connection(max_retries=5):
     for attempt in range(max_retries):
         try:
             async with engine.connect() as conn:
-                await conn.execute("SELECT 1")
+                await conn.execute(text("SELECT 1"))
                 logger.info("Database connection successful")
                 return True
         except OperationalError as e:
@@ -0,0 +1,339 @@
+"""
+Learning analytics event ingestion.
+
+POST /events appends to a bounded in-memory buffer and returns at once.
+When the buffer is full, new events are rejected rather than queued without
+limit, and clients are told to retry later. A background flusher drains the
+buffer with COPY into the day-partitioned learning_events table.
+
+The flusher holds its own asyncpg connection outside the SQLAlchemy pool, so
+analytics load can never take a connection an interactive route is waiting
+for. The same connection creates upcoming daily partitions and drops ones
+older than EVENTS_RETENTION_DAYS.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from core import metrics
+from core.config import settings
+from core.db import connect_dedicated
+
+logger = logging.getLogger(__name__)
+
+TABLE = "learning_events"
+COLUMNS = (
+    "occurred_at",
+    "received_at",
+    "user_id",
+    "lesson_id",
+    "module_id",
+    "event_type",
+    "dwell_ms",
+    "data",
+)
+# Partition maintenance runs this often, and is retried this soon after a
+# failure
+MAINTENANCE_INTERVAL = 3600
+MAINTENANCE_RETRY_INTERVAL = 60
+
+# One row in COLUMNS order
+EventRecord = Tuple
+
+
+class EventBuffer:
+    """
+    Bounded FIFO of event records waiting to be copied
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._records: Deque[EventRecord] = deque()
+        self.wake: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def offer(self, records: Sequence[EventRecord]) -> int:
+        """
+        Append as many records as fit; return how many were accepted
+        """
+        accepted = max(0, min(len(records), self.capacity - len(self._records)))
+        self._records.extend(records[:accepted])
+        dropped = len(records) - accepted
+        if accepted:
+            metrics.EVENTS_RECEIVED.inc(accepted, result="buffered")
+        if dropped:
+            metrics.EVENTS_RECEIVED.inc(dropped, result="dropped")
+        metrics.EVENTS_BUFFERED.set(len(self._records))
+        if self.wake is not None and len(self._records) >= settings.EVENTS_FLUSH_BATCH:
+            self.wake.set()
+        return accepted
+
+    def take(self, limit: int) -> List[EventRecord]:
+        batch = [self._records.popleft() for _ in range(min(limit, len(self._records)))]
+        metrics.EVENTS_BUFFERED.set(len(self._records))
+        return batch
+
+    def put_back(self, batch: List[EventRecord]) -> int:
+        """
+        Return an unwritten batch to the front; return how many did not fit
+        """
+        room = max(self.capacity - len(self._records), 0)
+        kept = batch[:room]
+        self._records.extendleft(reversed(kept))
+        metrics.EVENTS_BUFFERED.set(len(self._records))
+        return len(batch) - len(kept)
+
+
+def to_record(
+    *,
+    user_id: int,
+    event_type: str,
+    occurred_at: Optional[datetime],
+    received_at: datetime,
+    lesson_id: Optional[int] = None,
+    module_id: Optional[int] = None,
+    dwell_ms: Optional[int] = None,
+    data: Optional[dict] = None,
+) -> EventRecord:
+    """
+    Build a COPY record in COLUMNS order
+
+    Device clocks drift, so timestamps from the future are clamped to the
+    time the event was received. Timestamps without a UTC offset are taken
+    to be UTC.
+    """
+    if occurred_at is not None and occurred_at.utcoffset() is None:
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    if occurred_at is None or occurred_at > received_at:
+        occurred_at = received_at
+    return (
+        occurred_at,
+        received_at,
+        user_id,
+        lesson_id,
+        module_id,
+        event_type,
+        dwell_ms,
+        json.dumps(data) if data is not None else None,
+    )
+
+
+def _partition_name(day: datetime) -> str:
+    return f"{TABLE}_p{day:%Y%m%d}"
+
+
+def _partition_bounds(day: datetime) -> str:
+    return (
+        f"FROM ('{day.isoformat()}') " f"TO ('{(day + timedelta(days=1)).isoformat()}')"
+    )
+
+
+async def create_partition(conn: asyncpg.Connection, day: datetime) -> None:
+    """
+    Create the partition for one day
+
+    Events for a day without a partition land in the default partition, and
+    Postgres refuses to add the partition while they are there. Those rows
+    are then moved into a new table that is attached as the partition, all
+    in one transaction.
+    """
+    name = _partition_name(day)
+    try:
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"PARTITION OF {TABLE} FOR VALUES {_partition_bounds(day)}"
+        )
+        return
+    except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+        # Another worker created it first
+        return
+    except asyncpg.CheckViolationError:
+        pass
+
+    columns = ", ".join(COLUMNS)
+    try:
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TABLE {name} "
+                f"(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            status = await conn.execute(
+                f"WITH moved AS ("
+                f"DELETE FROM {TABLE}_default "
+                f"WHERE occurred_at >= $1 AND occurred_at < $2 "
+                f"RETURNING {columns}) "
+                f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved",
+                day,
+                day + timedelta(days=1),
+            )
+            await conn.execute(
+                f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+                f"FOR VALUES {_partition_bounds(day)}"
+            )
+    except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+        return
+    logger.warning(
+        f"Moved {status.split()[-1]} events from {TABLE}_default into {name}"
+    )
+
+
+class EventFlusher:
+    """
+    Copies buffered events into the database on a dedicated connection
+    """
+
+    def __init__(self, buffer: EventBuffer):
+        self.buffer = buffer
+        self._conn: Optional[asyncpg.Connection] = None
+        self._next_maintenance = 0.0
+
+    async def _connection(self) -> asyncpg.Connection:
+        if self._conn is None or self._conn.is_closed():
+            self._conn = await connect_dedicated(
+                "events",
+                # A crash loses the unflushed buffer anyway; don't make every
+                # COPY wait for its WAL flush as well
+                synchronous_commit="off",
+            )
+        return self._conn
+
+    async def close(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def flush(self) -> int:
+        """
+        Copy up to one batch; return the number of events written
+        """
+        if not len(self.buffer):
+            return 0
+        batch = self.buffer.take(settings.EVENTS_FLUSH_BATCH)
+        start = time.perf_counter()
+        try:
+            conn = await self._connection()
+            await conn.copy_records_to_table(TABLE, records=batch, columns=COLUMNS)
+        except (asyncpg.DataError, OverflowError) as e:
+            # Retrying a batch the database rejects would block the buffer
+            metrics.EVENTS_FLUSH_FAILURES.inc()
+            metrics.EVENTS_RECEIVED.inc(len(batch), result="dropped")
+            logger.error(f"Dropped {len(batch)} events the database rejected: {str(e)}")
+            return 0
+        except (
+            asyncpg.PostgresError,
+            asyncpg.InterfaceError,
+            OSError,
+            asyncio.TimeoutError,
+        ) as e:
+            dropped = self.buffer.put_back(batch)
+            metrics.EVENTS_FLUSH_FAILURES.inc()
+            if dropped:
+                metrics.EVENTS_RECEIVED.inc(dropped, result="dropped")
+            logger.warning(
+                f"Event flush of {len(batch)} events failed "
+                f"({dropped} dropped): {str(e)}"
+            )
+            await self.close()
+            return 0
+        except asyncio.CancelledError:
+            self.buffer.put_back(batch)
+            raise
+        metrics.EVENTS_FLUSH_DURATION.observe(time.perf_counter() - start)
+        metrics.EVENTS_WRITTEN.inc(len(batch))
+        return len(batch)
+
+    async def maintain_partitions(self) -> None:
+        """
+        Create today's and upcoming daily partitions, drop expired ones
+        """
+        conn = await self._connection()
+        today = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        for offset in range(settings.EVENTS_PARTITIONS_AHEAD + 1):
+            await create_partition(conn, today + timedelta(days=offset))
+
+        cutoff = today - timedelta(days=settings.EVENTS_RETENTION_DAYS)
+        partitions = await conn.fetch(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = $1
+            """,
+            TABLE,
+        )
+        prefix = f"{TABLE}_p"
+        for row in partitions:
+            name = row["relname"]
+            if not name.startswith(prefix):
+                continue
+            try:
+                day = datetime.strptime(name[len(prefix) :], "%Y%m%d").replace(
+                    tzinfo=timezone.utc
+                )
+            except ValueError:
+                continue
+            if day < cutoff:
+                await conn.execute(f"DROP TABLE IF EXISTS {name}")
+                logger.info(f"Dropped expired event partition {name}")
+        await conn.execute(
+            f"DELETE FROM {TABLE}_default WHERE occurred_at < $1", cutoff
+        )
+
+    async def run(self) -> None:
+        """
+        Flush until cancelled; on cancellation make one last attempt to
+        write what is buffered
+        """
+        self.buffer.wake = asyncio.Event()
+        interval = settings.EVENTS_FLUSH_INTERVAL_MS / 1000
+        try:
+            while True:
+                if time.monotonic() >= self._next_maintenance:
+                    # Set before the attempt, so a failing database is not
+                    # asked again on every flush
+                    self._next_maintenance = (
+                        time.monotonic() + MAINTENANCE_RETRY_INTERVAL
+                    )
+                    try:
+                        await self.maintain_partitions()
+                        self._next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+                    except (
+                        asyncpg.PostgresError,
+                        asyncpg.InterfaceError,
+                        OSError,
+                        asyncio.TimeoutError,
+                    ) as e:
+                        logger.warning(f"Event partition maintenance failed: {str(e)}")
+                        await self.close()
+
+                written = await self.flush()
+                # Keep draining while full batches are waiting
+                if written and len(self.buffer) >= settings.EVENTS_FLUSH_BATCH:
+                    continue
+                try:
+                    await asyncio.wait_for(self.buffer.wake.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.buffer.wake.clear()
+        except asyncio.CancelledError:
+            while len(self.buffer) and await self.flush():
+                pass
+            raise
+        finally:
+            await self.close()
+
+
+buffer = EventBuffer(settings.EVENTS_BUFFER_SIZE)
+flusher = EventFlusher(buffer)
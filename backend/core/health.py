@@ -0,0 +1,165 @@
+"""
+Startup warm-up and cached database readiness.
+
+The pool is warmed during application startup so the first requests after a
+reboot do not pay for connection setup. Readiness is checked by a background
+task at a fixed interval, so /health/ready never issues a query itself.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_IMPORTED_AT = time.monotonic()
+
+
+def _process_uptime() -> float:
+    """
+    Seconds since the process started, falling back to time since this
+    module was imported on platforms without /proc
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name, which may itself contain spaces
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            system_uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return max(system_uptime - started, 0.0)
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+class Readiness:
+    """
+    Last known database reachability
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.checked_at: Optional[datetime] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+        self.time_to_first_request: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "unavailable",
+            "database": {
+                "reachable": self.ready,
+                "checked_at": self.checked_at,
+                "latency_ms": self.latency_ms,
+                "error": self.error,
+            },
+            "startup": {
+                "warmup_seconds": self.warmup_seconds,
+                "time_to_first_request_seconds": self.time_to_first_request,
+            },
+        }
+
+
+readiness = Readiness()
+
+
+async def check_database(engine: AsyncEngine, timeout: float) -> bool:
+    """
+    Run SELECT 1 and record the outcome in the cached readiness state
+    """
+    start = time.perf_counter()
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), timeout)
+    except Exception as e:
+        if readiness.ready:
+            logger.warning(f"Database became unreachable: {str(e)}")
+        readiness.ready = False
+        readiness.error = str(e) or type(e).__name__
+        readiness.latency_ms = None
+    else:
+        if not readiness.ready:
+            logger.info("Database is reachable")
+        readiness.ready = True
+        readiness.error = None
+        readiness.latency_ms = round((time.perf_counter() - start) * 1000, 2)
+    readiness.checked_at = datetime.now(timezone.utc)
+    metrics.DB_READY.set(1 if readiness.ready else 0)
+    return readiness.ready
+
+
+async def readiness_loop(engine: AsyncEngine, interval: float, timeout: float):
+    """
+    Refresh the cached readiness state until cancelled
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await check_database(engine, timeout)
+
+
+async def warm_up_pool(
+    engine: AsyncEngine,
+    connections: int,
+    prepare: Optional[Callable[[AsyncSession], Awaitable[None]]] = None,
+) -> None:
+    """
+    Open `connections` pooled connections at once and run `prepare` on each
+
+    Holding them concurrently forces the pool to actually open that many
+    connections instead of reusing one. Running the hot statements on each
+    connection fills SQLAlchemy's compiled cache and asyncpg's per-connection
+    prepared statement cache before the first real request arrives.
+    """
+    start = time.perf_counter()
+
+    async def warm_one():
+        async with engine.connect() as conn:
+            if prepare is None:
+                await conn.execute(text("SELECT 1"))
+            else:
+                async with AsyncSession(bind=conn) as session:
+                    await prepare(session)
+            await conn.rollback()
+
+    results = await asyncio.gather(
+        *(warm_one() for _ in range(connections)), return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    readiness.warmup_seconds = round(time.perf_counter() - start, 3)
+    metrics.STARTUP_WARMUP_SECONDS.set(readiness.warmup_seconds)
+    if failures:
+        logger.warning(
+            f"Pool warm-up: {len(failures)}/{connections} connections failed: "
+            f"{str(failures[0])}"
+        )
+    else:
+        logger.info(
+            f"Pool warm-up: {connections} connections ready in "
+            f"{readiness.warmup_seconds}s"
+        )
+
+
+def mark_first_request() -> None:
+    """
+    Record the time from process start to the first served request
+    """
+    if readiness.time_to_first_request is not None:
+        return
+    readiness.time_to_first_request = round(_process_uptime(), 3)
+    metrics.TIME_TO_FIRST_REQUEST_SECONDS.set(readiness.time_to_first_request)
+    logger.info(
+        f"First request served {readiness.time_to_first_request}s after process start"
+    )
@@ -0,0 +1,92 @@
+"""
+Cross-worker cache invalidation.
+
+In-process caches only see the writes of their own worker. Writes through
+CRUDBase.update/remove publish (table, id, version) on the invalidations
+channel in their transaction; once it commits, the writing worker evicts
+its own entries straight away and every other worker does so when the
+notification arrives (see core.listen). Handlers are registered per table
+next to the caches they look after.
+
+A handler called with id None must drop everything it caches for the
+table. That happens after the listener reconnects, when notifications may
+have been missed.
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from core import listen, metrics
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "invalidations"
+# Session.info key for invalidations waiting for their transaction to commit
+PENDING = "pending_invalidations"
+
+# Called with the changed row's id (None for every row) and its version
+InvalidationHandler = Callable[[Optional[int], Optional[int]], None]
+
+HANDLERS: Dict[str, List[InvalidationHandler]] = {}
+
+
+def on(table: str) -> Callable[[InvalidationHandler], InvalidationHandler]:
+    """
+    Register a function that evicts cached data about rows of a table
+    """
+
+    def register(fn: InvalidationHandler) -> InvalidationHandler:
+        HANDLERS.setdefault(table, []).append(fn)
+        return fn
+
+    return register
+
+
+async def publish(
+    db: AsyncSession, *, table: str, id: int, version: Optional[int] = None
+) -> None:
+    """
+    Invalidate cached data about a row in every worker once the
+    transaction commits
+    """
+    if table not in HANDLERS:
+        return
+    message = {"table": table, "id": id, "version": version}
+    await listen.send(db, CHANNEL, message)
+    db.info.setdefault(PENDING, []).append(message)
+
+
+def apply(table: str, id: Optional[int], version: Optional[int] = None) -> None:
+    for fn in HANDLERS.get(table, ()):
+        fn(id, version)
+    scope = "table" if id is None else "row"
+    metrics.CACHE_INVALIDATIONS.inc(table=table, scope=scope)
+
+
+def flush_all() -> None:
+    for table in HANDLERS:
+        apply(table, None)
+
+
+def _on_message(message: Dict) -> None:
+    apply(message["table"], message["id"], message.get("version"))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    # Evict in the writing worker now rather than when its own notification
+    # comes back
+    for message in session.info.pop(PENDING, ()):
+        _on_message(message)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING, None)
+
+
+listen.listener.register(CHANNEL, _on_message, flush_all)
@@ -0,0 +1,227 @@
+"""
+Durable background jobs.
+
+Jobs are rows in the jobs table, enqueued in the same transaction as the
+change that caused them (crud.job.enqueue) and run by `python manage.py
+worker`. Workers claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so
+any number of them can poll the same table without handing out a job twice.
+Failed jobs are retried with exponential backoff; jobs left running by a
+crashed worker are queued again after JOB_LOCK_TIMEOUT, or failed for good if
+that was their last attempt. A worker only records the outcome of a job it
+still holds.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import metrics
+from core.config import settings
+from core.db import async_session
+from crud.job import job as job_crud
+from models.base import JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+HANDLERS: Dict[str, JobHandler] = {}
+
+# Stale job recovery, purging and queue depth metrics run this often
+MAINTENANCE_INTERVAL = 60
+
+
+def handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    """
+    Register a coroutine as the handler for a job kind
+
+    Handlers receive their own session and the job payload. They may run
+    more than once for the same job (after a crash or a retry), so they must
+    be idempotent.
+    """
+
+    def register(fn: JobHandler) -> JobHandler:
+        if kind in HANDLERS:
+            raise ValueError(f"Duplicate handler for job kind {kind}")
+        HANDLERS[kind] = fn
+        return fn
+
+    return register
+
+
+class Worker:
+    """
+    Polls the jobs table and runs up to `concurrency` jobs at once
+    """
+
+    def __init__(
+        self,
+        concurrency: int = settings.JOB_WORKER_CONCURRENCY,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        name: Optional[str] = None,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._stopping = False
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    async def run(self, shutdown_timeout: float = 30) -> None:
+        """
+        Run until stop() is called, then let running jobs finish for up to
+        shutdown_timeout seconds before interrupting them
+        """
+        logger.info(f"Worker {self.name} started with concurrency {self.concurrency}")
+        last_maintenance = 0.0
+        while not self._stopping:
+            if time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL:
+                await self._maintenance()
+                last_maintenance = time.monotonic()
+
+            free = self.concurrency - len(self._running)
+            claimed = []
+            if free > 0:
+                try:
+                    async with async_session() as db:
+                        claimed = await job_crud.claim(db, worker=self.name, limit=free)
+                except Exception as e:
+                    logger.error(f"Could not claim jobs: {str(e)}")
+                for job in claimed:
+                    self._start(job)
+
+            # A full batch means more jobs are probably due, so poll again
+            # as soon as a slot frees up; otherwise wait for the interval
+            if free > 0 and len(claimed) == free:
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._running:
+            logger.info(f"Waiting for {len(self._running)} running jobs")
+            _, pending = await asyncio.wait(self._running, timeout=shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        logger.info(f"Worker {self.name} stopped")
+
+    def _start(self, job: Dict[str, Any]) -> None:
+        task = asyncio.create_task(self._execute(job))
+        self._running.add(task)
+        metrics.JOBS_RUNNING.set(len(self._running))
+
+        def done(finished: asyncio.Task) -> None:
+            if not finished.cancelled() and finished.exception() is not None:
+                # Bookkeeping failed (usually the database went away); the
+                # job stays running and is queued again after JOB_LOCK_TIMEOUT
+                logger.error(
+                    f"Job {job['id']} ({job['kind']}) could not be recorded: "
+                    f"{str(finished.exception())}"
+                )
+            self._running.discard(finished)
+            metrics.JOBS_RUNNING.set(len(self._running))
+            self._wake.set()
+
+        task.add_done_callback(done)
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        kind = job["kind"]
+        metrics.JOB_QUEUE_DELAY.observe(
+            max((job["locked_at"] - job["run_at"]).total_seconds(), 0), kind=kind
+        )
+        start = time.perf_counter()
+        try:
+            fn = HANDLERS.get(kind)
+            if fn is None:
+                raise LookupError(f"No handler registered for job kind {kind}")
+            async with async_session() as db:
+                await asyncio.wait_for(fn(db, job["payload"]), settings.JOB_TIMEOUT)
+        except asyncio.CancelledError:
+            logger.warning(f"Job {job['id']} ({kind}) interrupted by shutdown")
+            async with async_session() as db:
+                await job_crud.release(db, job=job, worker=self.name)
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+            async with async_session() as db:
+                status = await job_crud.fail(db, job=job, worker=self.name, error=error)
+            if status is None:
+                outcome = "lost"
+            else:
+                outcome = "retried" if status == JobStatus.QUEUED else "failed"
+            logger.warning(
+                f"Job {job['id']} ({kind}) attempt {job['attempts']}/"
+                f"{job['max_attempts']} {outcome}: {error}"
+            )
+        else:
+            async with async_session() as db:
+                held = await job_crud.succeed(db, job_id=job["id"], worker=self.name)
+            outcome = "succeeded" if held else "lost"
+        if outcome == "lost":
+            # Ran past JOB_LOCK_TIMEOUT and was queued again meanwhile; the
+            # new attempt owns the row now, so this result is dropped
+            logger.warning(
+                f"Job {job['id']} ({kind}) was taken back from this worker "
+                f"after JOB_LOCK_TIMEOUT"
+            )
+        metrics.JOB_DURATION.observe(time.perf_counter() - start, kind=kind)
+        metrics.JOBS_FINISHED.inc(kind=kind, outcome=outcome)
+
+    async def _maintenance(self) -> None:
+        try:
+            async with async_session() as db:
+                requeued, failed = await job_crud.requeue_stale(db)
+                purged = await job_crud.purge_finished(db)
+                counts = await job_crud.count_by_status(db)
+        except Exception as e:
+            logger.error(f"Job maintenance failed: {str(e)}")
+            return
+        if requeued:
+            logger.warning(f"Queued {requeued} jobs again after their worker stopped")
+        if failed:
+            logger.error(
+                f"Failed {failed} jobs for good after their worker stopped "
+                f"on their last attempt"
+            )
+        if purged:
+            logger.info(f"Purged {purged} finished jobs")
+        for status in JobStatus:
+            metrics.JOBS_BY_STATUS.set(counts.get(status, 0), status=status.value)
+
+
+async def serve_metrics(port: int) -> asyncio.AbstractServer:
+    """
+    Serve the worker's Prometheus metrics over plain HTTP on `port`
+    """
+
+    async def respond(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = metrics.registry.render().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(respond, port=port)
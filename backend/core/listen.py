@@ -0,0 +1,116 @@
+"""
+Postgres LISTEN/NOTIFY between workers.
+
+Messages are sent with pg_notify inside the transaction that causes them
+(send()), so Postgres delivers them only if it commits, and to every
+worker, the sender included. Each worker holds one dedicated connection
+outside the pool that listens on every registered channel.
+
+While that connection is down, messages sent to the worker are lost. After
+every (re)connect each channel's resync callback runs, so whatever state the
+channel keeps can be rebuilt instead of going stale.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import metrics
+from core.config import settings
+from core.db import connect_dedicated
+
+logger = logging.getLogger(__name__)
+
+# How often the idle connection is checked
+CHECK_INTERVAL = 30
+MAX_BACKOFF = 30
+
+MessageHandler = Callable[[Dict[str, Any]], None]
+ResyncHandler = Callable[[], None]
+
+
+async def send(db: AsyncSession, channel: str, message: Dict[str, Any]) -> None:
+    """
+    Send a message to every worker once the transaction commits
+    """
+    await db.execute(select(func.pg_notify(channel, json.dumps(message))))
+
+
+class Listener:
+    """
+    Dispatches notifications on the registered channels
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, Tuple[MessageHandler, ResyncHandler]] = {}
+
+    def register(
+        self, channel: str, on_message: MessageHandler, on_resync: ResyncHandler
+    ) -> None:
+        if channel in self._channels:
+            raise ValueError(f"Duplicate listener for channel {channel}")
+        self._channels[channel] = (on_message, on_resync)
+
+    def __bool__(self) -> bool:
+        return bool(self._channels)
+
+    def _dispatch(
+        self, connection: asyncpg.Connection, pid: int, channel: str, payload: str
+    ) -> None:
+        on_message, _ = self._channels[channel]
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignored malformed {channel} notification: {payload}")
+            return
+        metrics.NOTIFICATIONS_RECEIVED.inc(channel=channel)
+        try:
+            on_message(message)
+        except Exception as e:
+            logger.error(f"Handling {channel} notification {payload} failed: {str(e)}")
+
+    def _resync(self) -> None:
+        for channel, (_, on_resync) in self._channels.items():
+            metrics.NOTIFICATION_RESYNCS.inc(channel=channel)
+            on_resync()
+
+    async def run(self) -> None:
+        """
+        Listen until cancelled, reconnecting with backoff when the
+        connection is lost
+        """
+        delay = 1
+        while True:
+            conn: Optional[asyncpg.Connection] = None
+            try:
+                conn = await connect_dedicated("listener")
+                for channel in self._channels:
+                    await conn.add_listener(channel, self._dispatch)
+                # Anything sent while nobody was listening was not delivered
+                self._resync()
+                delay = 1
+                while True:
+                    await asyncio.sleep(CHECK_INTERVAL)
+                    await asyncio.wait_for(
+                        conn.fetchval("SELECT 1"), settings.DATABASE_READINESS_TIMEOUT
+                    )
+            except (
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError,
+                OSError,
+                asyncio.TimeoutError,
+            ) as e:
+                logger.warning(f"Listener disconnected, retrying in {delay}s: {str(e)}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    conn.terminate()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_BACKOFF)
+
+
+listener = Listener()
@@ -0,0 +1,453 @@
+"""
+Lightweight Prometheus-style metrics registry.
+
+Keeps the Pi footprint small: metrics live in process memory and are
+rendered in the Prometheus text exposition format by the /metrics endpoint.
+"""
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, tuned for a small board where a 30s pool
+# timeout is the worst case we ever expect to observe
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        escaped = escaped.replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class for metrics with optional labels
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """
+        Return (suffix, labelnames, labelvalues, value) tuples
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, names, values, value in self.samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter
+    """
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [("_total", self.labelnames, key, value) for key, value in items]
+
+
+class Gauge(Metric):
+    """
+    Value that can go up and down, or be read from a callback at scrape time
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Read the gauge value from a callback when metrics are rendered
+        """
+        self._function = function
+
+    def value(self, **labels: str) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        if self._function is not None:
+            return [("", (), (), float(self._function()))]
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0.0)]
+        return [("", self.labelnames, key, value) for key, value in items]
+
+
+class Histogram(Metric):
+    """
+    Cumulative histogram with fixed buckets
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (key, (list(counts), total))
+                for key, (counts, total) in self._values.items()
+            ]
+        result = []
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                result.append(
+                    ("_bucket", names, key + (_format_value(bound),), cumulative)
+                )
+            result.append(("_sum", self.labelnames, key, total))
+            result.append(("_count", self.labelnames, key, cumulative))
+        return result
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Connection pool
+POOL_CHECKOUTS = registry.counter(
+    "edufi_db_pool_checkouts", "Connections checked out of the pool"
+)
+POOL_CHECKOUT_TIMEOUTS = registry.counter(
+    "edufi_db_pool_checkout_timeouts",
+    "Checkouts that gave up after DATABASE_POOL_TIMEOUT",
+)
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "edufi_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"
+)
+POOL_CONNECTIONS_OPENED = registry.counter(
+    "edufi_db_pool_connections_opened", "New DBAPI connections opened by the pool"
+)
+POOL_PRE_PING_FAILURES = registry.counter(
+    "edufi_db_pool_pre_ping_failures", "Pre-ping checks that found a dead connection"
+)
+POOL_INVALIDATIONS = registry.counter(
+    "edufi_db_pool_invalidations", "Pooled connections invalidated", ("soft",)
+)
+POOL_SIZE = registry.gauge("edufi_db_pool_size", "Configured pool size")
+POOL_IN_USE = registry.gauge(
+    "edufi_db_pool_in_use", "Connections currently checked out"
+)
+POOL_IDLE = registry.gauge("edufi_db_pool_idle", "Idle connections held by the pool")
+POOL_OVERFLOW = registry.gauge(
+    "edufi_db_pool_overflow", "Connections open beyond pool_size (negative when below)"
+)
+DB_READY = registry.gauge(
+    "edufi_db_ready", "1 if the last background readiness check reached the database"
+)
+SLOW_QUERIES = registry.counter(
+    "edufi_db_slow_queries", "Statements slower than SLOW_QUERY_THRESHOLD_MS"
+)
+
+# HTTP
+HTTP_REQUESTS = registry.counter(
+    "edufi_http_requests", "HTTP requests handled", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "edufi_http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "route"),
+)
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "edufi_db_queries_per_request",
+    "SQL statements executed per HTTP request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 4, 5, 8, 10, 15, 20, 50, 100),
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "edufi_http_requests_in_flight", "HTTP requests in progress"
+)
+
+# Startup
+STARTUP_WARMUP_SECONDS = registry.gauge(
+    "edufi_startup_pool_warmup_seconds", "Time spent warming the pool at startup"
+)
+TIME_TO_FIRST_REQUEST_SECONDS = registry.gauge(
+    "edufi_startup_time_to_first_request_seconds",
+    "Time from process start until the first request was served",
+)
+
+# Token revocation
+TOKEN_REVOCATION_AGE = registry.gauge(
+    "edufi_token_revocation_age_seconds",
+    "Seconds since revoked token versions were last refreshed",
+)
+
+# Admission control
+REQUESTS_SHED = registry.counter(
+    "edufi_http_requests_shed",
+    "Requests rejected by admission control",
+    ("reason", "priority"),
+)
+ADMISSION_PRESSURE = registry.gauge(
+    "edufi_admission_pressure", "Load as a fraction of capacity (1 = saturated)"
+)
+
+# Background jobs
+JOBS_ENQUEUED = registry.counter(
+    "edufi_jobs_enqueued", "Background jobs enqueued", ("kind",)
+)
+JOBS_FINISHED = registry.counter(
+    "edufi_jobs_finished",
+    "Background job attempts by outcome (succeeded, retried, failed, lost)",
+    ("kind", "outcome"),
+)
+JOB_DURATION = registry.histogram(
+    "edufi_job_duration_seconds",
+    "Background job run time",
+    ("kind",),
+    buckets=(0.05, 0.1, 0.5, 1, 5, 15, 60, 300),
+)
+JOB_QUEUE_DELAY = registry.histogram(
+    "edufi_job_queue_delay_seconds",
+    "Time from a job becoming due until a worker claimed it",
+    ("kind",),
+    buckets=(0.1, 0.5, 1, 2, 5, 15, 60, 300),
+)
+JOBS_RUNNING = registry.gauge(
+    "edufi_jobs_running", "Background jobs running in this worker"
+)
+JOBS_BY_STATUS = registry.gauge(
+    "edufi_jobs", "Jobs in the jobs table by status", ("status",)
+)
+
+# Module progress write-behind
+PROGRESS_EVENTS = registry.counter(
+    "edufi_progress_events", "Module progress updates received", ("result",)
+)
+PROGRESS_FLUSHES = registry.counter(
+    "edufi_progress_flushes", "Batched progress writes", ("outcome",)
+)
+PROGRESS_FLUSH_ROWS = registry.histogram(
+    "edufi_progress_flush_rows",
+    "Rows upserted per progress flush",
+    buckets=(1, 10, 50, 100, 500, 1000, 5000),
+)
+PROGRESS_BUFFERED = registry.gauge(
+    "edufi_progress_buffered", "Module progress rows waiting to be written"
+)
+PROGRESS_REJECTED = registry.counter(
+    "edufi_progress_rejected",
+    "Progress rows dropped because the database rejected them",
+)
+
+# Learning analytics events
+EVENTS_RECEIVED = registry.counter(
+    "edufi_events_received",
+    "Analytics events received, by whether they were buffered or dropped",
+    ("result",),
+)
+EVENTS_WRITTEN = registry.counter(
+    "edufi_events_written", "Analytics events written to the database"
+)
+EVENTS_FLUSH_FAILURES = registry.counter(
+    "edufi_events_flush_failures", "Failed COPY flushes of analytics events"
+)
+EVENTS_FLUSH_DURATION = registry.histogram(
+    "edufi_events_flush_duration_seconds", "Time to COPY one batch of events"
+)
+EVENTS_BUFFERED = registry.gauge(
+    "edufi_events_buffered", "Analytics events waiting to be written"
+)
+
+# Batch API
+BATCH_SUBREQUESTS = registry.counter(
+    "edufi_batch_subrequests",
+    "Sub-requests run by the batch endpoint, by method and status",
+    ("method", "status"),
+)
+BATCH_SIZE = registry.histogram(
+    "edufi_batch_size",
+    "Sub-requests per batch request",
+    buckets=(1, 2, 5, 10, 20, 50),
+)
+
+# LISTEN/NOTIFY
+NOTIFICATIONS_RECEIVED = registry.counter(
+    "edufi_notifications_received", "Notifications received, by channel", ("channel",)
+)
+NOTIFICATION_RESYNCS = registry.counter(
+    "edufi_notification_resyncs",
+    "Resyncs after the listener (re)connected, by channel",
+    ("channel",),
+)
+
+# Push
+PUSH_SUBSCRIBERS = registry.gauge(
+    "edufi_push_subscribers", "Open lesson change streams in this worker"
+)
+PUSH_MESSAGES = registry.counter(
+    "edufi_push_messages",
+    "Messages queued to streams, or replaced by a resync on overflow",
+    ("result",),
+)
+
+# Lesson archive
+LESSON_ARCHIVES = registry.counter(
+    "edufi_lesson_archives",
+    "Lessons moved to cold storage or restored from it",
+    ("operation",),
+)
+LESSON_ARCHIVE_BYTES = registry.counter(
+    "edufi_lesson_archive_bytes",
+    "Content bytes taken out of the hot tables, and their compressed size",
+    ("size",),
+)
+
+# Caches
+CACHE_LOOKUPS = registry.counter(
+    "edufi_cache_lookups", "In-process cache lookups", ("cache", "result")
+)
+CACHE_INVALIDATIONS = registry.counter(
+    "edufi_cache_invalidations",
+    "Cache invalidations applied, for one row or a whole table",
+    ("table", "scope"),
+)
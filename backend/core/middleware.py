@@ -0,0 +1,193 @@
+import logging
+import time
+from typing import Optional
+
+from jose import JWTError, jwt
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import health, metrics
+from core.admission import controller
+from core.config import settings
+from core.query_stats import track_queries
+from core.security import ALGORITHM
+
+logger = logging.getLogger(__name__)
+
+
+def get_route_template(scope: Scope) -> str:
+    """
+    Resolve the route template (e.g. /api/v1/lessons/{lesson_id}) for a request
+
+    Using the template instead of the raw path keeps metric label cardinality
+    bounded no matter how many lesson or user ids are requested.
+    """
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    if router is None:
+        return "unmatched"
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Count HTTP requests and record latency per route template
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        metrics.HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.HTTP_IN_FLIGHT.dec()
+            route = get_route_template(scope)
+            method = scope["method"]
+            metrics.HTTP_REQUESTS.inc(
+                method=method, route=route, status=str(status_code)
+            )
+            metrics.HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, method=method, route=route
+            )
+            health.mark_first_request()
+
+
+class QueryStatsMiddleware:
+    """
+    Count DB statements and DB time per request
+
+    Totals are returned in a Server-Timing header and logged. In debug mode a
+    warning is logged when the same statement shape repeats within a request,
+    which is the signature of an N+1 query pattern.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope['method']} {scope['path']}"
+        with track_queries(label) as stats:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", stats.server_timing())
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = get_route_template(scope)
+                metrics.DB_QUERIES_PER_REQUEST.observe(stats.count, route=route)
+                logger.info(
+                    f"{scope['method']} {route}: {stats.count} queries "
+                    f"in {stats.duration * 1000:.2f}ms"
+                )
+                if settings.DEBUG:
+                    for shape, count in stats.repeated(settings.QUERY_REPEAT_THRESHOLD):
+                        logger.warning(
+                            f"Possible N+1 in {label}: statement executed "
+                            f"{count} times: {shape}"
+                        )
+
+
+def _token_subject(headers: Headers) -> Optional[str]:
+    """
+    User id from a valid bearer token, without touching the database
+    """
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+
+def _is_event_stream(message: Message) -> bool:
+    content_type = Headers(raw=message.get("headers", [])).get("content-type", "")
+    return content_type.startswith("text/event-stream")
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load before it queues inside the connection pool
+
+    Requests over their client's rate get a 429 and requests shed because
+    the server is saturated get a 503, both with Retry-After. Event streams
+    stop counting as in flight once their response starts.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        refusal = controller.admit(
+            scope["method"],
+            scope["path"],
+            _token_subject(Headers(scope=scope)),
+            client[0] if client else None,
+        )
+        if refusal is not None:
+            status_code, detail, retry_after = refusal
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=status_code,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        counted = True
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal counted
+            if (
+                counted
+                and message["type"] == "http.response.start"
+                and _is_event_stream(message)
+            ):
+                # An open event stream is idle nearly all of its life; it
+                # was admitted, but must not count toward saturation
+                controller.in_flight -= 1
+                counted = False
+            await send(message)
+
+        controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if counted:
+                controller.in_flight -= 1
@@ -0,0 +1,223 @@
+"""
+Write-behind buffer for module progress.
+
+Every device in a classroom reports progress as students page through
+modules. Writing each report would mean a transaction (and an fsync) per
+page view, so reports are merged in memory per (student, module) and
+written in one multi-row upsert every PROGRESS_FLUSH_INTERVAL_MS, or sooner
+once PROGRESS_FLUSH_EVENTS reports arrive.
+
+Reads merge the buffered state over what is in the database, so a student
+sees their own progress immediately. The buffer is per process: with
+several uvicorn workers a read served by another worker may lag by up to
+one flush interval.
+
+A batch that fails because the database is unreachable goes back into the
+buffer and is retried on the next flush. A batch the database rejects (a
+row for a student who no longer exists, say) is retried one row at a time
+so the good rows are written, and the rows rejected again are logged and
+dropped instead of failing every flush from then on.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from core import metrics
+from core.config import settings
+from core.db import async_session
+from crud.progress import progress as progress_crud
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]
+
+# Errors retrying the same rows can never fix
+REJECTED_ERRORS = (IntegrityError, DataError)
+
+
+def merge(current: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine two progress records for the same student and module
+
+    Progress only grows and the first completion wins, the same rules the
+    database upsert applies, so merging in memory never loses information.
+    """
+    if current is None:
+        return dict(update)
+    completed = [
+        value
+        for value in (current["completed_at"], update["completed_at"])
+        if value is not None
+    ]
+    return {
+        **current,
+        "progress": max(current["progress"], update["progress"]),
+        "completed_at": min(completed) if completed else None,
+        "updated_at": max(current["updated_at"], update["updated_at"]),
+    }
+
+
+class ProgressBuffer:
+    """
+    Pending progress rows keyed by (student_id, module_id)
+    """
+
+    def __init__(self):
+        self._pending: Dict[Key, Dict[str, Any]] = {}
+        self._events = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def record(
+        self,
+        *,
+        student_id: int,
+        lesson_id: int,
+        module_id: int,
+        progress: int,
+        completed: bool = False,
+    ) -> bool:
+        """
+        Buffer a progress report; False if the buffer is full and it was dropped
+        """
+        key = (student_id, module_id)
+        if (
+            key not in self._pending
+            and len(self._pending) >= settings.PROGRESS_BUFFER_MAX
+        ):
+            metrics.PROGRESS_EVENTS.inc(result="dropped")
+            return False
+        now = datetime.now(timezone.utc)
+        if completed:
+            progress = 100
+        self._pending[key] = merge(
+            self._pending.get(key),
+            {
+                "student_id": student_id,
+                "lesson_id": lesson_id,
+                "module_id": module_id,
+                "progress": progress,
+                "completed_at": now if progress >= 100 else None,
+                "updated_at": now,
+            },
+        )
+        self._events += 1
+        metrics.PROGRESS_EVENTS.inc(result="buffered")
+        metrics.PROGRESS_BUFFERED.set(len(self._pending))
+        if self._events >= settings.PROGRESS_FLUSH_EVENTS and self._wake is not None:
+            self._wake.set()
+        return True
+
+    def overlay(
+        self, student_id: int, lesson_id: int, stored: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge buffered progress for one student's lesson over stored rows
+        """
+        rows = {row["module_id"]: row for row in stored}
+        for (row_student, module_id), row in self._pending.items():
+            if row_student == student_id and row["lesson_id"] == lesson_id:
+                rows[module_id] = merge(rows.get(module_id), row)
+        return sorted(rows.values(), key=lambda row: row["module_id"])
+
+    async def flush(self) -> int:
+        """
+        Write everything buffered so far; return the number of rows written
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._events = 0
+            try:
+                return await self._write(batch)
+            finally:
+                metrics.PROGRESS_BUFFERED.set(len(self._pending))
+
+    async def _write(self, batch: Dict[Key, Dict[str, Any]]) -> int:
+        try:
+            async with async_session() as db:
+                await progress_crud.upsert_many(db, rows=list(batch.values()))
+        except asyncio.CancelledError:
+            self._restore(batch)
+            raise
+        except REJECTED_ERRORS as e:
+            metrics.PROGRESS_FLUSHES.inc(outcome="failed")
+            logger.warning(
+                f"Progress flush of {len(batch)} rows was rejected, "
+                f"writing them one at a time: {str(e)}"
+            )
+            return await self._write_each(batch)
+        except Exception as e:
+            self._restore(batch)
+            metrics.PROGRESS_FLUSHES.inc(outcome="failed")
+            logger.warning(
+                f"Progress flush of {len(batch)} rows failed, will retry: {str(e)}"
+            )
+            return 0
+        metrics.PROGRESS_FLUSHES.inc(outcome="succeeded")
+        metrics.PROGRESS_FLUSH_ROWS.observe(len(batch))
+        return len(batch)
+
+    async def _write_each(self, batch: Dict[Key, Dict[str, Any]]) -> int:
+        # Find the rows that poisoned a batch; the rest are written as usual
+        rows = list(batch.items())
+        written = 0
+        for index, (key, row) in enumerate(rows):
+            try:
+                async with async_session() as db:
+                    await progress_crud.upsert_many(db, rows=[row])
+            except REJECTED_ERRORS as e:
+                metrics.PROGRESS_REJECTED.inc()
+                logger.error(
+                    f"Dropping progress {row['progress']} of student {key[0]} "
+                    f"on module {key[1]}: {str(e)}"
+                )
+                continue
+            except asyncio.CancelledError:
+                self._restore(dict(rows[index:]))
+                raise
+            except Exception as e:
+                self._restore(dict(rows[index:]))
+                logger.warning(
+                    f"Progress flush failed with {len(rows) - index} rows left, "
+                    f"will retry: {str(e)}"
+                )
+                break
+            written += 1
+        if written:
+            metrics.PROGRESS_FLUSH_ROWS.observe(written)
+        return written
+
+    def _restore(self, batch: Dict[Key, Dict[str, Any]]) -> None:
+        # Put an unwritten batch back under anything recorded meanwhile
+        for key, row in batch.items():
+            self._pending[key] = merge(self._pending.get(key), row)
+
+    async def run(self) -> None:
+        """
+        Flush on an interval, or early when enough events arrive, until
+        cancelled; a final flush runs on cancellation
+        """
+        self._wake = asyncio.Event()
+        interval = settings.PROGRESS_FLUSH_INTERVAL_MS / 1000
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+
+buffer = ProgressBuffer()
@@ -0,0 +1,154 @@
+"""
+Push notifications for lesson and module changes.
+
+Changes are announced on the lesson_changes channel inside the transaction
+that makes them (notify()), so every worker hears of them once it commits
+(see core.listen). Each worker fans them out through an in-process hub to
+the subscribers of the lesson, whose streams are served as server-sent
+events.
+
+Every subscriber has a bounded queue. A client too slow to drain it has its
+pending messages replaced by a single resync message, telling it to reload
+the lesson, rather than making the worker hold an unbounded backlog. All
+subscribers are told to resync after the listener reconnects, since
+notifications sent while it was away are lost.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import listen, metrics
+from core.config import settings
+
+CHANNEL = "lesson_changes"
+RESYNC = "resync"
+# Milliseconds a client waits before reconnecting a dropped stream
+RETRY_MS = 3000
+
+Message = Dict[str, Any]
+
+
+async def notify(
+    db: AsyncSession, *, lesson_id: int, kind: str, module_id: Optional[int] = None
+) -> None:
+    """
+    Announce a change to the lesson's subscribers once the transaction commits
+    """
+    if not settings.PUSH_ENABLED:
+        return
+    message: Message = {"lesson_id": lesson_id, "kind": kind}
+    if module_id is not None:
+        message["module_id"] = module_id
+    await listen.send(db, CHANNEL, message)
+
+
+class Subscription:
+    """
+    One open stream for a lesson
+    """
+
+    __slots__ = ("lesson_id", "queue")
+
+    def __init__(self, lesson_id: int, size: int):
+        self.lesson_id = lesson_id
+        self.queue: "asyncio.Queue[Message]" = asyncio.Queue(maxsize=size)
+
+    def offer(self, message: Message) -> bool:
+        """
+        Queue a message; when the queue is full, resync instead
+        """
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            self.resync()
+            return False
+
+    def resync(self) -> None:
+        # Whatever is pending is superseded by a full reload
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait({"lesson_id": self.lesson_id, "kind": RESYNC})
+
+
+class Hub:
+    """
+    Subscriptions of this worker, by lesson
+    """
+
+    def __init__(self, max_subscribers: int, queue_size: int):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._lessons: Dict[int, Set[Subscription]] = {}
+        self.count = 0
+
+    def full(self) -> bool:
+        return self.count >= self.max_subscribers
+
+    def subscribe(self, lesson_id: int) -> Subscription:
+        subscription = Subscription(lesson_id, self.queue_size)
+        self._lessons.setdefault(lesson_id, set()).add(subscription)
+        self.count += 1
+        metrics.PUSH_SUBSCRIBERS.set(self.count)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._lessons.get(subscription.lesson_id)
+        if not subscriptions or subscription not in subscriptions:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._lessons[subscription.lesson_id]
+        self.count -= 1
+        metrics.PUSH_SUBSCRIBERS.set(self.count)
+
+    def publish(self, lesson_id: int, message: Message) -> None:
+        for subscription in self._lessons.get(lesson_id, ()):
+            if subscription.offer(message):
+                metrics.PUSH_MESSAGES.inc(result="queued")
+            else:
+                metrics.PUSH_MESSAGES.inc(result="overflow")
+
+    def resync_all(self) -> None:
+        for subscriptions in self._lessons.values():
+            for subscription in subscriptions:
+                subscription.resync()
+
+
+def format_event(message: Message) -> str:
+    return f"event: {message['kind']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def stream(hub: "Hub", lesson_id: int) -> AsyncIterator[str]:
+    """
+    Server-sent events for one lesson, with keepalive comments while idle
+
+    The subscription is made when the stream starts, so a client that
+    disconnects before its response begins never leaves one behind.
+    """
+    subscription = hub.subscribe(lesson_id)
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), settings.PUSH_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(message)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def _on_message(message: Message) -> None:
+    hub.publish(int(message["lesson_id"]), message)
+
+
+hub = Hub(settings.PUSH_MAX_SUBSCRIBERS, settings.PUSH_QUEUE_SIZE)
+if settings.PUSH_ENABLED:
+    listen.listener.register(CHANNEL, _on_message, hub.resync_all)
@@ -0,0 +1,147 @@
+"""
+Per-request database query accounting.
+
+Cursor execution events feed a QueryStats object bound to the current
+request through a context variable, so every statement issued while
+handling a request is counted, timed and grouped by statement shape.
+"""
+
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats", default=None
+)
+_subscribers: List[List["QueryStats"]] = []
+_observers: List[Callable[[str, Any, float, Optional["QueryStats"]], None]] = []
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a SQL statement so repeated executions with different
+    parameters (or IN lists of different lengths) compare equal
+    """
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PLACEHOLDER_LIST.sub("?, ...", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    """
+    Statements executed while handling one request
+    """
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statement shapes executed at least `threshold` times
+        """
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+    def server_timing(self) -> str:
+        """
+        Render as a Server-Timing header value
+        """
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+def get_current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(label: str = "") -> Iterator[QueryStats]:
+    """
+    Count statements executed in the current context
+    """
+    stats = QueryStats(label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        for captured in _subscribers:
+            captured.append(stats)
+
+
+@contextmanager
+def capture_queries() -> Iterator[List[QueryStats]]:
+    """
+    Collect the QueryStats of every tracked block (e.g. request) that
+    finishes while active, including those handled on other threads
+    """
+    captured: List[QueryStats] = []
+    _subscribers.append(captured)
+    try:
+        yield captured
+    finally:
+        _subscribers.remove(captured)
+
+
+def add_observer(
+    observer: Callable[[str, Any, float, Optional[QueryStats]], None],
+) -> None:
+    """
+    Call `observer(statement, parameters, elapsed, stats)` after every
+    statement, with the QueryStats of the current request if any
+    """
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def instrument_engine(async_engine) -> None:
+    """
+    Time every cursor execution and attribute it to the current QueryStats
+    """
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        for observer in _observers:
+            observer(statement, parameters, elapsed, stats)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _on_error(context):
+        if context.is_pre_ping:
+            return
+        connection = context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
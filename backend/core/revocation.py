@@ -0,0 +1,108 @@
+"""
+Compact token revocation state.
+
+Every user has a token_version that is bumped whenever their tokens must
+stop working (deactivation, role or password change, logout). Tokens carry
+the version they were issued with and are valid while it is not older than
+the user's current version.
+
+Only users whose version was ever bumped are kept in memory, and each
+worker refreshes them from the database every few seconds, so revocation
+reaches all workers quickly without a query per request.
+
+Authorization fails closed: the versions are loaded before the app serves
+requests, and tokens are refused with a 503 while the last successful
+refresh is older than TOKEN_REVOCATION_MAX_STALENESS, because revocations
+made meanwhile would otherwise go unnoticed.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core import metrics
+from models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Rows changed by transactions that were still open during the previous
+# refresh carry an updated_at before it, so each refresh looks back this far
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+class TokenVersions:
+    """
+    Current token version of every user with revoked tokens
+    """
+
+    def __init__(self):
+        self._versions: Dict[int, int] = {}
+        self._since: Optional[datetime] = None
+        self._refreshed_at: Optional[float] = None
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+    def age(self) -> float:
+        """
+        Seconds since the last successful refresh (infinite before the first)
+        """
+        if self._refreshed_at is None:
+            return math.inf
+        return time.monotonic() - self._refreshed_at
+
+    def is_current(self, user_id: int, token_version: int) -> bool:
+        return token_version >= self._versions.get(user_id, 0)
+
+    def bump(self, user_id: int, token_version: int) -> None:
+        """
+        Apply a version change made by this worker without waiting for the
+        next refresh
+        """
+        if token_version > self._versions.get(user_id, 0):
+            self._versions[user_id] = token_version
+
+    async def refresh(self, engine: AsyncEngine) -> None:
+        """
+        Load versions changed since the previous refresh
+        """
+        statement = select(User.id, User.token_version, func.now()).where(
+            User.token_version > 0
+        )
+        if self._since is not None:
+            statement = statement.where(User.updated_at > self._since)
+        async with engine.connect() as conn:
+            result = await conn.execute(statement)
+            rows = result.all()
+            if not rows:
+                db_now = (await conn.execute(select(func.now()))).scalar_one()
+            else:
+                db_now = rows[0][2]
+        for user_id, token_version, _ in rows:
+            self.bump(user_id, token_version)
+        self._since = db_now - REFRESH_OVERLAP
+        self._refreshed_at = time.monotonic()
+        self.loaded = True
+
+
+token_versions = TokenVersions()
+metrics.TOKEN_REVOCATION_AGE.set_function(token_versions.age)
+
+
+async def refresh_loop(engine: AsyncEngine, interval: float) -> None:
+    """
+    Keep token versions fresh until cancelled
+    """
+    while True:
+        try:
+            await token_versions.refresh(engine)
+        except Exception as e:
+            logger.warning(f"Token revocation refresh failed: {str(e)}")
+        await asyncio.sleep(interval)
@@ -1,21 +1,41 @@
+import time
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Never calibrate below this many bcrypt rounds, however slow the device
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+
+BCRYPT_ROUNDS = max(settings.BCRYPT_ROUNDS, BCRYPT_MIN_ROUNDS)
+
+# Pinning min and max to the configured rounds makes needs_update() flag
+# hashes made with any other cost, so they migrate on the next login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 
 
 def create_access_token(
-        subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+        subject: Union[str, Any],
+        expires_delta: Optional[timedelta] = None,
+        claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Create JWT access token
+
+    Extra claims (see user_claims) let requests be authorized without
+    loading the user from the database.
     """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,11 +43,50 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {
+        **(claims or {}),
+        "exp": expire,
+        "sub": str(subject),
+        "type": "access",
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token(
+        subject: Union[str, Any],
+        token_version: int,
+        expires_delta: Optional[timedelta] = None,
+) -> str:
+    """
+    Create long-lived JWT refresh token, exchangeable for a new access token
+    """
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(
+            minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
+        )
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "type": "refresh",
+        "ver": token_version,
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def user_claims(user: Any) -> Dict[str, Any]:
+    """
+    Authorization claims carried in access tokens
+    """
+    return {
+        "role": getattr(user.role, "value", user.role),
+        "active": user.is_active,
+        "ver": user.token_version,
+    }
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify plain password against hashed password
@@ -40,3 +99,39 @@ def get_password_hash(password: str) -> str:
     Hash a password
     """
     return pwd_context.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check if a hash was made with different settings than the current ones
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def calibrate_bcrypt_rounds(
+        target_ms: float,
+        min_rounds: int = BCRYPT_MIN_ROUNDS,
+        max_rounds: int = BCRYPT_MAX_ROUNDS,
+        samples: int = 3,
+) -> Tuple[int, List[Tuple[int, float]]]:
+    """
+    Pick the highest bcrypt cost whose hash time on this host stays within
+    target_ms, but never below min_rounds
+
+    Returns the chosen rounds and the measured (rounds, milliseconds) pairs.
+    """
+    timings = []
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds)
+        durations = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            context.hash("calibration-password")
+            durations.append((time.perf_counter() - start) * 1000)
+        elapsed = sorted(durations)[len(durations) // 2]
+        timings.append((rounds, elapsed))
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen, timings
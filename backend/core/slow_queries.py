@@ -0,0 +1,169 @@
+"""
+Slow query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with the shape of
+their bound parameters and the route that issued them, and kept in a bounded
+ring buffer. For SELECTs an EXPLAIN (optionally ANALYZE) plan is captured in
+a background task on its own connection, so the request that ran the slow
+statement never waits for it.
+"""
+
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from core import metrics, query_stats
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_entries: Deque[Dict[str, Any]] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+_ids = count(1)
+_pending_plans: Set[asyncio.Task] = set()
+# Statement shapes with a plan already captured or in flight
+_explained: Set[str] = set()
+_engine = None
+
+# Beyond this many concurrent plan captures the plan is skipped rather than
+# adding load to a database that is already slow
+MAX_PENDING_PLANS = 2
+MAX_EXPLAINED_SHAPES = 1000
+
+
+def parameter_shape(parameters: Any) -> str:
+    """
+    Describe bound parameters by type only, never by value
+    """
+
+    def describe(value: Any) -> str:
+        if isinstance(value, str):
+            return f"str[{len(value)}]"
+        if isinstance(value, (list, tuple)):
+            return f"{type(value).__name__}[{len(value)}]"
+        return type(value).__name__
+
+    if parameters is None:
+        return "()"
+    if isinstance(parameters, dict):
+        return (
+            "{"
+            + ", ".join(
+                f"{key}: {describe(value)}" for key, value in parameters.items()
+            )
+            + "}"
+        )
+    if isinstance(parameters, list):
+        # executemany
+        return f"{len(parameters)} x {parameter_shape(parameters[0]) if parameters else '()'}"
+    return "(" + ", ".join(describe(value) for value in parameters) + ")"
+
+
+def configure(async_engine) -> None:
+    """
+    Watch statements executed through the engine, which is also used to
+    capture plans
+    """
+    global _engine
+    _engine = async_engine
+    query_stats.add_observer(observe)
+
+
+def observe(
+    statement: str,
+    parameters: Any,
+    elapsed: float,
+    stats: Optional[query_stats.QueryStats],
+) -> None:
+    """
+    Record a statement if it crossed the slow query threshold
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold <= 0 or elapsed * 1000 < threshold:
+        return
+    if statement.lstrip().upper().startswith("EXPLAIN"):
+        return
+
+    route = stats.label if stats is not None else None
+    shape = query_stats.statement_shape(statement)
+
+    entry = {
+        "id": next(_ids),
+        "statement": statement,
+        "parameters": parameter_shape(parameters),
+        "route": route,
+        "duration_ms": round(elapsed * 1000, 2),
+        "executed_at": datetime.now(timezone.utc),
+        "plan": None,
+    }
+    _entries.append(entry)
+    metrics.SLOW_QUERIES.inc()
+    logger.warning(
+        f"Slow query ({entry['duration_ms']}ms) from {route or 'no request'}: "
+        f"{statement} params={entry['parameters']}"
+    )
+
+    if settings.SLOW_QUERY_EXPLAIN:
+        _schedule_plan(entry, statement, parameters, shape)
+
+
+def _schedule_plan(
+    entry: Dict[str, Any], statement: str, parameters: Any, shape: str
+) -> None:
+    if _engine is None or shape in _explained:
+        return
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return
+    if isinstance(parameters, list) or len(_pending_plans) >= MAX_PENDING_PLANS:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+
+    if len(_explained) > MAX_EXPLAINED_SHAPES:
+        _explained.clear()
+    _explained.add(shape)
+    # Run in an empty context so the plan's own statements are not
+    # attributed to the request that triggered it
+    task = loop.create_task(
+        _capture_plan(entry, statement, parameters, shape),
+        context=contextvars.Context(),
+    )
+    _pending_plans.add(task)
+    task.add_done_callback(_pending_plans.discard)
+
+
+async def _capture_plan(
+    entry: Dict[str, Any], statement: str, parameters: Any, shape: str
+) -> None:
+    explain = (
+        "EXPLAIN (ANALYZE, BUFFERS) "
+        if settings.SLOW_QUERY_EXPLAIN_ANALYZE
+        else "EXPLAIN "
+    )
+    try:
+        # The connection is never committed, so EXPLAIN ANALYZE side
+        # effects are rolled back on close
+        async with _engine.connect() as conn:
+            result = await conn.exec_driver_sql(explain + statement, parameters)
+            entry["plan"] = "\n".join(row[0] for row in result.fetchall())
+    except Exception as e:
+        _explained.discard(shape)
+        entry["plan"] = f"Plan capture failed: {str(e)}"
+        logger.debug(f"Could not capture plan for slow query: {str(e)}")
+
+
+def get_entries() -> List[Dict[str, Any]]:
+    """
+    Slow queries, most recent first
+    """
+    return list(reversed(_entries))
+
+
+def clear() -> None:
+    _entries.clear()
+    _explained.clear()
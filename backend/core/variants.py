@@ -0,0 +1,88 @@
+"""
+Downscaled variants of uploaded images.
+
+Decoding and resizing are CPU-bound and would stall the event loop, so the
+worker runs them in a small process pool (ASSET_VARIANT_PROCESSES). Each
+variant is a WebP file next to the other variants of the same blob, so the
+work is done once per distinct image however often it is uploaded.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageOps
+
+from core.assets import blob_path, variant_path
+from core.config import settings
+
+# (width, height, size in bytes) of one written variant
+VariantInfo = Tuple[int, int, int]
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def target_widths(source_width: int, widths: Sequence[int]) -> List[int]:
+    """
+    Variant widths for a source image; never upscales
+    """
+    return sorted({min(width, source_width) for width in widths})
+
+
+def render_variants(
+    sha256: str, widths: Sequence[int], quality: int, max_pixels: int
+) -> List[VariantInfo]:
+    """
+    Write the variants of one blob that don't exist yet; runs in a child
+    process
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    rendered: List[VariantInfo] = []
+    with Image.open(blob_path(sha256)) as source:
+        # Draft mode lets JPEG decode at a fraction of full size
+        source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for width in target_widths(image.width, widths):
+            path = variant_path(sha256, width)
+            height = max(1, round(image.height * width / image.width))
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                image.resize((width, height), Image.Resampling.LANCZOS).save(
+                    tmp, "WEBP", quality=quality, method=4
+                )
+                os.replace(tmp, path)
+            rendered.append((width, height, path.stat().st_size))
+    return rendered
+
+
+async def generate(sha256: str) -> List[VariantInfo]:
+    """
+    Render the variants of a blob in the process pool
+    """
+    global _pool
+    if _pool is None:
+        # Spawned, not forked: the worker has an event loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.ASSET_VARIANT_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _pool,
+        render_variants,
+        sha256,
+        settings.ASSET_VARIANT_WIDTHS,
+        settings.ASSET_VARIANT_QUALITY,
+        settings.ASSET_VARIANT_MAX_PIXELS,
+    )
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
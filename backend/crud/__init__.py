@@ -1,4 +1,7 @@
+from crud.asset import asset
+from crud.job import job
 from crud.lesson import enrollment, lesson, module
+from crud.progress import progress
 from crud.user import user
 
-__all__ = ["user", "lesson", "module", "enrollment"]
+__all__ = ["user", "lesson", "module", "enrollment", "job", "progress", "asset"]
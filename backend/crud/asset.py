@@ -0,0 +1,137 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.assets import VARIANT_SOURCE_TYPES, StoredUpload
+from core.cache import TTLCache
+from crud.base import CRUDBase
+from crud.job import job
+from models.asset import Asset, AssetVariant
+
+# Blobs never change, so what they are served as can be cached for long
+blob_cache = TTLCache("asset_blobs", 300)
+
+
+class CRUDAsset(CRUDBase[Asset, None, None]):
+    """CRUD operations for Asset model"""
+
+    async def create_from_upload(
+        self,
+        db: AsyncSession,
+        *,
+        upload: StoredUpload,
+        module_id: Optional[int],
+        uploaded_by: int,
+    ) -> Asset:
+        """Record a stored upload"""
+        asset = Asset(
+            sha256=upload.sha256,
+            size=upload.size,
+            content_type=upload.content_type,
+            filename=upload.filename,
+            module_id=module_id,
+            uploaded_by=uploaded_by,
+        )
+        db.add(asset)
+        if upload.content_type in VARIANT_SOURCE_TYPES:
+            # Skipped by the handler when the image already has variants
+            job.enqueue(
+                db,
+                kind="generate_asset_variants",
+                payload={"sha256": upload.sha256},
+            )
+        await db.commit()
+        await db.refresh(asset)
+        return asset
+
+    async def get_module_assets(
+        self, db: AsyncSession, *, module_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Asset]:
+        """Get assets attached to a module, oldest first"""
+        statement = (
+            select(Asset)
+            .where(Asset.module_id == module_id)
+            .order_by(Asset.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        results = await db.execute(statement)
+        return results.scalars().all()
+
+    async def get_for_modules(
+        self, db: AsyncSession, *, module_ids: Sequence[int]
+    ) -> Dict[int, List[Asset]]:
+        """Assets of several modules at once, oldest first"""
+        if not module_ids:
+            return {}
+        statement = (
+            select(Asset)
+            .where(Asset.module_id.in_(set(module_ids)))
+            .order_by(Asset.module_id, Asset.id)
+        )
+        results = await db.execute(statement)
+        by_module: Dict[int, List[Asset]] = defaultdict(list)
+        for asset in results.scalars():
+            by_module[asset.module_id].append(asset)
+        return by_module
+
+    async def get_blob_info(
+        self, db: AsyncSession, *, sha256: str
+    ) -> Optional[Tuple[str, Optional[str]]]:
+        """Content type and file name to serve a blob with, from its latest upload"""
+        cached = blob_cache.get(sha256)
+        if cached is not None:
+            return cached
+        statement = (
+            select(Asset.content_type, Asset.filename)
+            .where(Asset.sha256 == sha256)
+            .order_by(Asset.id.desc())
+            .limit(1)
+        )
+        row = (await db.execute(statement)).first()
+        if row is None:
+            return None
+        info = (row.content_type, row.filename)
+        blob_cache.set(sha256, info)
+        return info
+
+    async def get_variants(
+        self, db: AsyncSession, *, sha256s: Sequence[str]
+    ) -> Dict[str, List[AssetVariant]]:
+        """Variants of several blobs, narrowest first"""
+        if not sha256s:
+            return {}
+        statement = (
+            select(AssetVariant)
+            .where(AssetVariant.sha256.in_(set(sha256s)))
+            .order_by(AssetVariant.sha256, AssetVariant.width)
+        )
+        results = await db.execute(statement)
+        by_blob: Dict[str, List[AssetVariant]] = defaultdict(list)
+        for variant in results.scalars():
+            by_blob[variant.sha256].append(variant)
+        return by_blob
+
+    async def save_variants(
+        self,
+        db: AsyncSession,
+        *,
+        sha256: str,
+        rendered: Sequence[Tuple[int, int, int]],
+    ) -> None:
+        """Record rendered variants of a blob; already recorded ones are kept"""
+        if rendered:
+            statement = insert(AssetVariant).values(
+                [
+                    {"sha256": sha256, "width": width, "height": height, "size": size}
+                    for width, height, size in rendered
+                ]
+            )
+            await db.execute(statement.on_conflict_do_nothing())
+        await db.commit()
+
+
+asset = CRUDAsset(Asset)
@@ -2,14 +2,48 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, text
+from sqlalchemy.engine import Result
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
 from sqlmodel import SQLModel
 
+from core import invalidation
+
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# SQLSTATE for a statement cancelled by statement_timeout
+QUERY_CANCELED = "57014"
+
+
+def escape_like(value: str) -> str:
+    """
+    Escape LIKE wildcards so user input only matches literally
+    """
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def execute_with_timeout(
+    db: AsyncSession, statement: Executable, timeout_ms: int
+) -> Optional[Result]:
+    """
+    Execute a statement, giving up after timeout_ms
+
+    Returns None if the statement was cancelled. The timeout is set with
+    SET LOCAL, so it ends with the session's current transaction.
+    """
+    await db.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+    try:
+        return await db.execute(statement)
+    except DBAPIError as e:
+        if getattr(e.orig, "sqlstate", None) != QUERY_CANCELED:
+            raise
+        await db.rollback()
+        return None
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
@@ -56,7 +90,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: AsyncSession,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
         """
         Update record
@@ -73,6 +107,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
 
         db.add(db_obj)
+        await self.invalidate(db, db_obj)
         await db.commit()
         await db.refresh(db_obj)
         return db_obj
@@ -83,6 +118,22 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         obj = await self.get(db=db, id=id)
         if obj:
+            await self.invalidate(db, obj)
             await db.delete(obj)
             await db.commit()
         return obj
+
+    def version(self, obj: ModelType) -> Optional[int]:
+        """
+        Version of a row sent with its invalidations, if the table has one
+        """
+        return None
+
+    async def invalidate(self, db: AsyncSession, obj: ModelType) -> None:
+        """
+        Evict cached data about obj in every worker once the transaction
+        commits
+        """
+        await invalidation.publish(
+            db, table=self.model.__tablename__, id=obj.id, version=self.version(obj)
+        )
@@ -0,0 +1,200 @@
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import metrics
+from core.config import settings
+from crud.base import CRUDBase
+from models.base import JobStatus
+from models.job import Job
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for a job that failed `attempts` times"""
+    delay = min(
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0),
+        settings.JOB_RETRY_MAX_SECONDS,
+    )
+    # Spread retries of jobs that failed together (e.g. during an outage)
+    return random.uniform(delay / 2, delay)
+
+
+class CRUDJob(CRUDBase[Job, None, None]):
+    """CRUD operations for Job model"""
+
+    def enqueue(
+        self,
+        db: AsyncSession,
+        *,
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+        run_at: Optional[datetime] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """
+        Add a job to the session without committing
+
+        The job is only visible to workers once the caller commits, so it is
+        enqueued atomically with the change that caused it.
+        """
+        job = Job(
+            kind=kind,
+            payload=payload or {},
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )
+        if run_at is not None:
+            job.run_at = run_at
+        db.add(job)
+        metrics.JOBS_ENQUEUED.inc(kind=kind)
+        return job
+
+    async def claim(
+        self, db: AsyncSession, *, worker: str, limit: int
+    ) -> List[Dict[str, Any]]:
+        """Lock up to `limit` due jobs for a worker, oldest first"""
+        due = (
+            select(Job.id)
+            .where(Job.status == JobStatus.QUEUED, Job.run_at <= func.now())
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            # Concurrent workers skip each other's rows instead of waiting
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(Job)
+            .where(Job.id.in_(due.scalar_subquery()))
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_by=worker,
+                locked_at=func.now(),
+            )
+            .returning(
+                Job.id,
+                Job.kind,
+                Job.payload,
+                Job.attempts,
+                Job.max_attempts,
+                Job.run_at,
+                Job.locked_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(statement)
+        jobs = [row._asdict() for row in result]
+        await db.commit()
+        return jobs
+
+    async def succeed(self, db: AsyncSession, *, job_id: int, worker: str) -> bool:
+        """Mark a job the worker still holds as done; False if it lost it"""
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.locked_by == worker)
+            .values(
+                status=JobStatus.SUCCEEDED,
+                finished_at=func.now(),
+                last_error=None,
+                locked_by=None,
+            )
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    async def fail(
+        self, db: AsyncSession, *, job: Dict[str, Any], worker: str, error: str
+    ) -> Optional[JobStatus]:
+        """
+        Schedule a retry for a failed job, or fail it for good; None if the
+        worker no longer holds it
+        """
+        values: Dict[str, Any] = {"last_error": error[:4000], "locked_by": None}
+        if job["attempts"] < job["max_attempts"]:
+            values["status"] = JobStatus.QUEUED
+            values["run_at"] = datetime.now(timezone.utc) + timedelta(
+                seconds=retry_delay(job["attempts"])
+            )
+        else:
+            values["status"] = JobStatus.FAILED
+            values["finished_at"] = func.now()
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job["id"], Job.locked_by == worker)
+            .values(**values)
+        )
+        await db.commit()
+        return values["status"] if result.rowcount else None
+
+    async def release(
+        self, db: AsyncSession, *, job: Dict[str, Any], worker: str
+    ) -> None:
+        """Put back a job interrupted by worker shutdown, without using an attempt"""
+        await db.execute(
+            update(Job)
+            .where(
+                Job.id == job["id"],
+                Job.status == JobStatus.RUNNING,
+                Job.locked_by == worker,
+            )
+            .values(
+                status=JobStatus.QUEUED,
+                attempts=Job.attempts - 1,
+                locked_by=None,
+                locked_at=None,
+            )
+        )
+        await db.commit()
+
+    async def requeue_stale(self, db: AsyncSession) -> Tuple[int, int]:
+        """
+        Queue again jobs whose worker stopped without finishing them, or fail
+        them for good once they have used all their attempts
+
+        Returns the number of jobs queued again and the number failed.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.JOB_LOCK_TIMEOUT
+        )
+        stale = (Job.status == JobStatus.RUNNING, Job.locked_at < cutoff)
+        values = {
+            "last_error": "Worker stopped while running the job",
+            "locked_by": None,
+            "locked_at": None,
+        }
+        # A job that kills its worker every time must not be retried forever
+        failed = await db.execute(
+            update(Job)
+            .where(*stale, Job.attempts >= Job.max_attempts)
+            .values(status=JobStatus.FAILED, finished_at=func.now(), **values)
+        )
+        requeued = await db.execute(
+            update(Job).where(*stale).values(status=JobStatus.QUEUED, **values)
+        )
+        await db.commit()
+        return requeued.rowcount, failed.rowcount
+
+    async def purge_finished(self, db: AsyncSession) -> int:
+        """Delete finished jobs older than JOB_RETENTION_DAYS"""
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            days=settings.JOB_RETENTION_DAYS
+        )
+        result = await db.execute(
+            delete(Job).where(
+                Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]),
+                Job.finished_at < cutoff,
+            )
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def count_by_status(self, db: AsyncSession) -> Dict[JobStatus, int]:
+        """Number of jobs in each status"""
+        result = await db.execute(
+            select(Job.status, func.count(Job.id)).group_by(Job.status)
+        )
+        return dict(result.all())
+
+
+job = CRUDJob(Job)
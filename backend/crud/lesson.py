@@ -1,18 +1,221 @@
-from typing import List, Optional
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import func, select
+from sqlalchemy import (
+    Integer,
+    Row,
+    String,
+    Text,
+    cast,
+    column,
+    delete,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.sql import Select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import aliased, contains_eager, joinedload
 
-from crud.base import CRUDBase
-from models.lesson import Lesson, Module
+from core import invalidation, metrics, push
+from core.cache import TTLCache
+from core.config import settings
+from crud.base import CRUDBase, escape_like, execute_with_timeout
+from crud.job import job
+from models.base import LessonStatus
+from models.lesson import SEARCH_CONFIG, Lesson, LessonArchive, Module
+from models.progress import ModuleProgress
 from models.user import Enrollment, User
-from schemas.lesson import LessonCreate, LessonUpdate, ModuleCreate, ModuleUpdate
+from schemas.lesson import (
+    LessonCreate,
+    LessonUpdate,
+    ModuleBatchItem,
+    ModuleCreate,
+    ModuleUpdate,
+)
+
+# Highlighting reads the text again, so only this much of the lesson content
+# is scanned for the snippet; ranking still uses the full search vector
+SNIPPET_SOURCE_CHARS = 20000
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>"
+
+# Progress reports arrive for the same few modules all lesson long
+module_lesson_cache = TTLCache("module_lessons", 60)
+
+# Typeahead clients repeat the same prefix while the user types
+suggestion_cache = TTLCache("lesson_suggestions", settings.SUGGEST_CACHE_TTL)
+
+# Deleted lessons are hidden everywhere until the purge job removes them
+NOT_DELETED = Lesson.deleted_at.is_(None)
+
+# Archiving runs in the worker, so it can afford the slowest, smallest setting
+ARCHIVE_COMPRESSION_LEVEL = 9
+
+
+@invalidation.on("lessons")
+def _evict_lesson(lesson_id: Optional[int], version: Optional[int]) -> None:
+    # Titles and statuses feed the suggestions, statuses the module refs
+    suggestion_cache.clear()
+    if lesson_id is None:
+        module_lesson_cache.clear()
+    else:
+        module_lesson_cache.discard_where(lambda ref: ref[0] == lesson_id)
+
+
+@invalidation.on("modules")
+def _evict_module(module_id: Optional[int], version: Optional[int]) -> None:
+    if module_id is None:
+        module_lesson_cache.clear()
+    else:
+        module_lesson_cache.discard(module_id)
+
+
+async def _touch_lesson(db: AsyncSession, lesson_id: int) -> None:
+    """Bump a lesson's updated_at, its version for clients, once per change"""
+    await db.execute(
+        update(Lesson).where(Lesson.id == lesson_id).values(updated_at=func.now())
+    )
+
+
+def _visible(
+    statement: Select,
+    *,
+    status: Optional[LessonStatus] = None,
+    published_only: bool = False,
+) -> Select:
+    """Apply the lesson listing visibility rules to a statement"""
+    statement = statement.where(NOT_DELETED)
+    if status:
+        statement = statement.where(Lesson.status == status)
+    if published_only:
+        statement = statement.where(Lesson.status == LessonStatus.PUBLISHED)
+    return statement
 
 
 class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
     """CRUD operations for Lesson model"""
 
+    async def get(self, db: AsyncSession, id: Any) -> Optional[Lesson]:
+        """Get a lesson by ID, unless it was deleted"""
+        statement = select(Lesson).where(Lesson.id == id, NOT_DELETED)
+        results = await db.execute(statement)
+        return results.scalar_one_or_none()
+
+    async def get_multi_visible(
+        self,
+        db: AsyncSession,
+        *,
+        status: Optional[LessonStatus] = None,
+        published_only: bool = False,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> List[Lesson]:
+        """Get lessons, optionally by status or limited to published ones"""
+        statement = _visible(
+            select(Lesson), status=status, published_only=published_only
+        )
+        results = await db.execute(statement.offset(skip).limit(limit))
+        return results.scalars().all()
+
+    async def suggest(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        published_only: bool = False,
+        limit: int = 8,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Typeahead lookup by title; None if it exceeded the time budget"""
+        key = (q.casefold(), published_only, limit)
+        cached = suggestion_cache.get(key)
+        if cached is not None:
+            return cached
+
+        escaped = escape_like(q)
+        # Substring or fuzzy matches, both served by ix_lessons_title_trgm;
+        # prefix matches rank first, then the closest by similarity
+        statement = _visible(
+            select(Lesson.id, Lesson.title, Lesson.status).where(
+                or_(Lesson.title.ilike(f"%{escaped}%"), Lesson.title.op("%")(q))
+            ),
+            published_only=published_only,
+        )
+        statement = statement.order_by(
+            Lesson.title.ilike(f"{escaped}%").desc(),
+            func.similarity(Lesson.title, q).desc(),
+            Lesson.title,
+        ).limit(limit)
+        results = await execute_with_timeout(db, statement, settings.SUGGEST_TIMEOUT_MS)
+        if results is None:
+            return None
+        suggestions = [row._asdict() for row in results]
+        suggestion_cache.set(key, suggestions)
+        return suggestions
+
+    async def search(
+        self,
+        db: AsyncSession,
+        *,
+        q: str,
+        status: Optional[LessonStatus] = None,
+        published_only: bool = False,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> List[Tuple[Lesson, float, str, Optional[str]]]:
+        """Full-text search over lessons and their modules, best match first"""
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        search_vector = Lesson.__table__.c.search_vector
+        rank = func.ts_rank_cd(search_vector, query).label("rank")
+
+        # Archived lessons are indexed from their stubs, whose content is NULL,
+        # and reads do not restore it: until someone edits one, it matches on
+        # titles and description only and has no content in its snippet.
+
+        # Rank and page on the GIN index first, then highlight only the page
+        matches = _visible(
+            select(Lesson.id, rank).where(search_vector.op("@@")(query)),
+            status=status,
+            published_only=published_only,
+        )
+        matches = (
+            matches.order_by(rank.desc(), Lesson.id)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        statement = (
+            select(
+                Lesson,
+                matches.c.rank,
+                func.ts_headline(
+                    SEARCH_CONFIG,
+                    Lesson.title,
+                    query,
+                    f"HighlightAll=true, {HEADLINE_OPTIONS}",
+                ),
+                func.ts_headline(
+                    SEARCH_CONFIG,
+                    func.concat_ws(
+                        " ",
+                        Lesson.description,
+                        func.left(Lesson.content, SNIPPET_SOURCE_CHARS),
+                    ),
+                    query,
+                    f"MaxFragments=2, MaxWords=20, MinWords=5, {HEADLINE_OPTIONS}",
+                ),
+            )
+            .join(matches, matches.c.id == Lesson.id)
+            .order_by(matches.c.rank.desc(), Lesson.id)
+        )
+        results = await db.execute(statement)
+        return results.all()
+
     async def create_with_teacher(
         self, db: AsyncSession, *, obj_in: LessonCreate, teacher_id: int
     ) -> Lesson:
@@ -29,26 +232,360 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
         await db.refresh(lesson)
         return lesson
 
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Lesson,
+        obj_in: Union[LessonUpdate, Dict[str, Any]],
+    ) -> Lesson:
+        """
+        Update a lesson and notify its open streams on commit
+
+        A lesson becoming archived is scheduled for cold storage once it has
+        been left alone for LESSON_ARCHIVE_AFTER_DAYS.
+        """
+        update_data = (
+            obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        )
+        status = update_data.get("status")
+        if status == LessonStatus.ARCHIVED and db_obj.status != LessonStatus.ARCHIVED:
+            self._schedule_archive(
+                db, lesson_id=db_obj.id, after=datetime.now(timezone.utc)
+            )
+        await push.notify(db, lesson_id=db_obj.id, kind="lesson.updated")
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Lesson]:
+        """
+        Delete a lesson: hide it at once and leave its rows to the
+        purge_lesson job, so a large lesson costs one single-row UPDATE here
+        """
+        lesson = await self.get(db, id=id)
+        if lesson:
+            await db.execute(
+                update(Lesson).where(Lesson.id == id).values(deleted_at=func.now())
+            )
+            await push.notify(db, lesson_id=id, kind="lesson.deleted")
+            await self.invalidate(db, lesson)
+            job.enqueue(db, kind="purge_lesson", payload={"lesson_id": id})
+            await db.commit()
+        return lesson
+
+    async def purge(self, db: AsyncSession, *, lesson_id: int, batch_size: int) -> int:
+        """
+        Delete the next batch of a deleted lesson's rows, children first,
+        and the lesson itself once nothing else is left
+
+        Each batch is its own short transaction. Returns the number of rows
+        deleted; 0 means the lesson is gone.
+        """
+        progress = select(ModuleProgress.student_id, ModuleProgress.module_id).where(
+            ModuleProgress.lesson_id == lesson_id
+        )
+        batches = [
+            delete(ModuleProgress).where(
+                tuple_(ModuleProgress.student_id, ModuleProgress.module_id).in_(
+                    progress.limit(batch_size)
+                )
+            ),
+            # The outer lesson_id prunes the DELETE to the lesson's partition
+            delete(Enrollment).where(
+                Enrollment.lesson_id == lesson_id,
+                Enrollment.id.in_(
+                    select(Enrollment.id)
+                    .where(Enrollment.lesson_id == lesson_id)
+                    .limit(batch_size)
+                ),
+            ),
+            # Their assets rows go with them (ON DELETE CASCADE)
+            delete(Module).where(
+                Module.id.in_(
+                    select(Module.id)
+                    .where(Module.lesson_id == lesson_id)
+                    .limit(batch_size)
+                )
+            ),
+            delete(Lesson).where(
+                Lesson.id == lesson_id, Lesson.deleted_at.is_not(None)
+            ),
+        ]
+        for statement in batches:
+            result = await db.execute(
+                statement.execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                await db.commit()
+                return result.rowcount
+        await db.rollback()
+        return 0
+
+    def _schedule_archive(
+        self, db: AsyncSession, *, lesson_id: int, after: datetime
+    ) -> None:
+        """Enqueue archive_lesson for when the lesson has been idle long enough"""
+        if settings.LESSON_ARCHIVE_AFTER_DAYS <= 0:
+            return
+        job.enqueue(
+            db,
+            kind="archive_lesson",
+            payload={"lesson_id": lesson_id},
+            run_at=after + timedelta(days=settings.LESSON_ARCHIVE_AFTER_DAYS),
+        )
+
+    async def archive(self, db: AsyncSession, *, lesson_id: int) -> Optional[int]:
+        """
+        Move the content of an archived, idle lesson and its modules into a
+        compressed LessonArchive row
+
+        The lesson and module rows stay behind as stubs with NULL content, so
+        listings, enrollments, progress and assets keep working against them;
+        reads serve it from the archive with get_archived_content(), and the
+        routes that edit the content restore it once the caller is known to
+        be allowed to.
+        updated_at is left alone on both sides, as the content a client sees
+        does not change. A lesson edited since it was scheduled is scheduled
+        again instead. Returns the bytes taken out of the hot tables, or None
+        if nothing was archived.
+        """
+        if settings.LESSON_ARCHIVE_AFTER_DAYS <= 0:
+            return None
+        statement = (
+            select(Lesson).where(Lesson.id == lesson_id, NOT_DELETED).with_for_update()
+        )
+        lesson = (await db.execute(statement)).scalar_one_or_none()
+        if (
+            lesson is None
+            or lesson.status != LessonStatus.ARCHIVED
+            or lesson.archived_at is not None
+        ):
+            await db.rollback()
+            return None
+        idle_since = datetime.now(timezone.utc) - timedelta(
+            days=settings.LESSON_ARCHIVE_AFTER_DAYS
+        )
+        if lesson.updated_at > idle_since:
+            self._schedule_archive(db, lesson_id=lesson_id, after=lesson.updated_at)
+            await db.commit()
+            return None
+
+        results = await db.execute(
+            select(Module.id, Module.content)
+            .where(Module.lesson_id == lesson_id, Module.content.is_not(None))
+            .with_for_update()
+        )
+        modules = {str(id): content for id, content in results.all()}
+        original_bytes = sum(
+            len(text.encode()) for text in (lesson.content or "", *modules.values())
+        )
+        payload = zlib.compress(
+            json.dumps({"content": lesson.content, "modules": modules}).encode(),
+            ARCHIVE_COMPRESSION_LEVEL,
+        )
+        db.add(
+            LessonArchive(
+                lesson_id=lesson_id, payload=payload, original_bytes=original_bytes
+            )
+        )
+        await db.execute(
+            update(Lesson)
+            .where(Lesson.id == lesson_id)
+            .values(content=None, archived_at=func.now(), updated_at=Lesson.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        if modules:
+            await db.execute(
+                update(Module)
+                .where(Module.lesson_id == lesson_id, Module.content.is_not(None))
+                .values(content=None, updated_at=Module.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+        metrics.LESSON_ARCHIVES.inc(operation="archive")
+        metrics.LESSON_ARCHIVE_BYTES.inc(original_bytes, size="original")
+        metrics.LESSON_ARCHIVE_BYTES.inc(len(payload), size="compressed")
+        return original_bytes
+
+    async def restore(self, db: AsyncSession, *, lesson_id: int) -> bool:
+        """
+        Put an archived lesson's content back into lessons and modules
+
+        Content written to a stub since it was archived is kept over the
+        archived copy, and modules deleted meanwhile are skipped. Commits and
+        expires the session, so call it before making changes of your own and
+        load the lesson and its modules again afterwards. If the lesson is
+        still archived it is scheduled for cold storage again.
+        """
+        statement = (
+            select(LessonArchive)
+            .where(LessonArchive.lesson_id == lesson_id)
+            .with_for_update()
+        )
+        archive = (await db.execute(statement)).scalar_one_or_none()
+        if archive is None:
+            # Restored by a concurrent request while this one waited
+            await db.rollback()
+            return False
+        data = json.loads(zlib.decompress(archive.payload))
+        await db.execute(
+            update(Lesson)
+            .where(Lesson.id == lesson_id)
+            .values(
+                content=func.coalesce(Lesson.content, data["content"]),
+                archived_at=None,
+                updated_at=Lesson.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if data["modules"]:
+            rows = values(
+                column("id", Integer), column("content", Text), name="archived"
+            ).data([(int(id), content) for id, content in data["modules"].items()])
+            await db.execute(
+                update(Module)
+                .where(Module.id == rows.c.id, Module.content.is_(None))
+                .values(content=rows.c.content, updated_at=Module.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+        await db.delete(archive)
+        status = await db.scalar(select(Lesson.status).where(Lesson.id == lesson_id))
+        if status == LessonStatus.ARCHIVED:
+            self._schedule_archive(
+                db, lesson_id=lesson_id, after=datetime.now(timezone.utc)
+            )
+        await db.commit()
+        # The updates above bypassed the identity map
+        db.expire_all()
+        metrics.LESSON_ARCHIVES.inc(operation="restore")
+        return True
+
+    async def get_archived_content(
+        self, db: AsyncSession, *, lesson_id: int
+    ) -> Tuple[Optional[str], Dict[int, Optional[str]]]:
+        """
+        Content of a lesson and its modules, read from cold storage without
+        moving it back
+
+        Reads stay reads this way; only the routes that edit the content
+        restore it. Content written to a stub since it was archived wins over
+        the archived copy, as it does in restore(). If a concurrent request
+        restored the lesson meanwhile, the content is read from the hot tables.
+        """
+        payload = await db.scalar(
+            select(LessonArchive.payload).where(LessonArchive.lesson_id == lesson_id)
+        )
+        data = (
+            json.loads(zlib.decompress(payload))
+            if payload is not None
+            else {"content": None, "modules": {}}
+        )
+        content = await db.scalar(select(Lesson.content).where(Lesson.id == lesson_id))
+        results = await db.execute(
+            select(Module.id, Module.content).where(Module.lesson_id == lesson_id)
+        )
+        modules = {
+            id: content if content is not None else data["modules"].get(str(id))
+            for id, content in results.all()
+        }
+        return (content if content is not None else data["content"]), modules
+
     async def get_teacher_lessons(
         self, db: AsyncSession, *, teacher_id: int, skip: int = 0, limit: int = 100
     ) -> List[Lesson]:
         """Get lessons by teacher"""
         statement = (
             select(Lesson)
-            .where(Lesson.teacher_id == teacher_id)
+            .where(Lesson.teacher_id == teacher_id, NOT_DELETED)
             .offset(skip)
             .limit(limit)
         )
         results = await db.execute(statement)
         return results.scalars().all()
 
+    async def get_teacher_dashboard(
+        self, db: AsyncSession, *, teacher_id: int, skip: int = 0, limit: int = 500
+    ) -> List[Row]:
+        """
+        Get a teacher's lessons with enrollment, module and activity
+        aggregates in one query
+
+        Each child table is grouped by lesson on its own before the join, so
+        enrollments and modules do not multiply each other's counts. Lessons
+        without enrollments, modules or progress get NULL aggregates.
+        """
+        lesson_ids = select(Lesson.id).where(
+            Lesson.teacher_id == teacher_id, NOT_DELETED
+        )
+        by_status = (
+            select(
+                Enrollment.lesson_id,
+                Enrollment.status,
+                func.count().label("students"),
+                func.max(Enrollment.created_at).label("last_enrolled_at"),
+            )
+            .where(Enrollment.lesson_id.in_(lesson_ids))
+            .group_by(Enrollment.lesson_id, Enrollment.status)
+            .subquery()
+        )
+        enrollments = (
+            select(
+                by_status.c.lesson_id,
+                func.jsonb_object_agg(by_status.c.status, by_status.c.students).label(
+                    "enrollments_by_status"
+                ),
+                func.sum(by_status.c.students).label("student_count"),
+                func.max(by_status.c.last_enrolled_at).label("last_enrolled_at"),
+            )
+            .group_by(by_status.c.lesson_id)
+            .subquery()
+        )
+        modules = (
+            select(
+                Module.lesson_id,
+                func.count().label("module_count"),
+                func.max(Module.updated_at).label("modules_updated_at"),
+            )
+            .where(Module.lesson_id.in_(lesson_ids))
+            .group_by(Module.lesson_id)
+            .subquery()
+        )
+        activity = (
+            select(
+                ModuleProgress.lesson_id,
+                func.max(ModuleProgress.updated_at).label("last_activity_at"),
+            )
+            .where(ModuleProgress.lesson_id.in_(lesson_ids))
+            .group_by(ModuleProgress.lesson_id)
+            .subquery()
+        )
+        statement = (
+            select(
+                Lesson,
+                enrollments.c.enrollments_by_status,
+                enrollments.c.student_count,
+                enrollments.c.last_enrolled_at,
+                modules.c.module_count,
+                modules.c.modules_updated_at,
+                activity.c.last_activity_at,
+            )
+            .outerjoin(enrollments, enrollments.c.lesson_id == Lesson.id)
+            .outerjoin(modules, modules.c.lesson_id == Lesson.id)
+            .outerjoin(activity, activity.c.lesson_id == Lesson.id)
+            .where(Lesson.teacher_id == teacher_id, NOT_DELETED)
+            .order_by(Lesson.updated_at.desc(), Lesson.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        results = await db.execute(statement)
+        return results.all()
+
     async def get_lesson_with_details(
         self, db: AsyncSession, *, lesson_id: int
     ) -> Optional[Lesson]:
         """Get lesson with teacher and modules"""
         statement = (
             select(Lesson)
-            .where(Lesson.id == lesson_id)
+            .where(Lesson.id == lesson_id, NOT_DELETED)
             .options(
                 joinedload(Lesson.teacher),
                 joinedload(Lesson.modules),
@@ -64,7 +601,7 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
         statement = (
             select(Lesson)
             .join(Enrollment, Lesson.id == Enrollment.lesson_id)
-            .where(Enrollment.student_id == student_id)
+            .where(Enrollment.student_id == student_id, NOT_DELETED)
             .offset(skip)
             .limit(limit)
         )
@@ -84,7 +621,7 @@ class CRUDLesson(CRUDBase[Lesson, LessonCreate, LessonUpdate]):
     ) -> bool:
         """Check if user is the teacher of the lesson"""
         statement = select(Lesson).where(
-            Lesson.id == lesson_id, Lesson.teacher_id == user_id
+            Lesson.id == lesson_id, Lesson.teacher_id == user_id, NOT_DELETED
         )
         result = await db.execute(statement)
         return result.scalar_one_or_none() is not None
@@ -114,27 +651,189 @@ class CRUDModule(CRUDBase[Module, ModuleCreate, ModuleUpdate]):
             lesson_id=lesson_id,
         )
         db.add(module)
+        await db.flush()
+        await push.notify(
+            db, lesson_id=lesson_id, kind="module.created", module_id=module.id
+        )
         await db.commit()
         await db.refresh(module)
         return module
 
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Module,
+        obj_in: Union[ModuleUpdate, Dict[str, Any]],
+    ) -> Module:
+        """Update a module and notify its lesson's open streams on commit"""
+        await push.notify(
+            db, lesson_id=db_obj.lesson_id, kind="module.updated", module_id=db_obj.id
+        )
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    async def remove(self, db: AsyncSession, *, id: int) -> Optional[Module]:
+        """Delete a module and notify its lesson's open streams on commit"""
+        module = await self.get(db, id=id)
+        if module:
+            await push.notify(
+                db, lesson_id=module.lesson_id, kind="module.deleted", module_id=id
+            )
+            await self.invalidate(db, module)
+            await db.delete(module)
+            await db.commit()
+        return module
+
+    async def get_lesson_ref(
+        self, db: AsyncSession, *, module_id: int
+    ) -> Optional[Tuple[int, LessonStatus]]:
+        """Get the lesson id and status for a module, cached briefly"""
+        ref = module_lesson_cache.get(module_id)
+        if ref is not None:
+            return ref
+        statement = (
+            select(Lesson.id, Lesson.status)
+            .join(Module, Module.lesson_id == Lesson.id)
+            .where(Module.id == module_id, NOT_DELETED)
+        )
+        result = await db.execute(statement)
+        row = result.one_or_none()
+        if row is None:
+            return None
+        ref = (row.id, row.status)
+        module_lesson_cache.set(module_id, ref)
+        return ref
+
     async def get_lesson_modules(
-        self, db: AsyncSession, *, lesson_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        lesson_id: int,
+        skip: int = 0,
+        limit: Optional[int] = 100,
     ) -> List[Module]:
         """Get modules by lesson"""
         statement = (
             select(Module)
             .where(Module.lesson_id == lesson_id)
-            .order_by(Module.order)
+            .order_by(Module.order, Module.id)
             .offset(skip)
             .limit(limit)
         )
         results = await db.execute(statement)
         return results.scalars().all()
 
+    async def get_lesson_module_ids(
+        self, db: AsyncSession, *, lesson_id: int
+    ) -> List[int]:
+        """Get the ids of all modules of a lesson"""
+        results = await db.execute(
+            select(Module.id).where(Module.lesson_id == lesson_id)
+        )
+        return results.scalars().all()
+
+    async def reorder(
+        self, db: AsyncSession, *, lesson_id: int, module_ids: Sequence[int]
+    ) -> int:
+        """
+        Set the order of a lesson's modules to their position in module_ids,
+        in one statement; return the number of modules that moved
+        """
+        positions = values(
+            column("id", Integer), column("position", Integer), name="positions"
+        ).data([(module_id, index) for index, module_id in enumerate(module_ids)])
+        statement = (
+            update(Module)
+            .where(
+                Module.id == positions.c.id,
+                Module.lesson_id == lesson_id,
+                # Unmoved modules are not rewritten
+                Module.order.is_distinct_from(positions.c.position),
+            )
+            .values(order=positions.c.position)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(statement)
+        if result.rowcount:
+            await _touch_lesson(db, lesson_id)
+            await push.notify(db, lesson_id=lesson_id, kind="modules.reordered")
+        await db.commit()
+        return result.rowcount
+
+    async def upsert_many(
+        self,
+        db: AsyncSession,
+        *,
+        lesson_id: int,
+        items: Sequence[ModuleBatchItem],
+    ) -> List[Module]:
+        """
+        Create and update several modules of a lesson in one transaction
+
+        Items with an id update that module, leaving omitted fields as they
+        are; items without one create a module. All updates are a single
+        UPDATE ... FROM (VALUES ...) and all creations a single INSERT.
+        """
+        updates = [item for item in items if item.id is not None]
+        creates = [item for item in items if item.id is None]
+        if updates:
+            rows = values(
+                column("id", Integer),
+                column("title", String),
+                column("position", Integer),
+                column("content", Text),
+                name="changes",
+            ).data(
+                [(item.id, item.title, item.order, item.content) for item in updates]
+            )
+            await db.execute(
+                update(Module)
+                .where(Module.id == rows.c.id, Module.lesson_id == lesson_id)
+                .values(
+                    title=func.coalesce(rows.c.title, Module.title),
+                    # A column of only NULLs comes back as text
+                    order=func.coalesce(cast(rows.c.position, Integer), Module.order),
+                    content=func.coalesce(rows.c.content, Module.content),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        if creates:
+            await db.execute(
+                insert(Module).values(
+                    [
+                        {
+                            "lesson_id": lesson_id,
+                            "title": item.title,
+                            "order": item.order or 0,
+                            "content": item.content,
+                        }
+                        for item in creates
+                    ]
+                )
+            )
+        await _touch_lesson(db, lesson_id)
+        await push.notify(db, lesson_id=lesson_id, kind="modules.updated")
+        await db.commit()
+        return await self.get_lesson_modules(db, lesson_id=lesson_id, limit=None)
+
 
 class CRUDEnrollment(CRUDBase[Enrollment, None, None]):
-    """CRUD operations for Enrollment model"""
+    """
+    CRUD operations for Enrollment model
+
+    Enrollments are hash-partitioned by lesson_id. Queries that name the
+    lesson read one partition; pass it wherever it is known.
+    """
+
+    async def get(
+        self, db: AsyncSession, id: Any, lesson_id: Optional[int] = None
+    ) -> Optional[Enrollment]:
+        """Get by ID, from the lesson's partition only when lesson_id is given"""
+        statement = select(Enrollment).where(Enrollment.id == id)
+        if lesson_id is not None:
+            statement = statement.where(Enrollment.lesson_id == lesson_id)
+        results = await db.execute(statement)
+        return results.scalar_one_or_none()
 
     async def enroll_student(
         self, db: AsyncSession, *, student_id: int, lesson_id: int
@@ -152,6 +851,14 @@ class CRUDEnrollment(CRUDBase[Enrollment, None, None]):
             if enrollment.status != "active":
                 enrollment.status = "active"
                 db.add(enrollment)
+                job.enqueue(
+                    db,
+                    kind="send_enrollment_notification",
+                    payload={
+                        "enrollment_id": enrollment.id,
+                        "lesson_id": lesson_id,
+                    },
+                )
                 await db.commit()
                 await db.refresh(enrollment)
             return enrollment
@@ -161,15 +868,27 @@ class CRUDEnrollment(CRUDBase[Enrollment, None, None]):
             student_id=student_id, lesson_id=lesson_id, status="active"
         )
         db.add(enrollment)
+        await db.flush()
+        # Committed together, so the notification is never lost or orphaned
+        job.enqueue(
+            db,
+            kind="send_enrollment_notification",
+            payload={"enrollment_id": enrollment.id, "lesson_id": lesson_id},
+        )
         await db.commit()
         await db.refresh(enrollment)
         return enrollment
 
     async def update_status(
-        self, db: AsyncSession, *, enrollment_id: int, status: str
+        self,
+        db: AsyncSession,
+        *,
+        enrollment_id: int,
+        status: str,
+        lesson_id: Optional[int] = None,
     ) -> Optional[Enrollment]:
         """Update enrollment status"""
-        enrollment = await self.get(db, id=enrollment_id)
+        enrollment = await self.get(db, id=enrollment_id, lesson_id=lesson_id)
         if not enrollment:
             return None
 
@@ -185,14 +904,81 @@ class CRUDEnrollment(CRUDBase[Enrollment, None, None]):
         """Get enrollments by student"""
         statement = (
             select(Enrollment)
-            .where(Enrollment.student_id == student_id)
-            .options(joinedload(Enrollment.lesson))
+            .join(Enrollment.lesson)
+            .where(Enrollment.student_id == student_id, NOT_DELETED)
+            .options(contains_eager(Enrollment.lesson))
             .offset(skip)
             .limit(limit)
         )
         results = await db.execute(statement)
         return results.scalars().all()
 
+    async def get_student_learning(
+        self,
+        db: AsyncSession,
+        *,
+        student_id: int,
+        before: Optional[int] = None,
+        limit: int = 20,
+    ) -> List[Row]:
+        """
+        Get a student's enrollments, newest first, with a lesson summary,
+        module count and completed module count in one query
+
+        Pages by keyset: `before` is the id of the last enrollment of the
+        previous page, so deep pages cost the same as the first.
+        """
+        page = (
+            select(Enrollment)
+            .join(Lesson, Lesson.id == Enrollment.lesson_id)
+            .where(Enrollment.student_id == student_id, NOT_DELETED)
+        )
+        if before is not None:
+            page = page.where(Enrollment.id < before)
+        # A CTE, so the page is read once for the join and both aggregates
+        page = page.order_by(Enrollment.id.desc()).limit(limit).cte("learning_page")
+        enrollment = aliased(Enrollment, page, name="Enrollment")
+
+        # Only the lessons on this page are aggregated
+        modules = (
+            select(Module.lesson_id, func.count().label("module_count"))
+            .where(Module.lesson_id.in_(select(page.c.lesson_id)))
+            .group_by(Module.lesson_id)
+            .subquery()
+        )
+        completed = (
+            select(
+                ModuleProgress.lesson_id,
+                func.count(ModuleProgress.completed_at).label("completed_modules"),
+                func.max(ModuleProgress.updated_at).label("last_activity_at"),
+            )
+            .where(
+                ModuleProgress.student_id == student_id,
+                ModuleProgress.lesson_id.in_(select(page.c.lesson_id)),
+            )
+            .group_by(ModuleProgress.lesson_id)
+            .subquery()
+        )
+        statement = (
+            select(
+                enrollment,
+                Lesson.title,
+                Lesson.description,
+                Lesson.status.label("lesson_status"),
+                Lesson.teacher_id,
+                Lesson.updated_at.label("lesson_updated_at"),
+                modules.c.module_count,
+                completed.c.completed_modules,
+                completed.c.last_activity_at,
+            )
+            .join(Lesson, Lesson.id == enrollment.lesson_id)
+            .outerjoin(modules, modules.c.lesson_id == Lesson.id)
+            .outerjoin(completed, completed.c.lesson_id == Lesson.id)
+            .order_by(enrollment.id.desc())
+        )
+        results = await db.execute(statement)
+        return results.all()
+
 
 lesson = CRUDLesson(Lesson)
 module = CRUDModule(Module)
@@ -0,0 +1,76 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.base import CRUDBase
+from models.lesson import Module
+from models.progress import ModuleProgress
+
+# asyncpg allows 32767 bind parameters per statement, six per row
+UPSERT_CHUNK_ROWS = 5000
+
+
+class CRUDProgress(CRUDBase[ModuleProgress, None, None]):
+    """CRUD operations for ModuleProgress model"""
+
+    async def upsert_many(
+        self, db: AsyncSession, *, rows: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Write many progress rows in one transaction
+
+        Progress only ever grows and the first completion time is kept, so
+        replaying or reordering rows is harmless.
+        """
+        # Same lock order in every worker, so concurrent flushes cannot deadlock
+        rows = sorted(rows, key=lambda row: (row["student_id"], row["module_id"]))
+        # Progress on a module deleted since it was recorded is dropped rather
+        # than failing the whole batch; the lock keeps the others from being
+        # deleted before this commits
+        existing = await db.execute(
+            select(Module.id)
+            .where(Module.id.in_({row["module_id"] for row in rows}))
+            .order_by(Module.id)
+            .with_for_update(read=True, key_share=True)
+        )
+        module_ids = set(existing.scalars())
+        rows = [row for row in rows if row["module_id"] in module_ids]
+        # Losing the last few milliseconds of progress on a crash is fine;
+        # not waiting for the WAL flush keeps the SD card mostly idle
+        await db.execute(text("SET LOCAL synchronous_commit = off"))
+        for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+            statement = insert(ModuleProgress).values(
+                rows[start : start + UPSERT_CHUNK_ROWS]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=[ModuleProgress.student_id, ModuleProgress.module_id],
+                set_={
+                    "progress": func.greatest(
+                        ModuleProgress.progress, statement.excluded.progress
+                    ),
+                    "completed_at": func.coalesce(
+                        ModuleProgress.completed_at, statement.excluded.completed_at
+                    ),
+                    "updated_at": func.greatest(
+                        ModuleProgress.updated_at, statement.excluded.updated_at
+                    ),
+                },
+            )
+            await db.execute(statement)
+        await db.commit()
+
+    async def get_lesson_progress(
+        self, db: AsyncSession, *, student_id: int, lesson_id: int
+    ) -> List[ModuleProgress]:
+        """Get a student's progress through the modules of a lesson"""
+        statement = select(ModuleProgress).where(
+            ModuleProgress.student_id == student_id,
+            ModuleProgress.lesson_id == lesson_id,
+        )
+        results = await db.execute(statement)
+        return results.scalars().all()
+
+
+progress = CRUDProgress(ModuleProgress)
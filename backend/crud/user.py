@@ -1,13 +1,33 @@
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from core.security import get_password_hash, verify_password
-from crud.base import CRUDBase
-from models.user import User
+from core import invalidation
+from core.cache import TTLCache
+from core.config import settings
+from core.revocation import token_versions
+from core.security import (
+    get_password_hash,
+    password_needs_rehash,
+    verify_password,
+)
+from crud.base import CRUDBase, escape_like, execute_with_timeout
+from models.user import USER_FULL_NAME, User
 from schemas.user import UserCreate, UserUpdate
 
+# Typeahead clients repeat the same prefix while the user types
+suggestion_cache = TTLCache("user_suggestions", settings.SUGGEST_CACHE_TTL)
+
+
+@invalidation.on("users")
+def _evict_user(user_id: Optional[int], version: Optional[int]) -> None:
+    suggestion_cache.clear()
+    # Revocations made in other workers apply before the next refresh
+    if user_id is not None and version is not None:
+        token_versions.bump(user_id, version)
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     """CRUD operations for User model"""
@@ -18,6 +38,49 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         results = await db.execute(statement)
         return results.scalar_one_or_none()
 
+    async def suggest(
+        self, db: AsyncSession, *, q: str, limit: int = 8
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Typeahead lookup by email or name; None if it exceeded the time budget"""
+        key = (q.casefold(), limit)
+        cached = suggestion_cache.get(key)
+        if cached is not None:
+            return cached
+
+        escaped = escape_like(q)
+        pattern = f"%{escaped}%"
+        # Each condition is served by ix_users_email_trgm or
+        # ix_users_full_name_trgm; prefix matches rank first
+        statement = (
+            select(User.id, User.email, User.first_name, User.last_name, User.role)
+            .where(
+                or_(
+                    User.email.ilike(pattern),
+                    USER_FULL_NAME.ilike(pattern),
+                    User.email.op("%")(q),
+                    USER_FULL_NAME.op("%")(q),
+                )
+            )
+            .order_by(
+                or_(
+                    User.email.ilike(f"{escaped}%"),
+                    USER_FULL_NAME.ilike(f"{escaped}%"),
+                ).desc(),
+                func.greatest(
+                    func.similarity(User.email, q),
+                    func.similarity(USER_FULL_NAME, q),
+                ).desc(),
+                User.email,
+            )
+            .limit(limit)
+        )
+        results = await execute_with_timeout(db, statement, settings.SUGGEST_TIMEOUT_MS)
+        if results is None:
+            return None
+        suggestions = [row._asdict() for row in results]
+        suggestion_cache.set(key, suggestions)
+        return suggestions
+
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         """Create new user with hashed password"""
         db_obj = User(
@@ -38,7 +101,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db: AsyncSession,
         *,
         db_obj: User,
-        obj_in: Union[UserUpdate, Dict[str, Any]]
+        obj_in: Union[UserUpdate, Dict[str, Any]],
     ) -> User:
         """Update user"""
         if isinstance(obj_in, dict):
@@ -51,7 +114,47 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
 
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        # Tokens carry role and active claims, so changing either (or the
+        # password) must revoke the tokens already issued
+        if (
+            "hashed_password" in update_data
+            or (
+                update_data.get("role") is not None
+                and update_data["role"] != db_obj.role
+            )
+            or (
+                update_data.get("is_active") is not None
+                and update_data["is_active"] != db_obj.is_active
+            )
+        ):
+            update_data["token_version"] = db_obj.token_version + 1
+
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        token_versions.bump(user.id, user.token_version)
+        return user
+
+    def version(self, obj: User) -> Optional[int]:
+        """Token version, so revocations reach every worker at once"""
+        return obj.token_version
+
+    async def revoke_tokens(self, db: AsyncSession, *, db_obj: User) -> User:
+        """Revoke every token issued to the user"""
+        return await self.update(
+            db, db_obj=db_obj, obj_in={"token_version": db_obj.token_version + 1}
+        )
+
+    async def remove(self, db: AsyncSession, *, id: int) -> User:
+        """Remove user, revoking their tokens in every worker"""
+        user = await self.get(db, id=id)
+        if user:
+            # The refresh cannot see deleted rows, so the bumped version
+            # travels with the invalidation instead
+            await invalidation.publish(
+                db, table="users", id=user.id, version=user.token_version + 1
+            )
+            await db.delete(user)
+            await db.commit()
+        return user
 
     async def authenticate(
         self, db: AsyncSession, *, email: str, password: str
@@ -60,8 +163,15 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        # bcrypt is deliberately slow; keep it off the event loop
+        if not await run_in_threadpool(verify_password, password, user.hashed_password):
             return None
+        if password_needs_rehash(user.hashed_password):
+            # Migrate the hash to the current cost now that we know the password
+            user.hashed_password = await run_in_threadpool(get_password_hash, password)
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
         return user
 
     async def is_active(self, user: User) -> bool:
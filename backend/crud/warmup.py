@@ -0,0 +1,22 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from crud.lesson import enrollment, lesson, module
+from crud.user import user
+
+
+async def prepare_hot_statements(db: AsyncSession) -> None:
+    """
+    Execute the statements behind login, auth and lesson reads once
+
+    Ids and emails that cannot exist are used, so nothing is returned and
+    nothing is locked, but each statement is compiled and prepared on the
+    session's connection.
+    """
+    await user.get(db, id=-1)
+    await user.get_by_email(db, email="")
+    await lesson.get(db, id=-1)
+    await lesson.get_lesson_with_details(db, lesson_id=-1)
+    await lesson.get_student_count(db, lesson_id=-1)
+    await lesson.is_enrolled(db, lesson_id=-1, student_id=-1)
+    await module.get_lesson_modules(db, lesson_id=-1)
+    await enrollment.get_student_enrollments(db, student_id=-1)
@@ -1,17 +1,94 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from api.routes import api_router
+from core import events, health, listen, metrics, progress, revocation
 from core.config import settings
+from core.db import engine
+from core.middleware import (
+    AdmissionControlMiddleware,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+)
+from crud.warmup import prepare_hot_statements
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the connection pool and start the background refresh tasks
+    """
+    warmup = min(settings.DATABASE_POOL_WARMUP, settings.DATABASE_POOL_SIZE)
+    if warmup > 0:
+        await health.warm_up_pool(engine, warmup, prepare=prepare_hot_statements)
+    await health.check_database(engine, settings.DATABASE_READINESS_TIMEOUT)
+    # Load revoked token versions before serving. If the database is down,
+    # authenticated requests get a 503 until refresh_loop manages it
+    try:
+        await revocation.token_versions.refresh(engine)
+    except Exception as e:
+        logger.error(f"Could not load token revocations at startup: {str(e)}")
+    readiness_task = asyncio.create_task(
+        health.readiness_loop(
+            engine,
+            settings.DATABASE_READINESS_INTERVAL,
+            settings.DATABASE_READINESS_TIMEOUT,
+        )
+    )
+    revocation_task = asyncio.create_task(
+        revocation.refresh_loop(engine, settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+    )
+    progress_task = asyncio.create_task(progress.buffer.run())
+    events_task = (
+        asyncio.create_task(events.flusher.run()) if settings.EVENTS_ENABLED else None
+    )
+    # Push streams and cache invalidation from the other workers
+    listen_task = asyncio.create_task(listen.listener.run())
+
+    yield
+
+    tasks = [revocation_task, readiness_task, listen_task, progress_task]
+    if events_task is not None:
+        tasks.append(events_task)
+    # Cancelling the progress writer and the event flusher flushes what is
+    # still buffered; wait for every task so none outlives the engine
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await engine.dispose()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     description="Educational platform API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
-# Set CORS middleware
+# Middleware added last runs first
+
+# Query counts and DB time per request (Server-Timing header)
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Shed load before it queues in the connection pool
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Request counts and latency per route, including shed requests
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Set CORS middleware (outermost, so rejections carry CORS headers too)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.BACKEND_CORS_ORIGINS,
@@ -32,6 +109,34 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness endpoint, served from the cached background DB check
+    """
+    return JSONResponse(
+        jsonable_encoder(health.readiness.as_dict()),
+        status_code=(
+            status.HTTP_200_OK
+            if health.readiness.ready
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def read_metrics():
+    """
+    Prometheus metrics endpoint
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -21,6 +21,14 @@ def run_alembic(args):
     return subprocess.run(alembic_args, check=True)
 
 
+def write_env_setting(key, value, env_file=Path(__file__).parent / ".env"):
+    """Set a key in the .env file, replacing any existing value"""
+    lines = env_file.read_text().splitlines() if env_file.exists() else []
+    lines = [line for line in lines if not line.startswith(f"{key}=")]
+    lines.append(f"{key}={value}")
+    env_file.write_text("\n".join(lines) + "\n")
+
+
 # async def init_database():
 #     """Initialize database tables using SQLModel metadata"""
 #     print("Initializing database tables...")
@@ -80,6 +88,14 @@ def main():
         "reset", help="Reset database (drop all tables and recreate)"
     )
 
+    # Seed synthetic data
+    seed_parser = db_subparsers.add_parser(
+        "seed", help="Fill the database with a synthetic district for benchmarks"
+    )
+    from scripts.seed import add_arguments as add_seed_arguments
+
+    add_seed_arguments(seed_parser)
+
     # Create superuser
     user_parser = subparsers.add_parser("user", help="User management commands")
     user_subparsers = user_parser.add_subparsers(
@@ -101,6 +117,56 @@ def main():
         "--last-name", required=True, help="User last name"
     )
 
+    # Calibrate password hashing cost
+    calibrate_parser = user_subparsers.add_parser(
+        "calibrate-bcrypt", help="Pick BCRYPT_ROUNDS for this device"
+    )
+    calibrate_parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="Longest acceptable time to hash one password (default: 250)",
+    )
+    calibrate_parser.add_argument(
+        "--min-rounds",
+        type=int,
+        default=None,
+        help="Security floor, never go below this cost (default: 10)",
+    )
+    calibrate_parser.add_argument(
+        "--write", action="store_true", help="Save the result to .env"
+    )
+
+    # Run background job worker
+    worker_parser = subparsers.add_parser("worker", help="Run background jobs")
+    worker_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Jobs run at once (default: JOB_WORKER_CONCURRENCY)",
+    )
+    worker_parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Port for Prometheus metrics, 0 to disable (default: JOB_WORKER_METRICS_PORT)",
+    )
+
+    # Run benchmarks
+    bench_parser = subparsers.add_parser(
+        "bench", help="Run the API benchmark scenarios"
+    )
+    from benchmarks.run import add_arguments as add_bench_arguments
+
+    add_bench_arguments(bench_parser)
+
+    bench_enrollments_parser = subparsers.add_parser(
+        "bench-enrollments", help="Time enrollment queries on a district-sized table"
+    )
+    from benchmarks.enrollments import add_arguments as add_enrollment_arguments
+
+    add_enrollment_arguments(bench_enrollments_parser)
+
     args = parser.parse_args()
 
     if not args.command:
@@ -141,6 +207,10 @@ def main():
                 print("Database has been reset.")
             else:
                 print("Operation cancelled.")
+        elif args.db_command == "seed":
+            from scripts.seed import run as run_seed
+
+            sys.exit(run_seed(args))
     elif args.command == "user":
         if not args.user_command:
             user_parser.print_help()
@@ -181,6 +251,71 @@ def main():
                     print(f"Superuser {user.email} created successfully.")
 
             asyncio.run(create_superuser())
+        elif args.user_command == "calibrate-bcrypt":
+            from core.security import BCRYPT_MIN_ROUNDS, calibrate_bcrypt_rounds
+
+            min_rounds = max(args.min_rounds or BCRYPT_MIN_ROUNDS, BCRYPT_MIN_ROUNDS)
+            rounds, timings = calibrate_bcrypt_rounds(
+                args.target_ms, min_rounds=min_rounds
+            )
+            for measured_rounds, elapsed in timings:
+                print(f"  rounds={measured_rounds:<3} {elapsed:8.1f}ms")
+            if timings[0][1] > args.target_ms:
+                print(
+                    f"Even the floor of {min_rounds} rounds exceeds "
+                    f"{args.target_ms:g}ms on this device; using the floor."
+                )
+            print(f"BCRYPT_ROUNDS={rounds}")
+            if args.write:
+                write_env_setting("BCRYPT_ROUNDS", str(rounds))
+                print("Saved to .env. Existing hashes are upgraded on next login.")
+    elif args.command == "worker":
+        import asyncio
+        import logging
+        import signal
+
+        from core.config import settings
+        from core.db import engine
+        from core import variants
+        from core.jobs import Worker, serve_metrics
+        import tasks  # noqa: F401  registers the job handlers
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        )
+
+        async def run_worker():
+            worker = Worker(
+                concurrency=args.concurrency or settings.JOB_WORKER_CONCURRENCY
+            )
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, worker.stop)
+
+            metrics_port = (
+                settings.JOB_WORKER_METRICS_PORT
+                if args.metrics_port is None
+                else args.metrics_port
+            )
+            server = await serve_metrics(metrics_port) if metrics_port else None
+            try:
+                await worker.run()
+            finally:
+                if server is not None:
+                    server.close()
+                variants.shutdown()
+                await engine.dispose()
+
+        asyncio.run(run_worker())
+    elif args.command == "bench":
+        from benchmarks.run import run as run_benchmarks
+
+        sys.exit(run_benchmarks(args))
+    elif args.command == "bench-enrollments":
+        from benchmarks.enrollments import run as run_enrollment_benchmark
+
+        sys.exit(run_enrollment_benchmark(args))
 
 
 if __name__ == "__main__":
@@ -12,6 +12,10 @@ from sqlmodel import SQLModel
 import models.base
 import models.user
 import models.lesson
+import models.event
+import models.job
+import models.progress
+import models.asset
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
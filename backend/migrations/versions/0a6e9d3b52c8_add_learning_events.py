@@ -0,0 +1,56 @@
+"""Add learning events
+
+Revision ID: 0a6e9d3b52c8
+Revises: f3a8c5e1d204
+Create Date: 2026-10-19 20:14:36.482051
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6e9d3b52c8"
+down_revision: Union[str, None] = "f3a8c5e1d204"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "learning_events",
+        sa.Column("occurred_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column(
+            "received_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("lesson_id", sa.Integer(), nullable=True),
+        sa.Column("module_id", sa.Integer(), nullable=True),
+        sa.Column("event_type", sa.String(length=32), nullable=False),
+        sa.Column("dwell_ms", sa.Integer(), nullable=True),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        postgresql_partition_by="RANGE (occurred_at)",
+    )
+    op.create_index(
+        "ix_learning_events_lesson_occurred",
+        "learning_events",
+        ["lesson_id", "occurred_at"],
+        unique=False,
+    )
+    # Daily partitions are created by the API's event flusher
+    op.execute(
+        "CREATE TABLE learning_events_default PARTITION OF learning_events DEFAULT"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_learning_events_lesson_occurred", table_name="learning_events")
+    op.drop_table("learning_events")
@@ -0,0 +1,100 @@
+"""Refresh module search per statement
+
+Revision ID: 4e1b7d9c2a63
+Revises: c5e8a2d7f1b4
+Create Date: 2026-10-22 10:18:34.906215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "4e1b7d9c2a63"
+down_revision: Union[str, None] = "c5e8a2d7f1b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATEMENT_TRIGGERS = {
+    "modules_refresh_lesson_search_insert": "INSERT ON modules REFERENCING NEW TABLE AS new_modules",
+    "modules_refresh_lesson_search_update": "UPDATE ON modules REFERENCING OLD TABLE AS old_modules NEW TABLE AS new_modules",
+    "modules_refresh_lesson_search_delete": "DELETE ON modules REFERENCING OLD TABLE AS old_modules",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS modules_refresh_lesson_search ON modules")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+                WHERE id IN (SELECT lesson_id FROM new_modules);
+            ELSIF TG_OP = 'DELETE' THEN
+                -- A deleted lesson being purged is not searchable; skip the refresh
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+                WHERE id IN (SELECT lesson_id FROM old_modules) AND deleted_at IS NULL;
+            ELSE
+                -- Batch edits list title and content even when only the order changed
+                WITH changed AS (
+                    SELECT old_modules.lesson_id AS old_lesson_id,
+                           new_modules.lesson_id AS new_lesson_id
+                    FROM old_modules JOIN new_modules USING (id)
+                    WHERE new_modules.title IS DISTINCT FROM old_modules.title
+                        OR new_modules.content IS DISTINCT FROM old_modules.content
+                        OR new_modules.lesson_id IS DISTINCT FROM old_modules.lesson_id
+                )
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+                WHERE (id IN (SELECT old_lesson_id FROM changed) AND deleted_at IS NULL)
+                    OR id IN (
+                        SELECT new_lesson_id FROM changed
+                        WHERE new_lesson_id IS DISTINCT FROM old_lesson_id
+                    );
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for name, event in STATEMENT_TRIGGERS.items():
+        op.execute(f"""
+            CREATE TRIGGER {name}
+            AFTER {event}
+            FOR EACH STATEMENT EXECUTE FUNCTION refresh_lesson_module_search()
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in STATEMENT_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON modules")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            -- Batch edits list title and content even when only the order changed
+            IF TG_OP = 'UPDATE'
+                AND NEW.title IS NOT DISTINCT FROM OLD.title
+                AND NEW.content IS NOT DISTINCT FROM OLD.content
+                AND NEW.lesson_id IS NOT DISTINCT FROM OLD.lesson_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(OLD.lesson_id)
+                WHERE id = OLD.lesson_id AND deleted_at IS NULL;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(NEW.lesson_id)
+                WHERE id = NEW.lesson_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER modules_refresh_lesson_search
+        AFTER INSERT OR DELETE OR UPDATE OF title, content, lesson_id ON modules
+        FOR EACH ROW EXECUTE FUNCTION refresh_lesson_module_search()
+    """)
@@ -0,0 +1,43 @@
+"""Add user token version
+
+Revision ID: 5b7e2a9c4d13
+Revises: 331e80c2ec62
+Create Date: 2026-10-19 09:12:44.118305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5b7e2a9c4d13"
+down_revision: Union[str, None] = "331e80c2ec62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("token_version", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_index(
+        "ix_users_revoked_updated_at",
+        "users",
+        ["updated_at"],
+        unique=False,
+        postgresql_where=sa.text("token_version > 0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_users_revoked_updated_at",
+        table_name="users",
+        postgresql_where=sa.text("token_version > 0"),
+    )
+    op.drop_column("users", "token_version")
@@ -0,0 +1,47 @@
+"""Add teacher dashboard indexes
+
+Revision ID: 6c1f0b8e9d27
+Revises: 0a6e9d3b52c8
+Create Date: 2026-10-19 21:02:11.637420
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "6c1f0b8e9d27"
+down_revision: Union[str, None] = "0a6e9d3b52c8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_lessons_teacher_id", "lessons", ["teacher_id"], unique=False)
+    op.create_index(
+        "ix_modules_lesson_order", "modules", ["lesson_id", "order"], unique=False
+    )
+    op.create_index(
+        "ix_enrollments_lesson_status",
+        "enrollments",
+        ["lesson_id", "status"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_module_progress_lesson_updated",
+        "module_progress",
+        ["lesson_id", "updated_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_module_progress_lesson_updated", table_name="module_progress")
+    op.drop_index("ix_enrollments_lesson_status", table_name="enrollments")
+    op.drop_index("ix_modules_lesson_order", table_name="modules")
+    op.drop_index("ix_lessons_teacher_id", table_name="lessons")
@@ -0,0 +1,92 @@
+"""Add lesson search vector
+
+Revision ID: 8d3f61c0a7e5
+Revises: 5b7e2a9c4d13
+Create Date: 2026-10-19 11:37:02.540918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8d3f61c0a7e5"
+down_revision: Union[str, None] = "5b7e2a9c4d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "lessons",
+        sa.Column("module_search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+    op.add_column(
+        "lessons",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') || setweight(to_tsvector('english', coalesce(description, '')), 'B') || setweight(to_tsvector('english', coalesce(content, '')), 'C') || coalesce(module_search_vector, ''::tsvector)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_lessons_search_vector",
+        "lessons",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION lesson_module_search_vector(target_lesson_id integer)
+        RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('english', coalesce(string_agg(title, ' '), '')), 'B')
+                || setweight(to_tsvector('english', coalesce(string_agg(content, ' '), '')), 'D')
+            FROM modules
+            WHERE lesson_id = target_lesson_id
+        $$ LANGUAGE sql STABLE
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(OLD.lesson_id)
+                WHERE id = OLD.lesson_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(NEW.lesson_id)
+                WHERE id = NEW.lesson_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER modules_refresh_lesson_search
+        AFTER INSERT OR DELETE OR UPDATE OF title, content, lesson_id ON modules
+        FOR EACH ROW EXECUTE FUNCTION refresh_lesson_module_search()
+    """)
+    # Backfill module text for existing lessons
+    op.execute("""
+        UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+        WHERE EXISTS (SELECT 1 FROM modules WHERE modules.lesson_id = lessons.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS modules_refresh_lesson_search ON modules")
+    op.execute("DROP FUNCTION IF EXISTS refresh_lesson_module_search()")
+    op.execute("DROP FUNCTION IF EXISTS lesson_module_search_vector(integer)")
+    op.drop_index(
+        "ix_lessons_search_vector", table_name="lessons", postgresql_using="gin"
+    )
+    op.drop_column("lessons", "search_vector")
+    op.drop_column("lessons", "module_search_vector")
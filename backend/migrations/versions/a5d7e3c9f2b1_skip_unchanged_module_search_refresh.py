@@ -0,0 +1,64 @@
+"""Skip unchanged module search refresh
+
+Revision ID: a5d7e3c9f2b1
+Revises: 9b4c2e6f8a10
+Create Date: 2026-10-20 00:12:43.518307
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "a5d7e3c9f2b1"
+down_revision: Union[str, None] = "9b4c2e6f8a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            -- Batch edits list title and content even when only the order changed
+            IF TG_OP = 'UPDATE'
+                AND NEW.title IS NOT DISTINCT FROM OLD.title
+                AND NEW.content IS NOT DISTINCT FROM OLD.content
+                AND NEW.lesson_id IS NOT DISTINCT FROM OLD.lesson_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(OLD.lesson_id)
+                WHERE id = OLD.lesson_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(NEW.lesson_id)
+                WHERE id = NEW.lesson_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(OLD.lesson_id)
+                WHERE id = OLD.lesson_id;
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(NEW.lesson_id)
+                WHERE id = NEW.lesson_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
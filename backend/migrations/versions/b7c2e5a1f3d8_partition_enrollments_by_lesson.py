@@ -0,0 +1,115 @@
+"""Partition enrollments by lesson
+
+Revision ID: b7c2e5a1f3d8
+Revises: d8a3f6b2c4e9
+Create Date: 2026-10-20 14:06:52.731940
+
+Rows are copied into the new table inside the migration's transaction, and
+enrollments is locked until it commits. At district scale (millions of
+rows) run it in a maintenance window.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "b7c2e5a1f3d8"
+down_revision: Union[str, None] = "d8a3f6b2c4e9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match models.user.ENROLLMENT_PARTITIONS
+PARTITIONS = 16
+COLUMNS = "id, student_id, lesson_id, status, created_at, updated_at"
+
+
+def _rename_old_table() -> None:
+    op.rename_table("enrollments", "enrollments_old")
+    # Index names are schema-wide, so the old ones must make way
+    op.execute(
+        "ALTER TABLE enrollments_old RENAME CONSTRAINT enrollments_pkey TO enrollments_old_pkey"
+    )
+    op.execute(
+        "ALTER TABLE enrollments_old RENAME CONSTRAINT unique_enrollment TO unique_enrollment_old"
+    )
+    op.execute(
+        "ALTER INDEX ix_enrollments_lesson_status RENAME TO ix_enrollments_old_lesson_status"
+    )
+
+
+def _columns(lesson_nullable: bool) -> list:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('enrollments_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("student_id", sa.Integer(), nullable=True),
+        sa.Column("lesson_id", sa.Integer(), nullable=lesson_nullable),
+        sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["lesson_id"], ["lessons.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["student_id"],
+            ["users.id"],
+        ),
+        sa.UniqueConstraint("student_id", "lesson_id", name="unique_enrollment"),
+    ]
+
+
+def _replace_old_table() -> None:
+    op.execute(
+        f"INSERT INTO enrollments ({COLUMNS}) SELECT {COLUMNS} FROM enrollments_old"
+    )
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE enrollments_id_seq OWNED BY enrollments.id")
+    op.drop_table("enrollments_old")
+    op.create_index(
+        "ix_enrollments_lesson_status",
+        "enrollments",
+        ["lesson_id", "status"],
+        unique=False,
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Enrollments without a lesson cannot be placed in a partition
+    op.execute("DELETE FROM enrollments WHERE lesson_id IS NULL")
+    _rename_old_table()
+    op.create_table(
+        "enrollments",
+        *_columns(lesson_nullable=False),
+        sa.PrimaryKeyConstraint("id", "lesson_id"),
+        postgresql_partition_by="HASH (lesson_id)",
+    )
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f"CREATE TABLE enrollments_p{remainder} PARTITION OF enrollments "
+            f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+        )
+    _replace_old_table()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rename_old_table()
+    op.create_table(
+        "enrollments", *_columns(lesson_nullable=True), sa.PrimaryKeyConstraint("id")
+    )
+    _replace_old_table()
@@ -0,0 +1,63 @@
+"""Add trigram indexes
+
+Revision ID: c41a9e27b8f0
+Revises: 8d3f61c0a7e5
+Create Date: 2026-10-19 14:05:51.203377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c41a9e27b8f0"
+down_revision: Union[str, None] = "8d3f61c0a7e5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_lessons_title_trgm",
+        "lessons",
+        ["title"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_email_trgm",
+        "users",
+        ["email"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"email": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_users_full_name_trgm",
+        "users",
+        [sa.text("(first_name || ' ' || last_name) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_users_full_name_trgm", table_name="users", postgresql_using="gin")
+    op.drop_index(
+        "ix_users_email_trgm",
+        table_name="users",
+        postgresql_using="gin",
+        postgresql_ops={"email": "gin_trgm_ops"},
+    )
+    op.drop_index(
+        "ix_lessons_title_trgm",
+        table_name="lessons",
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
@@ -0,0 +1,78 @@
+"""Add lesson archives
+
+Revision ID: c5e8a2d7f1b4
+Revises: b7c2e5a1f3d8
+Create Date: 2026-10-21 14:06:52.318740
+
+"""
+
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e8a2d7f1b4"
+down_revision: Union[str, None] = "b7c2e5a1f3d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "lessons", sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_table(
+        "lesson_archives",
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("lesson_id", sa.Integer(), nullable=False),
+        sa.Column("original_bytes", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["lesson_id"], ["lessons.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("lesson_id"),
+    )
+    # The payload is compressed already; keep TOAST from trying again
+    op.execute("ALTER TABLE lesson_archives ALTER COLUMN payload SET STORAGE EXTERNAL")
+    # Lessons archived before now get their job too; it reschedules itself
+    # for lessons that have not been idle long enough yet
+    op.execute("""
+        INSERT INTO jobs (kind, payload, status, attempts, max_attempts)
+        SELECT 'archive_lesson', jsonb_build_object('lesson_id', id), 'QUEUED', 0, 5
+        FROM lessons
+        WHERE status = 'ARCHIVED' AND deleted_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Put archived content back before its table goes; Postgres cannot
+    # inflate zlib itself, so it is done here
+    bind = op.get_bind()
+    archives = bind.execute(sa.text("SELECT lesson_id, payload FROM lesson_archives"))
+    for lesson_id, payload in archives.all():
+        data = json.loads(zlib.decompress(payload))
+        bind.execute(
+            sa.text(
+                "UPDATE lessons SET content = coalesce(content, :content) WHERE id = :id"
+            ),
+            {"content": data["content"], "id": lesson_id},
+        )
+        for module_id, content in data["modules"].items():
+            bind.execute(
+                sa.text(
+                    "UPDATE modules SET content = coalesce(content, :content) WHERE id = :id"
+                ),
+                {"content": content, "id": int(module_id)},
+            )
+    op.execute("DELETE FROM jobs WHERE kind = 'archive_lesson' AND status = 'QUEUED'")
+    op.drop_table("lesson_archives")
+    op.drop_column("lessons", "archived_at")
@@ -0,0 +1,82 @@
+"""Add lesson soft delete and cascading foreign keys
+
+Revision ID: d8a3f6b2c4e9
+Revises: a5d7e3c9f2b1
+Create Date: 2026-10-20 09:41:17.204518
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "d8a3f6b2c4e9"
+down_revision: Union[str, None] = "a5d7e3c9f2b1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table), using Postgres' default constraint names
+CASCADING_FOREIGN_KEYS = [
+    ("modules", "lesson_id", "lessons"),
+    ("enrollments", "lesson_id", "lessons"),
+    ("module_progress", "lesson_id", "lessons"),
+    ("module_progress", "module_id", "modules"),
+    ("assets", "module_id", "modules"),
+]
+
+
+def _refresh_function(skip_deleted: bool) -> str:
+    deleted_filter = " AND deleted_at IS NULL" if skip_deleted else ""
+    return f"""
+        CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+        BEGIN
+            -- Batch edits list title and content even when only the order changed
+            IF TG_OP = 'UPDATE'
+                AND NEW.title IS NOT DISTINCT FROM OLD.title
+                AND NEW.content IS NOT DISTINCT FROM OLD.content
+                AND NEW.lesson_id IS NOT DISTINCT FROM OLD.lesson_id THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(OLD.lesson_id)
+                WHERE id = OLD.lesson_id{deleted_filter};
+            END IF;
+            IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+                UPDATE lessons SET module_search_vector = lesson_module_search_vector(NEW.lesson_id)
+                WHERE id = NEW.lesson_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "lessons", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.create_index(
+        "ix_module_progress_module_id", "module_progress", ["module_id"], unique=False
+    )
+    for table, column, referred in CASCADING_FOREIGN_KEYS:
+        name = f"{table}_{column}_fkey"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(
+            name, table, referred, [column], ["id"], ondelete="CASCADE"
+        )
+    op.execute(_refresh_function(skip_deleted=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_refresh_function(skip_deleted=False))
+    for table, column, referred in reversed(CASCADING_FOREIGN_KEYS):
+        name = f"{table}_{column}_fkey"
+        op.drop_constraint(name, table, type_="foreignkey")
+        op.create_foreign_key(name, table, referred, [column], ["id"])
+    op.drop_index("ix_module_progress_module_id", table_name="module_progress")
+    op.drop_column("lessons", "deleted_at")
@@ -0,0 +1,68 @@
+"""Add module progress
+
+Revision ID: f3a8c5e1d204
+Revises: e7b2d4f9a1c6
+Create Date: 2026-10-19 18:41:27.905113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8c5e1d204"
+down_revision: Union[str, None] = "e7b2d4f9a1c6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "module_progress",
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("module_id", sa.Integer(), nullable=False),
+        sa.Column("lesson_id", sa.Integer(), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["lesson_id"],
+            ["lessons.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["module_id"],
+            ["modules.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["student_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("student_id", "module_id"),
+    )
+    op.create_index(
+        "ix_module_progress_student_lesson",
+        "module_progress",
+        ["student_id", "lesson_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_module_progress_student_lesson", table_name="module_progress")
+    op.drop_table("module_progress")
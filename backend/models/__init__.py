@@ -1,12 +1,23 @@
-from models.base import LessonStatus, UserRole
+from models.asset import Asset, AssetVariant
+from models.base import JobStatus, LessonStatus, UserRole
+from models.event import learning_events
+from models.job import Job
 from models.user import Enrollment, User
-from models.lesson import Lesson, Module
+from models.lesson import Lesson, LessonArchive, Module
+from models.progress import ModuleProgress
 
 __all__ = [
     "User",
     "UserRole",
     "Lesson",
     "LessonStatus",
+    "LessonArchive",
     "Module",
+    "ModuleProgress",
     "Enrollment",
+    "Job",
+    "JobStatus",
+    "learning_events",
+    "Asset",
+    "AssetVariant",
 ]
\ No newline at end of file
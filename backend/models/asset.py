@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, String, func
+from sqlmodel import Field, SQLModel
+
+
+class Asset(SQLModel, table=True):
+    """Asset DB model - An uploaded file, stored on disk by its SHA-256"""
+
+    __tablename__ = "assets"
+    __table_args__ = (
+        # Several assets may share one stored blob
+        Index("ix_assets_sha256", "sha256"),
+        Index("ix_assets_module_id", "module_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    sha256: str = Field(sa_column=Column(String(64), nullable=False))
+    size: int = Field(sa_column=Column(BigInteger, nullable=False))
+    content_type: str = Field(sa_column=Column(String(255), nullable=False))
+    filename: Optional[str] = Field(default=None, sa_column=Column(String(255)))
+    module_id: Optional[int] = Field(
+        default=None, foreign_key="modules.id", ondelete="CASCADE"
+    )
+    uploaded_by: Optional[int] = Field(default=None, foreign_key="users.id")
+
+    # Timestamps
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+
+
+class AssetVariant(SQLModel, table=True):
+    """Asset variant DB model - A downscaled copy of an image blob"""
+
+    __tablename__ = "asset_variants"
+
+    # Keyed by content, like the blob it was made from
+    sha256: str = Field(sa_column=Column(String(64), primary_key=True))
+    width: int = Field(primary_key=True)
+    height: int
+    size: int = Field(sa_column=Column(BigInteger, nullable=False))
+
+    # Timestamps
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
@@ -2,9 +2,16 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import DDL, Column, DateTime, event, func
 from sqlmodel import Field, SQLModel
 
+# Trigram indexes back typeahead lookups on users and lessons
+event.listen(
+    SQLModel.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -18,6 +25,13 @@ class LessonStatus(str, Enum):
     ARCHIVED = "archived"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class TimestampMixin(SQLModel):
     """Mixin with created and updated timestamps"""
 
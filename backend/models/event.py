@@ -0,0 +1,50 @@
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Table,
+    event,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import SQLModel
+
+# Learning analytics events, bulk loaded with COPY by core.events.
+#
+# Append-only and partitioned by day on occurred_at, so old days are dropped
+# whole instead of deleted row by row. It has no primary key or foreign keys
+# (nothing ever updates or joins into a single event), which is also why it
+# is a plain table rather than an ORM model. Daily partitions are created
+# ahead of time by the flusher; anything outside them lands in the default
+# partition.
+learning_events = Table(
+    "learning_events",
+    SQLModel.metadata,
+    Column("occurred_at", DateTime(timezone=True), nullable=False),
+    Column(
+        "received_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    Column("user_id", Integer, nullable=False),
+    Column("lesson_id", Integer),
+    Column("module_id", Integer),
+    Column("event_type", String(32), nullable=False),
+    Column("dwell_ms", Integer),
+    Column("data", JSONB),
+    Index("ix_learning_events_lesson_occurred", "lesson_id", "occurred_at"),
+    postgresql_partition_by="RANGE (occurred_at)",
+)
+
+event.listen(
+    learning_events,
+    "after_create",
+    DDL(
+        "CREATE TABLE IF NOT EXISTS learning_events_default "
+        "PARTITION OF learning_events DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
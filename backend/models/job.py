@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, DateTime, Index, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+from models.base import JobStatus
+
+
+class Job(SQLModel, table=True):
+    """Background job DB model - run by `manage.py worker`"""
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers only ever scan for due queued jobs
+        Index(
+            "ix_jobs_queued_run_at",
+            "run_at",
+            "id",
+            postgresql_where=text("status = 'QUEUED'"),
+        ),
+        # Reclaiming jobs from crashed workers
+        Index(
+            "ix_jobs_running_locked_at",
+            "locked_at",
+            postgresql_where=text("status = 'RUNNING'"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(sa_column=Column(String(100), nullable=False))
+    payload: Dict[str, Any] = Field(
+        default_factory=dict, sa_column=Column(JSONB, nullable=False)
+    )
+    status: JobStatus = Field(default=JobStatus.QUEUED)
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text))
+    locked_by: Optional[str] = Field(default=None, sa_column=Column(String(255)))
+
+    # Timestamps
+    run_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+    locked_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    finished_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            onupdate=func.now(),
+            nullable=False,
+        )
+    )
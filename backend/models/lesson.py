@@ -1,7 +1,19 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, DateTime, String, Text, func
+from sqlalchemy import (
+    DDL,
+    Column,
+    Computed,
+    DateTime,
+    Index,
+    LargeBinary,
+    String,
+    Text,
+    event,
+    func,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import Field, Relationship, SQLModel
 
 from models.base import LessonStatus
@@ -12,6 +24,16 @@ class Lesson(SQLModel, table=True):
     """Lesson DB model"""
 
     __tablename__ = "lessons"
+    __table_args__ = (
+        # Typeahead lookups by title
+        Index(
+            "ix_lessons_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index("ix_lessons_teacher_id", "teacher_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(sa_column=Column(String(255), index=True, nullable=False))
@@ -19,6 +41,15 @@ class Lesson(SQLModel, table=True):
     status: LessonStatus = Field(default=LessonStatus.DRAFT)
     content: Optional[str] = Field(sa_column=Column(Text))
     teacher_id: Optional[int] = Field(default=None, foreign_key="users.id")
+    # Set when the lesson is deleted; its rows are purged in the background
+    deleted_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+    # Set while the content of the lesson and its modules is in cold storage
+    # (LessonArchive); the row is a stub until the lesson is accessed again
+    archived_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
 
     # Timestamps
     created_at: datetime = Field(
@@ -42,20 +73,31 @@ class Lesson(SQLModel, table=True):
         back_populates="lessons",
         sa_relationship_kwargs={"foreign_keys": "[Lesson.teacher_id]"},
     )
-    students: List[Enrollment] = Relationship(back_populates="lesson")
-    modules: List["Module"] = Relationship(back_populates="lesson")
+    # Children are deleted by ON DELETE CASCADE, never loaded to be deleted
+    students: List[Enrollment] = Relationship(
+        back_populates="lesson", sa_relationship_kwargs={"passive_deletes": True}
+    )
+    modules: List["Module"] = Relationship(
+        back_populates="lesson", sa_relationship_kwargs={"passive_deletes": True}
+    )
 
 
 class Module(SQLModel, table=True):
     """Module DB model - A section of a lesson"""
 
     __tablename__ = "modules"
+    __table_args__ = (
+        # Modules are always listed per lesson, in order
+        Index("ix_modules_lesson_order", "lesson_id", "order"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(sa_column=Column(String(255), nullable=False))
     order: int = Field(default=0)  # Order within the lesson
     content: Optional[str] = Field(sa_column=Column(Text))
-    lesson_id: Optional[int] = Field(default=None, foreign_key="lessons.id")
+    lesson_id: Optional[int] = Field(
+        default=None, foreign_key="lessons.id", ondelete="CASCADE"
+    )
 
     # Timestamps
     created_at: datetime = Field(
@@ -76,3 +118,139 @@ class Module(SQLModel, table=True):
 
     # Relationships
     lesson: Optional[Lesson] = Relationship(back_populates="modules")
+
+
+class LessonArchive(SQLModel, table=True):
+    """Cold storage for the content of an archived lesson and its modules"""
+
+    __tablename__ = "lesson_archives"
+
+    lesson_id: int = Field(
+        foreign_key="lessons.id", ondelete="CASCADE", primary_key=True
+    )
+    # zlib-compressed JSON: {"content": ..., "modules": {"<id>": ...}}
+    payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    # UTF-8 size of the text taken out of lessons and modules
+    original_bytes: int
+    archived_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+
+
+# The payload is compressed already; keep TOAST from trying again
+event.listen(
+    LessonArchive.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE lesson_archives ALTER COLUMN payload SET STORAGE EXTERNAL"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+# Full-text search
+#
+# A generated column cannot read other tables, so the text of a lesson's
+# modules is aggregated into module_search_vector by a trigger on modules
+# and folded into the generated search_vector with the lesson's own fields.
+# Neither column is mapped on Lesson, so loading lessons never ships them.
+SEARCH_CONFIG = "english"
+
+Lesson.__table__.append_column(Column("module_search_vector", TSVECTOR))
+Lesson.__table__.append_column(
+    Column(
+        "search_vector",
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')"
+            f" || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+            f" || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'C')"
+            " || coalesce(module_search_vector, ''::tsvector)",
+            persisted=True,
+        ),
+    )
+)
+Index(
+    "ix_lessons_search_vector",
+    Lesson.__table__.c.search_vector,
+    postgresql_using="gin",
+)
+
+MODULE_SEARCH_VECTOR_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION lesson_module_search_vector(target_lesson_id integer)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(string_agg(title, ' '), '')), 'B')
+        || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(string_agg(content, ' '), '')), 'D')
+    FROM modules
+    WHERE lesson_id = target_lesson_id
+$$ LANGUAGE sql STABLE
+"""
+
+# Statement-level, so a batch touching K modules of a lesson refreshes the
+# lesson once instead of K times; the transition tables hold the changed rows
+MODULE_SEARCH_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION refresh_lesson_module_search() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+        WHERE id IN (SELECT lesson_id FROM new_modules);
+    ELSIF TG_OP = 'DELETE' THEN
+        -- A deleted lesson being purged is not searchable; skip the refresh
+        UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+        WHERE id IN (SELECT lesson_id FROM old_modules) AND deleted_at IS NULL;
+    ELSE
+        -- Batch edits list title and content even when only the order changed
+        WITH changed AS (
+            SELECT old_modules.lesson_id AS old_lesson_id,
+                   new_modules.lesson_id AS new_lesson_id
+            FROM old_modules JOIN new_modules USING (id)
+            WHERE new_modules.title IS DISTINCT FROM old_modules.title
+                OR new_modules.content IS DISTINCT FROM old_modules.content
+                OR new_modules.lesson_id IS DISTINCT FROM old_modules.lesson_id
+        )
+        UPDATE lessons SET module_search_vector = lesson_module_search_vector(id)
+        WHERE (id IN (SELECT old_lesson_id FROM changed) AND deleted_at IS NULL)
+            OR id IN (
+                SELECT new_lesson_id FROM changed
+                WHERE new_lesson_id IS DISTINCT FROM old_lesson_id
+            );
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# Triggers with transition tables take a single event and no column list, so
+# each event gets its own trigger and reorders are filtered out in the join
+MODULE_SEARCH_TRIGGERS = [
+    """
+CREATE TRIGGER modules_refresh_lesson_search_insert
+AFTER INSERT ON modules REFERENCING NEW TABLE AS new_modules
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_lesson_module_search()
+""",
+    """
+CREATE TRIGGER modules_refresh_lesson_search_update
+AFTER UPDATE ON modules REFERENCING OLD TABLE AS old_modules NEW TABLE AS new_modules
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_lesson_module_search()
+""",
+    """
+CREATE TRIGGER modules_refresh_lesson_search_delete
+AFTER DELETE ON modules REFERENCING OLD TABLE AS old_modules
+FOR EACH STATEMENT EXECUTE FUNCTION refresh_lesson_module_search()
+""",
+]
+
+# asyncpg runs one statement per execute, so each gets its own DDL
+for ddl in (
+    MODULE_SEARCH_VECTOR_FUNCTION,
+    MODULE_SEARCH_TRIGGER_FUNCTION,
+    *MODULE_SEARCH_TRIGGERS,
+):
+    event.listen(
+        Module.__table__,
+        "after_create",
+        DDL(ddl).execute_if(dialect="postgresql"),
+    )
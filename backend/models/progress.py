@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, Index, func
+from sqlmodel import Field, SQLModel
+
+
+class ModuleProgress(SQLModel, table=True):
+    """Module progress DB model - How far a student got through a module"""
+
+    __tablename__ = "module_progress"
+    __table_args__ = (
+        # Progress is always read per student and lesson
+        Index("ix_module_progress_student_lesson", "student_id", "lesson_id"),
+        # Latest activity per lesson (the teacher dashboard)
+        Index("ix_module_progress_lesson_updated", "lesson_id", "updated_at"),
+        # Deleting a module cascades by module_id, which the key doesn't lead
+        Index("ix_module_progress_module_id", "module_id"),
+    )
+
+    student_id: int = Field(foreign_key="users.id", primary_key=True)
+    module_id: int = Field(
+        foreign_key="modules.id", primary_key=True, ondelete="CASCADE"
+    )
+    lesson_id: int = Field(foreign_key="lessons.id", ondelete="CASCADE")
+    # Percentage of the module seen, never decreases
+    progress: int = Field(default=0)
+    completed_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True))
+    )
+
+    # Timestamps
+    created_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            onupdate=func.now(),
+            nullable=False,
+        )
+    )
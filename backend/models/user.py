@@ -1,11 +1,25 @@
 from datetime import datetime
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import Column, DateTime, String, UniqueConstraint, func
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    Index,
+    String,
+    UniqueConstraint,
+    event,
+    func,
+    literal_column,
+    text,
+)
 from sqlmodel import Field, Relationship, SQLModel
 
 from models.base import UserRole
 
+# Same expression as ix_users_full_name_trgm, so lookups can use the index
+USER_FULL_NAME = literal_column("(users.first_name || ' ' || users.last_name)")
+
 # Handle forward references for type checking
 if TYPE_CHECKING:
     from models.lesson import Lesson
@@ -16,6 +30,27 @@ class User(SQLModel, table=True):
     """User DB model"""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Serves the token revocation refresh, which only cares about users
+        # whose tokens have been revoked at least once
+        Index(
+            "ix_users_revoked_updated_at",
+            "updated_at",
+            postgresql_where=text("token_version > 0"),
+        ),
+        # Typeahead lookups by email and full name (see USER_FULL_NAME)
+        Index(
+            "ix_users_email_trgm",
+            "email",
+            postgresql_using="gin",
+            postgresql_ops={"email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_users_full_name_trgm",
+            text("(first_name || ' ' || last_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     email: str = Field(
@@ -26,6 +61,8 @@ class User(SQLModel, table=True):
     is_active: bool = True
     role: UserRole = Field(default=UserRole.STUDENT)
     hashed_password: str
+    # Bumped to revoke every token issued to the user
+    token_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     # Timestamps
     created_at: datetime = Field(
@@ -55,6 +92,10 @@ class User(SQLModel, table=True):
         from_attributes = True
 
 
+# Hash partitions of enrollments; changing it needs a migration
+ENROLLMENT_PARTITIONS = 16
+
+
 # Junction table for many-to-many relationship between User and Lesson
 class Enrollment(SQLModel, table=True):
     """Enrollment model - Student enrolled in a Lesson"""
@@ -62,11 +103,21 @@ class Enrollment(SQLModel, table=True):
     __tablename__ = "enrollments"
     __table_args__ = (
         UniqueConstraint("student_id", "lesson_id", name="unique_enrollment"),
+        # Per-lesson enrollment counts by status (the teacher dashboard)
+        Index("ix_enrollments_lesson_status", "lesson_id", "status"),
+        # Partitioned by lesson: a query that names the lesson reads one
+        # partition, and each partition is vacuumed on its own
+        {"postgresql_partition_by": "HASH (lesson_id)"},
     )
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # Keys of a partitioned table must include the partition key
+    id: Optional[int] = Field(
+        default=None, primary_key=True, sa_column_kwargs={"autoincrement": True}
+    )
     student_id: Optional[int] = Field(foreign_key="users.id")
-    lesson_id: Optional[int] = Field(foreign_key="lessons.id")
+    lesson_id: int = Field(
+        foreign_key="lessons.id", ondelete="CASCADE", primary_key=True
+    )
 
     # Status of enrollment (active, completed, etc.)
     status: str = "active"
@@ -91,3 +142,15 @@ class Enrollment(SQLModel, table=True):
     # Relationships - Use strings for forward references
     student: Optional[User] = Relationship(back_populates="enrolled_lessons")
     lesson: Optional["Lesson"] = Relationship(back_populates="students")
+
+
+for remainder in range(ENROLLMENT_PARTITIONS):
+    event.listen(
+        Enrollment.__table__,
+        "after_create",
+        DDL(
+            f"CREATE TABLE enrollments_p{remainder} PARTITION OF enrollments "
+            f"FOR VALUES WITH (MODULUS {ENROLLMENT_PARTITIONS}, "
+            f"REMAINDER {remainder})"
+        ).execute_if(dialect="postgresql"),
+    )
@@ -1,15 +1,44 @@
-from schemas.auth import Login, PasswordReset, PasswordUpdate, Token, TokenPayload
+from schemas.admin import SlowQueryResponse
+from schemas.asset import AssetResponse, AssetVariantResponse
+from schemas.auth import (
+    AuthUser,
+    Login,
+    PasswordReset,
+    PasswordUpdate,
+    RefreshRequest,
+    Token,
+    TokenPayload,
+)
+from schemas.batch import (
+    BatchRequest,
+    BatchRequestItem,
+    BatchResponse,
+    BatchResponseItem,
+)
+from schemas.event import EventBatch, EventBatchResponse, EventIn
 from schemas.lesson import (
     EnrollmentCreate,
     EnrollmentResponse,
     EnrollmentUpdate,
+    LearningItem,
+    LearningPage,
     LessonCreate,
+    LessonDashboardItem,
     LessonDetailResponse,
     LessonResponse,
+    LessonSearchResult,
+    LessonSuggestion,
+    LessonSummary,
     LessonUpdate,
+    ModuleBatch,
+    ModuleBatchItem,
     ModuleCreate,
+    ModuleOrder,
+    ModuleProgressResponse,
+    ModuleProgressUpdate,
     ModuleResponse,
     ModuleUpdate,
+    ModuleWithAssetsResponse,
 )
 from schemas.user import (
     CurrentUser,
@@ -17,6 +46,7 @@ from schemas.user import (
     UserCreate,
     UserDetailResponse,
     UserResponse,
+    UserSuggestion,
     UserUpdate,
 )
 
@@ -26,20 +56,45 @@ __all__ = [
     "UserUpdate",
     "UserResponse",
     "UserDetailResponse",
+    "UserSuggestion",
     "CurrentUser",
     "LessonCreate",
     "LessonUpdate",
     "LessonResponse",
+    "LessonDashboardItem",
     "LessonDetailResponse",
+    "LessonSearchResult",
+    "LessonSuggestion",
+    "LessonSummary",
     "ModuleCreate",
     "ModuleUpdate",
+    "ModuleBatchItem",
+    "ModuleBatch",
+    "ModuleOrder",
     "ModuleResponse",
+    "ModuleWithAssetsResponse",
+    "ModuleProgressUpdate",
+    "ModuleProgressResponse",
     "EnrollmentCreate",
     "EnrollmentUpdate",
     "EnrollmentResponse",
+    "LearningItem",
+    "LearningPage",
     "Token",
     "TokenPayload",
+    "RefreshRequest",
+    "AuthUser",
     "Login",
     "PasswordReset",
     "PasswordUpdate",
+    "SlowQueryResponse",
+    "EventIn",
+    "EventBatch",
+    "EventBatchResponse",
+    "BatchRequestItem",
+    "BatchRequest",
+    "BatchResponseItem",
+    "BatchResponse",
+    "AssetResponse",
+    "AssetVariantResponse",
 ]
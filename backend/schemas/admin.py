@@ -0,0 +1,16 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class SlowQueryResponse(BaseModel):
+    """Slow query log entry"""
+
+    id: int
+    statement: str
+    parameters: str
+    route: Optional[str] = None
+    duration_ms: float
+    executed_at: datetime
+    plan: Optional[str] = None
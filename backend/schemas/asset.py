@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class AssetVariantResponse(BaseModel):
+    width: int
+    height: int
+    size: int
+    url: str
+
+
+class AssetResponse(BaseModel):
+    id: int
+    sha256: str
+    size: int
+    content_type: str
+    filename: Optional[str] = None
+    module_id: Optional[int] = None
+    uploaded_by: Optional[int] = None
+    created_at: datetime
+    # Download URL; the same for every upload of the same content
+    url: str
+    # Downscaled WebP copies of images, narrowest first; made shortly after
+    # upload, so empty at first
+    variants: List[AssetVariantResponse] = []
+    srcset: Optional[str] = None
@@ -2,17 +2,38 @@ from typing import Optional
 
 from pydantic import BaseModel, EmailStr
 
+from models.base import UserRole
+
 
 class Token(BaseModel):
     """JWT token schema"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
 
 
 class TokenPayload(BaseModel):
     """JWT token payload schema"""
     sub: Optional[str] = None
     exp: Optional[int] = None
+    type: Optional[str] = None
+    role: Optional[UserRole] = None
+    active: Optional[bool] = None
+    ver: int = 0
+
+
+class RefreshRequest(BaseModel):
+    """Refresh token exchange request schema"""
+    refresh_token: str
+
+
+class AuthUser(BaseModel):
+    """Authenticated user identity taken from access token claims"""
+    id: int
+    role: UserRole
+    is_active: bool
+    token_version: int = 0
 
 
 class Login(BaseModel):
@@ -0,0 +1,29 @@
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class BatchRequestItem(BaseModel):
+    """One API call inside a batch"""
+
+    # Echoed back so clients can match responses to requests
+    id: Optional[str] = Field(default=None, max_length=64)
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    # Full API path with optional query string, e.g. /api/v1/lessons/3
+    path: str = Field(min_length=1, max_length=2048, pattern=r"^/")
+    body: Optional[Any] = None
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(min_length=1)
+
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -0,0 +1,33 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from core.config import settings
+
+# Largest value of a Postgres integer column
+INT_MAX = 2**31 - 1
+
+
+class EventIn(BaseModel):
+    """Learning analytics event reported by a lesson page"""
+
+    type: str = Field(min_length=1, max_length=32, pattern=r"^[a-z0-9_.]+$")
+    lesson_id: Optional[int] = Field(default=None, ge=1, le=INT_MAX)
+    module_id: Optional[int] = Field(default=None, ge=1, le=INT_MAX)
+    # Client time, UTC unless it has an offset; events without one are stamped
+    # when received
+    occurred_at: Optional[datetime] = None
+    dwell_ms: Optional[int] = Field(default=None, ge=0, le=INT_MAX)
+    data: Optional[Dict[str, Any]] = None
+
+
+class EventBatch(BaseModel):
+    # Enforced while parsing: an oversized batch is refused with a 422 as soon
+    # as its first extra event is reached, without validating the rest
+    events: List[EventIn] = Field(min_length=1, max_length=settings.EVENTS_MAX_BATCH)
+
+
+class EventBatchResponse(BaseModel):
+    accepted: int
+    dropped: int
@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 from models.lesson import LessonStatus
+from schemas.asset import AssetResponse
 from schemas.user import UserResponse
 
 
@@ -24,6 +25,29 @@ class ModuleUpdate(BaseModel):
     content: Optional[str] = None
 
 
+class ModuleBatchItem(BaseModel):
+    # Omit to create a module; title is then required
+    id: Optional[int] = None
+    title: Optional[str] = None
+    order: Optional[int] = None
+    content: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_title(self) -> "ModuleBatchItem":
+        if self.id is None and not self.title:
+            raise ValueError("title is required for new modules")
+        return self
+
+
+class ModuleBatch(BaseModel):
+    modules: List[ModuleBatchItem] = Field(min_length=1, max_length=500)
+
+
+class ModuleOrder(BaseModel):
+    # Every module of the lesson, in the new order
+    module_ids: List[int] = Field(min_length=1, max_length=500)
+
+
 class ModuleResponse(ModuleBase):
     id: int
     lesson_id: int
@@ -31,6 +55,24 @@ class ModuleResponse(ModuleBase):
     updated_at: datetime
 
 
+class ModuleWithAssetsResponse(ModuleResponse):
+    assets: List[AssetResponse] = []
+
+
+# Progress schemas
+class ModuleProgressUpdate(BaseModel):
+    progress: int = Field(default=0, ge=0, le=100)
+    completed: bool = False
+
+
+class ModuleProgressResponse(BaseModel):
+    module_id: int
+    lesson_id: int
+    progress: int
+    completed_at: Optional[datetime] = None
+    updated_at: datetime
+
+
 # Lesson schemas
 class LessonBase(BaseModel):
     title: str
@@ -57,6 +99,28 @@ class LessonResponse(LessonBase):
     updated_at: datetime
 
 
+class LessonSearchResult(LessonResponse):
+    rank: float
+    title_highlight: str
+    snippet: Optional[str] = None
+
+
+class LessonSuggestion(BaseModel):
+    id: int
+    title: str
+    status: LessonStatus
+
+
+class LessonDashboardItem(LessonResponse):
+    student_count: int = 0
+    enrollments_by_status: Dict[str, int] = {}
+    module_count: int = 0
+    last_enrolled_at: Optional[datetime] = None
+    modules_updated_at: Optional[datetime] = None
+    # Latest module progress reported by any student
+    last_activity_at: Optional[datetime] = None
+
+
 class LessonDetailResponse(LessonResponse):
     teacher: Optional[UserResponse] = None
     modules: List[ModuleResponse] = []
@@ -72,6 +136,33 @@ class EnrollmentUpdate(BaseModel):
     status: str
 
 
+class LessonSummary(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    status: LessonStatus
+    teacher_id: Optional[int] = None
+    updated_at: datetime
+
+
+class LearningItem(BaseModel):
+    enrollment_id: int
+    status: str
+    enrolled_at: datetime
+    lesson: LessonSummary
+    module_count: int = 0
+    completed_modules: int = 0
+    # Completed modules over all modules, from 0 to 1
+    completion: float = 0.0
+    last_activity_at: Optional[datetime] = None
+
+
+class LearningPage(BaseModel):
+    items: List[LearningItem]
+    # Pass as `before` to get the next page; None on the last page
+    next_cursor: Optional[int] = None
+
+
 class EnrollmentResponse(BaseModel):
     id: int
     student_id: int
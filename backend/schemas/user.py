@@ -37,6 +37,15 @@ class UserResponse(UserBase):
     updated_at: datetime
 
 
+# Typeahead match for admin user pickers
+class UserSuggestion(BaseModel):
+    id: int
+    email: str
+    first_name: str
+    last_name: str
+    role: UserRole
+
+
 # User with additional info for admin views
 class UserDetailResponse(UserResponse):
     pass
@@ -0,0 +1,486 @@
+#!/usr/bin/env python
+"""
+Fill a database with a synthetic district for benchmarking
+
+    python manage.py db seed --users 50000 --lessons 5000 \
+        --modules-per-lesson 12 --enrollments 1000000
+
+Rows are generated in batches by a pool of processes and loaded with COPY
+over one connection per process, table by table so foreign keys always
+point at rows that exist. Each batch is a pure function of the seed, the
+table and the batch number, so the same arguments produce the same rows in
+any order and with any number of jobs.
+
+The data is shaped like a real district rather than uniform noise: one user
+in TEACHER_EVERY teaches, a few teachers own most lessons, lesson popularity
+follows a Zipf distribution, and lesson and module content is long text of
+log-normally distributed length. Ids continue after the rows already in the
+database, so seeding twice adds a second district next to the first.
+
+The module search insert trigger is disabled while modules load and the search
+vectors of the new lessons are rebuilt once at the end; run it against a
+database nobody else is writing to.
+"""
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+SEED_DOMAIN = "seed.edu-fi.local"
+SEED_PASSWORD = "seed-password"
+# Every user whose index is a multiple of this is a teacher
+TEACHER_EVERY = 20
+# Zipf exponents for lessons per teacher and enrollments per lesson
+TEACHER_SKEW = 1.2
+POPULARITY_SKEW = 0.9
+# Timestamps are spread over the school year before this date, so the same
+# seed gives the same rows whenever it runs
+EPOCH = datetime(2026, 9, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 365
+
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "users": (
+        "id",
+        "email",
+        "first_name",
+        "last_name",
+        "is_active",
+        "role",
+        "hashed_password",
+        "token_version",
+        "created_at",
+        "updated_at",
+    ),
+    "lessons": (
+        "id",
+        "title",
+        "description",
+        "status",
+        "content",
+        "teacher_id",
+        "created_at",
+        "updated_at",
+    ),
+    "modules": (
+        "id",
+        "title",
+        "order",
+        "content",
+        "lesson_id",
+        "created_at",
+        "updated_at",
+    ),
+    "enrollments": (
+        "id",
+        "student_id",
+        "lesson_id",
+        "status",
+        "created_at",
+        "updated_at",
+    ),
+}
+
+FIRST_NAMES = (
+    "Aino Eino Emma Elias Helmi Ilmari Iida Juho Kaisa Leevi Lumi Mikael Nea "
+    "Onni Pihla Rasmus Sofia Tuomas Venla Veeti Aada Eetu Ella Oliver Siiri"
+).split()
+LAST_NAMES = (
+    "Korhonen Virtanen Mäkinen Nieminen Mäkelä Hämäläinen Laine Heikkinen "
+    "Koskinen Järvinen Lehtonen Lehtinen Saarinen Salminen Heinonen Niemi "
+    "Heikkilä Kinnunen"
+).split()
+SUBJECTS = (
+    "Algebra Biology Chemistry Geography History Literature Music Physics "
+    "Programming Statistics Finnish English"
+).split()
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam "
+    "quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo "
+    "consequat duis aute irure in reprehenderit voluptate velit esse cillum "
+    "fugiat nulla pariatur excepteur sint occaecat cupidatat non proident sunt "
+    "culpa qui officia deserunt mollit anim id est laborum"
+).split()
+# Emails stay ASCII whatever the names
+ASCII = str.maketrans("äö", "ao")
+# Distinct paragraphs content is assembled from
+PARAGRAPHS = 512
+
+Record = Tuple
+
+
+@dataclass(frozen=True)
+class Plan:
+    """What to generate, and the ids to number it from"""
+
+    seed: int
+    users: int
+    lessons: int
+    modules_per_lesson: int
+    enrollments: int
+    batch_size: int
+    hashed_password: str
+    # Largest id already in each table
+    user_base: int = 0
+    lesson_base: int = 0
+    module_base: int = 0
+    enrollment_base: int = 0
+
+    @property
+    def teachers(self) -> int:
+        return -(-self.users // TEACHER_EVERY)
+
+    @property
+    def students(self) -> int:
+        return self.users - self.teachers
+
+    def rows(self, table: str) -> int:
+        return {
+            "users": self.users,
+            "lessons": self.lessons,
+            "modules": self.lessons * self.modules_per_lesson,
+            "enrollments": self.enrollments,
+        }[table]
+
+    def batches(self, table: str) -> int:
+        if table == "enrollments":
+            # Enrollments are batched by student, so no two batches can
+            # produce the same (student, lesson) pair
+            return -(-self.students // self.students_per_batch)
+        return -(-self.rows(table) // self.batch_size)
+
+    @property
+    def students_per_batch(self) -> int:
+        per_student = max(self.enrollments / max(self.students, 1), 1)
+        return max(int(self.batch_size / per_student), 1)
+
+
+def _rng(plan: Plan, *key) -> random.Random:
+    return random.Random(":".join(map(str, (plan.seed, *key))))
+
+
+def _timestamp(rng: random.Random, after: datetime = None) -> datetime:
+    start = after or EPOCH - timedelta(days=HISTORY_DAYS)
+    return start + (EPOCH - start) * rng.random()
+
+
+@lru_cache(maxsize=None)
+def _paragraphs(seed: int) -> Tuple[str, ...]:
+    rng = random.Random(f"{seed}:paragraphs")
+    paragraphs = []
+    for _ in range(PARAGRAPHS):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(WORDS, k=rng.randint(6, 18))
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraphs.append(" ".join(sentences))
+    return tuple(paragraphs)
+
+
+def _content(plan: Plan, rng: random.Random, mu: float) -> str:
+    """Long text of log-normally distributed length (median e**mu paragraphs)"""
+    count = min(max(int(rng.lognormvariate(mu, 0.8)), 1), 200)
+    return "\n\n".join(rng.choices(_paragraphs(plan.seed), k=count))
+
+
+@lru_cache(maxsize=None)
+def _zipf(count: int, skew: float) -> Tuple[float, ...]:
+    """Cumulative weights of ranks 1..count under a Zipf distribution"""
+    total = 0.0
+    weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank**skew
+        weights.append(total)
+    return tuple(weights)
+
+
+@lru_cache(maxsize=None)
+def _popularity(plan: Plan) -> Tuple[int, ...]:
+    """Lesson ids from most to least popular"""
+    ids = list(range(plan.lesson_base + 1, plan.lesson_base + plan.lessons + 1))
+    _rng(plan, "popularity").shuffle(ids)
+    return tuple(ids)
+
+
+def _teacher_id(plan: Plan, index: int) -> int:
+    return plan.user_base + 1 + index * TEACHER_EVERY
+
+
+def _users(plan: Plan, start: int, stop: int, rng: random.Random) -> List[Record]:
+    records = []
+    for index in range(start, stop):
+        id = plan.user_base + 1 + index
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        role = "TEACHER" if index % TEACHER_EVERY == 0 else "STUDENT"
+        email = f"{first_name}.{last_name}.{id}@{SEED_DOMAIN}".lower().translate(ASCII)
+        created_at = _timestamp(rng)
+        records.append(
+            (
+                id,
+                email,
+                first_name,
+                last_name,
+                True,
+                role,
+                plan.hashed_password,
+                0,
+                created_at,
+                created_at,
+            )
+        )
+    return records
+
+
+def _lessons(plan: Plan, start: int, stop: int, rng: random.Random) -> List[Record]:
+    teachers = _zipf(plan.teachers, TEACHER_SKEW)
+    records = []
+    for index in range(start, stop):
+        subject = rng.choice(SUBJECTS)
+        teacher = rng.choices(range(plan.teachers), cum_weights=teachers)[0]
+        status = rng.choices(("PUBLISHED", "DRAFT", "ARCHIVED"), (80, 12, 8))[0]
+        created_at = _timestamp(rng)
+        records.append(
+            (
+                plan.lesson_base + 1 + index,
+                f"{subject} {index + 1}: {' '.join(rng.choices(WORDS, k=3))}",
+                rng.choice(_paragraphs(plan.seed)),
+                status,
+                _content(plan, rng, 2.0),
+                _teacher_id(plan, teacher),
+                created_at,
+                _timestamp(rng, created_at),
+            )
+        )
+    return records
+
+
+def _modules(plan: Plan, start: int, stop: int, rng: random.Random) -> List[Record]:
+    records = []
+    for index in range(start, stop):
+        lesson, order = divmod(index, plan.modules_per_lesson)
+        created_at = _timestamp(rng)
+        records.append(
+            (
+                plan.module_base + 1 + index,
+                f"Module {order + 1}: {' '.join(rng.choices(WORDS, k=3))}",
+                order,
+                _content(plan, rng, 1.5),
+                plan.lesson_base + 1 + lesson,
+                created_at,
+                created_at,
+            )
+        )
+    return records
+
+
+def _enrollments(plan: Plan, batch: int, rng: random.Random) -> List[Record]:
+    """
+    Enrollments of one range of students, spread over the lessons by
+    popularity
+
+    The batch's share of the total is drawn as distinct (student, lesson)
+    pairs, so a popular lesson still gets each student at most once. Ids
+    are numbered from the batch's own range, which keeps them the same
+    however the batches are scheduled.
+    """
+    first = batch * plan.students_per_batch
+    last = min(first + plan.students_per_batch, plan.students)
+    # Batches split the total at student boundaries, so the shares add up
+    start = plan.enrollments * first // plan.students
+    share = min(
+        plan.enrollments * last // plan.students - start,
+        (last - first) * plan.lessons,
+    )
+
+    lessons = _popularity(plan)
+    weights = _zipf(plan.lessons, POPULARITY_SKEW)
+    pairs = set()
+    while len(pairs) < share:
+        for lesson in rng.choices(lessons, cum_weights=weights, k=share - len(pairs)):
+            student = rng.randrange(first, last)
+            pairs.add((student, lesson))
+
+    records = []
+    for offset, (student, lesson) in enumerate(sorted(pairs)):
+        # Students are every user that is not a teacher, in order
+        index = student + student // (TEACHER_EVERY - 1) + 1
+        created_at = _timestamp(rng)
+        status = "completed" if rng.random() < 0.2 else "active"
+        records.append(
+            (
+                plan.enrollment_base + 1 + start + offset,
+                plan.user_base + 1 + index,
+                lesson,
+                status,
+                created_at,
+                _timestamp(rng, created_at),
+            )
+        )
+    return records
+
+
+def generate(plan: Plan, table: str, batch: int) -> List[Record]:
+    """COPY records of one batch of a table, in COLUMNS order"""
+    rng = _rng(plan, table, batch)
+    if table == "enrollments":
+        return _enrollments(plan, batch, rng)
+    start = batch * plan.batch_size
+    stop = min(start + plan.batch_size, plan.rows(table))
+    return {"users": _users, "lessons": _lessons, "modules": _modules}[table](
+        plan, start, stop, rng
+    )
+
+
+async def _load(plan: Plan, table: str, jobs: int, pool: ProcessPoolExecutor) -> int:
+    """Generate and COPY every batch of a table, `jobs` batches at a time"""
+    from core.db import connect_dedicated
+
+    loop = asyncio.get_running_loop()
+    batches = iter(range(plan.batches(table)))
+    loaded = 0
+
+    async def copy_batches() -> None:
+        nonlocal loaded
+        conn = await connect_dedicated("seed", synchronous_commit="off")
+        try:
+            for batch in batches:
+                records = await loop.run_in_executor(pool, generate, plan, table, batch)
+                await conn.copy_records_to_table(
+                    table, records=records, columns=COLUMNS[table]
+                )
+                loaded += len(records)
+        finally:
+            await conn.close()
+
+    await asyncio.gather(*(copy_batches() for _ in range(jobs)))
+    return loaded
+
+
+async def seed(plan: Plan, jobs: int) -> None:
+    from core.db import connect_dedicated
+
+    conn = await connect_dedicated("seed")
+    try:
+        bases = {}
+        for table in COLUMNS:
+            bases[table] = await conn.fetchval(
+                f"SELECT coalesce(max(id), 0) FROM {table}"
+            )
+        plan = replace(
+            plan,
+            user_base=bases["users"],
+            lesson_base=bases["lessons"],
+            module_base=bases["modules"],
+            enrollment_base=bases["enrollments"],
+        )
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            for table in COLUMNS:
+                table_started = time.perf_counter()
+                if table == "modules":
+                    await conn.execute(
+                        "ALTER TABLE modules DISABLE TRIGGER "
+                        "modules_refresh_lesson_search_insert"
+                    )
+                try:
+                    rows = await _load(plan, table, jobs, pool)
+                finally:
+                    if table == "modules":
+                        await conn.execute(
+                            "ALTER TABLE modules ENABLE TRIGGER "
+                            "modules_refresh_lesson_search_insert"
+                        )
+                elapsed = time.perf_counter() - table_started
+                print(
+                    f"{table:<12} {rows:>10} rows in {elapsed:6.1f}s "
+                    f"({rows / max(elapsed, 1e-9):,.0f} rows/s)"
+                )
+
+        await conn.execute(
+            "UPDATE lessons SET module_search_vector = "
+            "lesson_module_search_vector(id) WHERE id > $1",
+            plan.lesson_base,
+        )
+        # Ids were assigned here, so move the sequences past them
+        for table in COLUMNS:
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT max(id) FROM {table}))"
+            )
+        await conn.execute(f"ANALYZE {', '.join(COLUMNS)}")
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=20_000, help="Users to create")
+    parser.add_argument("--lessons", type=int, default=2_000, help="Lessons to create")
+    parser.add_argument(
+        "--modules-per-lesson", type=int, default=10, help="Modules of each lesson"
+    )
+    parser.add_argument(
+        "--enrollments", type=int, default=200_000, help="Enrollments to create"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed (same seed, same data)"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Batches generated and copied at once (default: CPU count)",
+    )
+    parser.add_argument("--batch-size", type=int, default=20_000, help="Rows per COPY")
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.users < TEACHER_EVERY or args.lessons < 1:
+        print(f"Seed at least {TEACHER_EVERY} users and one lesson")
+        return 2
+    students = args.users - math.ceil(args.users / TEACHER_EVERY)
+    if args.enrollments > students * args.lessons:
+        print(f"At most {students * args.lessons} enrollments fit")
+        return 2
+
+    from core.security import get_password_hash
+
+    plan = Plan(
+        seed=args.seed,
+        users=args.users,
+        lessons=args.lessons,
+        modules_per_lesson=args.modules_per_lesson,
+        enrollments=args.enrollments,
+        batch_size=args.batch_size,
+        # One bcrypt hash shared by every seeded account keeps seeding fast
+        hashed_password=get_password_hash(SEED_PASSWORD),
+    )
+    asyncio.run(seed(plan, max(args.jobs, 1)))
+    return 0
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a synthetic district")
+    add_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
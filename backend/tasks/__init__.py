@@ -0,0 +1,7 @@
+"""
+Background job handlers, registered with core.jobs when imported
+"""
+
+from tasks import assets, lessons, notifications
+
+__all__ = ["assets", "lessons", "notifications"]
@@ -0,0 +1,33 @@
+import logging
+from typing import Any, Dict
+
+from PIL import Image
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import variants
+from core.jobs import handler
+from crud.asset import asset as asset_crud
+
+logger = logging.getLogger(__name__)
+
+
+@handler("generate_asset_variants")
+async def generate_asset_variants(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Make the downscaled variants of an uploaded image
+    """
+    sha256 = payload["sha256"]
+    if await asset_crud.get_variants(db, sha256s=[sha256]):
+        # Same image uploaded before
+        return
+    try:
+        rendered = await variants.generate(sha256)
+    except (OSError, Image.DecompressionBombError) as e:
+        # Not a readable image (or too large to decode); retrying won't help
+        logger.warning(f"No variants for asset {sha256[:12]}: {str(e)}")
+        return
+    await asset_crud.save_variants(db, sha256=sha256, rendered=rendered)
+    logger.info(
+        f"Made {len(rendered)} variants of asset {sha256[:12]} "
+        f"({', '.join(str(width) for width, _, _ in rendered)}px)"
+    )
@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.jobs import handler
+from crud.lesson import lesson as lesson_crud
+
+logger = logging.getLogger(__name__)
+
+
+@handler("purge_lesson")
+async def purge_lesson(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Delete a deleted lesson's progress, enrollments and modules in small
+    batches, then the lesson itself
+
+    Each batch commits on its own, so a retry after a timeout or crash
+    carries on where the last one stopped.
+    """
+    lesson_id = payload["lesson_id"]
+    deleted = 0
+    while True:
+        rows = await lesson_crud.purge(
+            db, lesson_id=lesson_id, batch_size=settings.LESSON_PURGE_BATCH
+        )
+        if not rows:
+            break
+        deleted += rows
+        await asyncio.sleep(settings.LESSON_PURGE_PAUSE_MS / 1000)
+    logger.info(f"Purged lesson {lesson_id} ({deleted} rows)")
+
+
+@handler("archive_lesson")
+async def archive_lesson(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Move an archived lesson's content to cold storage once it has been idle
+    for LESSON_ARCHIVE_AFTER_DAYS
+
+    Lessons that were edited, restored or republished meanwhile are left
+    alone (or scheduled again), so a stale or repeated job is harmless.
+    """
+    lesson_id = payload["lesson_id"]
+    archived = await lesson_crud.archive(db, lesson_id=lesson_id)
+    if archived is not None:
+        logger.info(f"Archived lesson {lesson_id} ({archived} bytes)")
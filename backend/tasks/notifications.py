@@ -0,0 +1,42 @@
+import logging
+from typing import Any, Dict
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.jobs import handler
+from models.lesson import Lesson
+from models.user import Enrollment, User
+
+logger = logging.getLogger(__name__)
+
+
+@handler("send_enrollment_notification")
+async def send_enrollment_notification(
+    db: AsyncSession, payload: Dict[str, Any]
+) -> None:
+    """
+    Tell a lesson's teacher that a student enrolled
+    """
+    statement = (
+        select(Enrollment, User, Lesson)
+        .join(User, User.id == Enrollment.student_id)
+        .join(Lesson, Lesson.id == Enrollment.lesson_id)
+        .where(Enrollment.id == payload["enrollment_id"])
+    )
+    if "lesson_id" in payload:
+        # Only the lesson's partition; older jobs without it scan them all
+        statement = statement.where(Enrollment.lesson_id == payload["lesson_id"])
+    row = (await db.execute(statement)).one_or_none()
+    if row is None:
+        # Enrollment removed before the job ran; nothing to announce
+        return
+    enrollment, student, lesson = row
+    if enrollment.status != "active" or lesson.teacher_id is None:
+        return
+
+    # There is no mail transport yet, so notifications are only logged
+    logger.info(
+        f"Notify teacher {lesson.teacher_id}: {student.first_name} "
+        f"{student.last_name} enrolled in lesson {lesson.id} ({lesson.title})"
+    )
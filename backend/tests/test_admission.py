@@ -0,0 +1,77 @@
+import pytest
+
+from core import admission
+from core.admission import (
+    LOGIN_PATHS,
+    AdmissionController,
+    BucketTable,
+    Priority,
+    TokenBucket,
+    classify,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze time.monotonic as seen by the admission module"""
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_token_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_token_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    clock[0] += 60
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() > 0
+
+
+def test_bucket_table_evicts_least_recently_used(clock):
+    table = BucketTable(rate=1.0, capacity=1, max_size=2)
+    table.acquire("a")
+    table.acquire("b")
+    table.acquire("a")
+    table.acquire("c")  # evicts b, the least recently used
+    assert table.acquire("a") > 0
+    assert table.acquire("b") == 0.0
+
+
+def test_classify():
+    assert classify("GET", "/health") == Priority.CRITICAL
+    assert classify("GET", "/api/v1/lessons/1") == Priority.HIGH
+    assert classify("POST", "/api/v1/lessons/1/enroll") == Priority.NORMAL
+    assert classify("GET", "/api/v1/users") == Priority.BULK
+
+
+def test_class_logging_in_from_one_ip_is_not_limited(clock):
+    controller = AdmissionController()
+    waits = [
+        controller.check_rate(None, "10.0.0.1", path)
+        for _ in range(20)
+        for path in LOGIN_PATHS
+    ]
+    assert waits == [0.0] * 40
+
+
+def test_logins_do_not_use_up_other_anonymous_requests(clock):
+    controller = AdmissionController()
+    for _ in range(40):
+        controller.check_rate(None, "10.0.0.1", LOGIN_PATHS[0])
+    assert controller.check_rate(None, "10.0.0.1", "/api/v1/lessons") == 0.0
+
+
+def test_authenticated_requests_are_limited_per_user(clock):
+    controller = AdmissionController()
+    burst = controller.users.capacity
+    for _ in range(int(burst)):
+        assert controller.check_rate("7", "10.0.0.1") == 0.0
+    assert controller.check_rate("7", "10.0.0.1") > 0
+    assert controller.check_rate("8", "10.0.0.1") == 0.0
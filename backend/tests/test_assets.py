@@ -0,0 +1,161 @@
+import hashlib
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import crud
+from api.deps import (
+    get_current_active_user,
+    get_current_teacher_or_admin_user,
+    get_db,
+)
+from api.routes import assets as asset_routes
+from core import assets
+from core.config import settings
+from schemas.auth import AuthUser
+
+BODY = b"0123456789" * 100
+SHA256 = hashlib.sha256(BODY).hexdigest()
+URL = f"{settings.API_V1_STR}/assets/{SHA256}"
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ASSET_ROOT", str(tmp_path))
+    monkeypatch.setattr(settings, "ASSET_ACCEL_REDIRECT", None)
+    path = assets.blob_path(SHA256)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(BODY)
+
+    uploaded = {"content_type": "image/png", "filename": "diagram.png"}
+
+    async def get_blob_info(db, *, sha256):
+        if sha256 != SHA256:
+            return None
+        return uploaded["content_type"], uploaded["filename"]
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(crud.asset, "get_blob_info", get_blob_info)
+    app = FastAPI()
+    app.include_router(asset_routes.router, prefix=f"{settings.API_V1_STR}/assets")
+    app.dependency_overrides[get_db] = no_db
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://test")
+    client.uploaded = uploaded
+    client.app = app
+    return client
+
+
+def test_etag_matches_strong_weak_lists_and_star():
+    assert assets.etag(SHA256) == f'"{SHA256}"'
+    assert assets.etag_matches(f'"{SHA256}"', SHA256)
+    assert assets.etag_matches(f'"other", W/"{SHA256}"', SHA256)
+    assert assets.etag_matches("*", SHA256)
+    assert not assets.etag_matches('"other"', SHA256)
+    assert not assets.etag_matches(None, SHA256)
+
+
+@pytest.mark.parametrize(
+    "content_type, served",
+    [
+        ("image/png", ("image/png", "inline")),
+        ("Text/Plain; charset=utf-8", ("text/plain", "inline")),
+        ("text/html", ("application/octet-stream", "attachment")),
+        ("image/svg+xml", ("application/octet-stream", "attachment")),
+        ("application/xhtml+xml", ("application/octet-stream", "attachment")),
+        ("", ("application/octet-stream", "attachment")),
+    ],
+)
+def test_only_allowlisted_types_are_served_inline(content_type, served):
+    assert assets.served_type(content_type) == served
+
+
+def test_content_disposition_quotes_the_file_name():
+    assert assets.content_disposition("attachment", None) == "attachment"
+    assert (
+        assets.content_disposition("inline", "a b.png")
+        == "inline; filename*=utf-8''a%20b.png"
+    )
+
+
+@pytest.mark.asyncio
+async def test_download_is_cacheable_and_never_sniffed(client):
+    response = await client.get(URL)
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["content-disposition"].startswith("inline")
+    assert response.headers["etag"] == assets.etag(SHA256)
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-security-policy"] == "sandbox"
+
+
+@pytest.mark.asyncio
+async def test_uploaded_html_is_downloaded_not_rendered(client):
+    client.uploaded["content_type"] = "text/html"
+    client.uploaded["filename"] = "page.html"
+    response = await client.get(URL)
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["content-disposition"].startswith("attachment")
+    assert response.headers["content-security-policy"] == "sandbox"
+
+
+@pytest.mark.asyncio
+async def test_if_none_match_answers_304(client):
+    response = await client.get(URL, headers={"If-None-Match": assets.etag(SHA256)})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_range_returns_the_requested_bytes(client):
+    response = await client.get(URL, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == BODY[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(BODY)}"
+
+
+@pytest.mark.asyncio
+async def test_unknown_blob_is_404(client):
+    response = await client.get(f"{settings.API_V1_STR}/assets/{'0' * 64}")
+    assert response.status_code == 404
+
+
+@pytest.fixture
+def deleted_lesson_client(client, monkeypatch):
+    async def get_module(db, *, id):
+        return SimpleNamespace(id=id, lesson_id=1)
+
+    async def get_lesson(db, *, id):
+        # Soft-deleted, not purged yet: the getter hides it
+        return None
+
+    monkeypatch.setattr(crud.module, "get", get_module)
+    monkeypatch.setattr(crud.lesson, "get", get_lesson)
+    teacher = AuthUser(id=2, role="teacher", is_active=True)
+    app = client.app
+    app.dependency_overrides[get_current_active_user] = lambda: teacher
+    app.dependency_overrides[get_current_teacher_or_admin_user] = lambda: teacher
+    return client
+
+
+@pytest.mark.asyncio
+async def test_upload_to_a_module_of_a_deleted_lesson_is_404(deleted_lesson_client):
+    response = await deleted_lesson_client.post(
+        f"{settings.API_V1_STR}/assets",
+        params={"module_id": 5},
+        files={"file": ("a.png", b"png", "image/png")},
+    )
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_assets_of_a_deleted_lesson_are_404(deleted_lesson_client):
+    response = await deleted_lesson_client.get(
+        f"{settings.API_V1_STR}/assets", params={"module_id": 5}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,153 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from api.deps import get_current_active_user
+from api.routes import batch as batch_routes
+from core import batch
+from core.admission import BucketTable, controller
+from core.config import settings
+from schemas.auth import AuthUser
+from schemas.batch import BatchRequestItem
+
+API = settings.API_V1_STR
+
+
+async def _forever():
+    while True:
+        yield ": keepalive\n\n"
+        await asyncio.sleep(0.01)
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(batch_routes.router, prefix=f"{API}/batch")
+    user = AuthUser(id=7, role="student", is_active=True)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+
+    @app.get(f"{API}/items/{{item_id}}")
+    async def read_item(item_id: int):
+        return {"id": item_id}
+
+    @app.get(f"{API}/names/{{name}}")
+    async def read_name(name: str):
+        return {"name": name}
+
+    @app.get(f"{API}/declared/stream", response_class=StreamingResponse)
+    async def declared_stream():
+        return StreamingResponse(_forever(), media_type="text/event-stream")
+
+    @app.get(f"{API}/hidden/stream")
+    async def hidden_stream():
+        return StreamingResponse(_forever(), media_type="text/event-stream")
+
+    @app.get(f"{API}/slow")
+    async def slow():
+        await asyncio.sleep(60)
+
+    return app
+
+
+async def _post(app: FastAPI, requests):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        return await c.post(f"{API}/batch", json={"requests": requests})
+
+
+def _item(method: str) -> BatchRequestItem:
+    return BatchRequestItem(method=method, path="/")
+
+
+def test_consecutive_gets_share_a_step_and_writes_run_alone():
+    items = [_item(m) for m in ("GET", "GET", "POST", "GET", "DELETE", "DELETE")]
+    assert batch.group(items) == [[0, 1], [2], [3], [4], [5]]
+
+
+def test_streams_finds_routes_declared_as_streaming():
+    app = _app()
+    assert batch.streams(app, "GET", f"{API}/declared/stream")
+    assert not batch.streams(app, "GET", f"{API}/items/3")
+    assert not batch.streams(app, "GET", f"{API}/missing")
+
+
+@pytest.mark.asyncio
+async def test_responses_come_back_in_request_order():
+    response = await _post(
+        _app(),
+        [
+            {"id": "a", "path": f"{API}/items/1"},
+            {"id": "b", "path": f"{API}/items/2"},
+            {"id": "c", "path": f"{API}/missing"},
+        ],
+    )
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [(r["id"], r["status"]) for r in results] == [
+        ("a", 200),
+        ("b", 200),
+        ("c", 404),
+    ]
+    assert results[1]["body"] == {"id": 2}
+
+
+@pytest.mark.asyncio
+async def test_streaming_routes_are_refused():
+    response = await _post(_app(), [{"path": f"{API}/declared/stream"}])
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_undeclared_event_streams_are_cut_off():
+    response = await asyncio.wait_for(
+        _post(_app(), [{"path": f"{API}/hidden/stream"}]), 5
+    )
+    assert response.json()["responses"][0]["status"] == 400
+
+
+@pytest.mark.asyncio
+async def test_slow_sub_requests_time_out(monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_TIMEOUT", 0.05)
+    response = await _post(
+        _app(), [{"path": f"{API}/slow"}, {"path": f"{API}/items/1"}]
+    )
+    assert [r["status"] for r in response.json()["responses"]] == [504, 200]
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    """A fresh per-user bucket allowing a burst of three"""
+    monkeypatch.setattr(controller, "users", BucketTable(rate=0.001, capacity=3))
+
+
+@pytest.mark.asyncio
+async def test_sub_request_paths_are_percent_decoded():
+    response = await _post(_app(), [{"path": f"{API}/names/a%20b"}])
+    assert response.json()["responses"][0]["body"] == {"name": "a b"}
+
+
+@pytest.mark.asyncio
+async def test_encoded_batch_paths_are_refused():
+    response = await _post(_app(), [{"path": f"{API}/%62atch"}])
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_each_sub_request_costs_a_rate_limit_token():
+    response = await _post(_app(), [{"path": f"{API}/items/{n}"} for n in range(4)])
+    results = response.json()["responses"]
+    assert [r["status"] for r in results] == [200, 200, 200, 429]
+    assert int(results[3]["headers"]["retry-after"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_sub_requests_are_shed_under_load(monkeypatch):
+    monkeypatch.setattr(controller, "pressure", lambda: 0.6)
+    response = await _post(
+        _app(), [{"path": f"{API}/admin/stats"}, {"path": f"{API}/items/1"}]
+    )
+    results = response.json()["responses"]
+    assert [r["status"] for r in results] == [503, 200]
+    assert results[0]["headers"]["retry-after"] == str(settings.ADMISSION_RETRY_AFTER)
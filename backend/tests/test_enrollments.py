@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import crud
+from core.config import settings
+
+LESSON_ID = 42
+# Enrollments are hash-partitioned by lesson_id; Postgres reads one partition
+# only when the statement compares lesson_id to a value
+PRUNED = "enrollments.lesson_id = "
+
+
+def _compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+
+class RecordingSession:
+    """Records statements and finds nothing"""
+
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(
+            rowcount=0,
+            scalar_one=lambda: 0,
+            scalar_one_or_none=lambda: None,
+        )
+
+    def add(self, obj):
+        pass
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_push(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_ENABLED", False)
+
+
+def _enrollment_statements(statements):
+    return [s for s in statements if "enrollments" in str(_compiled(s))]
+
+
+@pytest.mark.asyncio
+async def test_lesson_enrollment_queries_read_one_partition():
+    db = RecordingSession()
+    await crud.enrollment.get(db, id=1, lesson_id=LESSON_ID)
+    await crud.enrollment.enroll_student(db, student_id=3, lesson_id=LESSON_ID)
+    await crud.enrollment.update_status(
+        db, enrollment_id=1, status="dropped", lesson_id=LESSON_ID
+    )
+    await crud.lesson.get_student_count(db, lesson_id=LESSON_ID)
+    await crud.lesson.is_enrolled(db, lesson_id=LESSON_ID, student_id=3)
+
+    statements = _enrollment_statements(db.statements)
+    assert len(statements) == 5
+    for statement in statements:
+        compiled = _compiled(statement)
+        assert PRUNED in str(compiled), str(compiled)
+        assert LESSON_ID in compiled.params.values()
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_enrollments_from_the_lesson_partition():
+    db = RecordingSession()
+    await crud.lesson.purge(db, lesson_id=LESSON_ID, batch_size=50)
+
+    [statement] = [
+        s
+        for s in db.statements
+        if str(_compiled(s)).startswith("DELETE FROM enrollments")
+    ]
+    sql = str(_compiled(statement))
+    # Both the DELETE and its batch subquery name the lesson
+    assert sql.count(PRUNED) == 2, sql
+    assert LESSON_ID in _compiled(statement).params.values()
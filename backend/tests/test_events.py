@@ -0,0 +1,157 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+import pytest
+from pydantic import ValidationError
+
+from core.config import settings
+from core.events import COLUMNS, EventBuffer, EventFlusher, create_partition, to_record
+from schemas.event import EventBatch, EventIn
+
+RECEIVED = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _record(n: int):
+    return to_record(
+        user_id=n, event_type="page.view", occurred_at=None, received_at=RECEIVED
+    )
+
+
+def test_record_follows_column_order():
+    record = to_record(
+        user_id=7,
+        event_type="module.open",
+        occurred_at=RECEIVED - timedelta(seconds=5),
+        received_at=RECEIVED,
+        lesson_id=3,
+        module_id=4,
+        dwell_ms=1200,
+        data={"page": 2},
+    )
+    assert dict(zip(COLUMNS, record)) == {
+        "occurred_at": RECEIVED - timedelta(seconds=5),
+        "received_at": RECEIVED,
+        "user_id": 7,
+        "lesson_id": 3,
+        "module_id": 4,
+        "event_type": "module.open",
+        "dwell_ms": 1200,
+        "data": json.dumps({"page": 2}),
+    }
+
+
+def test_missing_and_future_times_become_the_receive_time():
+    assert _record(1)[0] == RECEIVED
+    future = to_record(
+        user_id=1,
+        event_type="page.view",
+        occurred_at=RECEIVED + timedelta(hours=1),
+        received_at=RECEIVED,
+    )
+    assert future[0] == RECEIVED
+
+
+def test_naive_client_time_is_taken_as_utc():
+    event = EventIn(type="page.view", occurred_at="2026-10-19T09:59:00")
+    assert event.occurred_at.tzinfo is None
+
+    record = to_record(
+        user_id=1,
+        event_type=event.type,
+        occurred_at=event.occurred_at,
+        received_at=RECEIVED,
+    )
+    assert record[0] == datetime(2026, 10, 19, 9, 59, tzinfo=timezone.utc)
+
+
+def test_offer_accepts_up_to_capacity():
+    buffer = EventBuffer(capacity=3)
+    assert buffer.offer([_record(n) for n in range(2)]) == 2
+    assert buffer.offer([_record(n) for n in range(2, 5)]) == 1
+    assert len(buffer) == 3
+    assert buffer.offer([_record(9)]) == 0
+
+
+def test_put_back_returns_a_batch_to_the_front():
+    buffer = EventBuffer(capacity=4)
+    buffer.offer([_record(n) for n in range(3)])
+    batch = buffer.take(2)
+    assert [record[2] for record in batch] == [0, 1]
+
+    buffer.offer([_record(3), _record(4)])
+    # Only one of the two taken records fits back in
+    assert buffer.put_back(batch) == 1
+    assert [record[2] for record in buffer.take(10)] == [0, 2, 3, 4]
+
+
+def test_oversized_batches_are_refused_by_the_schema():
+    events_in = [{"type": "page.view"}] * (settings.EVENTS_MAX_BATCH + 1)
+    with pytest.raises(ValidationError):
+        EventBatch(events=events_in)
+    assert len(EventBatch(events=events_in[1:]).events) == settings.EVENTS_MAX_BATCH
+
+
+class FakeConnection:
+    """Records statements; the first one fails with `error` if given"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.statements = []
+
+    async def execute(self, statement, *args):
+        self.statements.append(statement)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return "INSERT 0 3"
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.statements.append("BEGIN")
+        yield
+        self.statements.append("COMMIT")
+
+
+@pytest.mark.asyncio
+async def test_partition_is_created_directly_when_the_default_has_no_rows():
+    conn = FakeConnection()
+    await create_partition(conn, RECEIVED.replace(hour=0))
+    assert len(conn.statements) == 1
+    assert "PARTITION OF learning_events" in conn.statements[0]
+
+
+@pytest.mark.asyncio
+async def test_rows_in_the_default_partition_are_moved_before_attaching():
+    conn = FakeConnection(error=asyncpg.CheckViolationError("violated by some row"))
+    await create_partition(conn, RECEIVED.replace(hour=0))
+    failed, begin, create, move, attach, commit = conn.statements
+    assert (begin, commit) == ("BEGIN", "COMMIT")
+    assert "(LIKE learning_events" in create
+    assert "DELETE FROM learning_events_default" in move
+    assert "INSERT INTO learning_events_p20261019" in move
+    assert attach.startswith(
+        "ALTER TABLE learning_events ATTACH PARTITION learning_events_p20261019"
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_maintenance_is_not_retried_on_every_flush(monkeypatch):
+    monkeypatch.setattr(settings, "EVENTS_FLUSH_INTERVAL_MS", 1)
+    flusher = EventFlusher(EventBuffer(capacity=10))
+    attempts = []
+
+    async def maintain_partitions():
+        attempts.append(1)
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(flusher, "maintain_partitions", maintain_partitions)
+    task = asyncio.create_task(flusher.run())
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert len(attempts) == 1
+    assert flusher._next_maintenance > 0
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core import invalidation, listen
+
+TABLE = "test_rows"
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Ids evicted from a cache of TABLE, and the notifications sent"""
+    cache = SimpleNamespace(evicted=[], sent=[])
+
+    async def send(db, channel, message):
+        cache.sent.append((channel, message))
+
+    monkeypatch.setattr(listen, "send", send)
+    monkeypatch.setitem(
+        invalidation.HANDLERS, TABLE, [lambda id, version: cache.evicted.append(id)]
+    )
+    return cache
+
+
+@pytest.fixture
+def db():
+    # Never connects: these tests only commit and roll back empty transactions
+    return AsyncSession()
+
+
+@pytest.mark.asyncio
+async def test_evicts_locally_only_once_the_transaction_commits(cache, db):
+    await invalidation.publish(db, table=TABLE, id=7, version=2)
+    # Another worker hears of it through the notification
+    assert cache.sent == [
+        (invalidation.CHANNEL, {"table": TABLE, "id": 7, "version": 2})
+    ]
+    assert cache.evicted == []
+
+    await db.commit()
+    assert cache.evicted == [7]
+    assert invalidation.PENDING not in db.info
+
+    # The next transaction starts with nothing pending
+    await db.commit()
+    assert cache.evicted == [7]
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_invalidations_are_dropped(cache, db):
+    await db.begin()
+    await invalidation.publish(db, table=TABLE, id=7)
+    await db.rollback()
+    assert invalidation.PENDING not in db.info
+
+    await db.commit()
+    assert cache.evicted == []
+
+
+@pytest.mark.asyncio
+async def test_tables_without_handlers_are_not_published(cache, db):
+    await invalidation.publish(db, table="uncached", id=1)
+    assert cache.sent == []
+    assert invalidation.PENDING not in db.info
+
+
+def test_a_reconnect_flushes_every_table(cache):
+    invalidation.flush_all()
+    assert cache.evicted == [None]
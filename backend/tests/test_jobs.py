@@ -0,0 +1,135 @@
+import importlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from crud.job import job as job_crud
+from crud.job import retry_delay
+from models.base import JobStatus
+
+# crud.job is also the name of the CRUDJob instance
+job_module = importlib.import_module("crud.job")
+
+WORKER = "pi:42"
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _params(statement):
+    return statement.compile(dialect=postgresql.dialect()).params
+
+
+class FakeSession:
+    """Records statements and answers each with the next rowcount"""
+
+    def __init__(self, *rowcounts):
+        self.rowcounts = list(rowcounts)
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(rowcount=self.rowcounts.pop(0))
+
+    async def commit(self):
+        self.commits += 1
+
+
+class ClaimSession(FakeSession):
+    """Returns these rows from the claiming UPDATE ... RETURNING"""
+
+    def __init__(self, rows):
+        super().__init__()
+        self.rows = rows
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return iter(SimpleNamespace(_asdict=lambda row=row: row) for row in self.rows)
+
+
+def _job(attempts):
+    return {"id": 9, "kind": "thumbnail", "attempts": attempts, "max_attempts": 3}
+
+
+@pytest.mark.asyncio
+async def test_claim_locks_due_jobs_without_waiting_on_other_workers():
+    claimed = {"id": 9, "kind": "thumbnail", "attempts": 1}
+    db = ClaimSession(rows=[claimed])
+    assert await job_crud.claim(db, worker=WORKER, limit=4) == [claimed]
+    assert db.commits == 1
+
+    sql = _sql(db.statements[0])
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "jobs.run_at <= now()" in sql
+    assert "ORDER BY jobs.run_at, jobs.id" in sql
+    assert "attempts=(jobs.attempts + " in sql
+    params = _params(db.statements[0])
+    assert params["status_1"] == JobStatus.QUEUED
+    assert params["status"] == JobStatus.RUNNING
+    assert params["locked_by"] == WORKER
+    assert 4 in params.values()
+
+
+def test_retry_delay_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(job_module.settings, "JOB_RETRY_BASE_SECONDS", 5)
+    monkeypatch.setattr(job_module.settings, "JOB_RETRY_MAX_SECONDS", 60)
+    monkeypatch.setattr(job_module.random, "uniform", lambda low, high: high)
+    assert [retry_delay(n) for n in range(1, 6)] == [5, 10, 20, 40, 60]
+
+    # Jitter never waits less than half the delay
+    monkeypatch.setattr(job_module.random, "uniform", lambda low, high: low)
+    assert retry_delay(2) == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_later_until_out_of_attempts(monkeypatch):
+    monkeypatch.setattr(job_module, "retry_delay", lambda attempts: 30)
+    before = datetime.now(timezone.utc)
+
+    db = FakeSession(1)
+    status = await job_crud.fail(db, job=_job(2), worker=WORKER, error="boom")
+    assert status == JobStatus.QUEUED
+    params = _params(db.statements[0])
+    assert params["status"] == JobStatus.QUEUED
+    assert (params["run_at"] - before).total_seconds() >= 30
+
+    db = FakeSession(1)
+    status = await job_crud.fail(db, job=_job(3), worker=WORKER, error="boom")
+    assert status == JobStatus.FAILED
+    assert "finished_at=now()" in _sql(db.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_only_the_worker_holding_a_job_records_its_outcome():
+    db = FakeSession(0)
+    assert await job_crud.succeed(db, job_id=9, worker=WORKER) is False
+    assert "jobs.locked_by = " in _sql(db.statements[0])
+    assert WORKER in _params(db.statements[0]).values()
+
+    db = FakeSession(0)
+    assert await job_crud.fail(db, job=_job(1), worker=WORKER, error="x") is None
+    assert "jobs.locked_by = " in _sql(db.statements[0])
+
+    db = FakeSession(1)
+    assert await job_crud.succeed(db, job_id=9, worker=WORKER) is True
+
+
+@pytest.mark.asyncio
+async def test_stale_jobs_are_requeued_or_failed_once_out_of_attempts():
+    db = FakeSession(2, 5)
+    assert await job_crud.requeue_stale(db) == (5, 2)
+    assert db.commits == 1
+
+    failed, requeued = db.statements
+    assert "jobs.attempts >= jobs.max_attempts" in _sql(failed)
+    assert _params(failed)["status"] == JobStatus.FAILED
+    assert "finished_at=now()" in _sql(failed)
+    # Runs second, so it only sees the jobs that still have attempts left
+    assert _params(requeued)["status"] == JobStatus.QUEUED
+    for statement in (failed, requeued):
+        assert "jobs.locked_at < " in _sql(statement)
+        assert _params(statement)["status_1"] == JobStatus.RUNNING
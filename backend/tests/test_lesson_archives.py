@@ -0,0 +1,209 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import crud
+from api.deps import get_current_active_user, get_db
+from api.routes import lessons as lesson_routes
+from core.config import settings
+from models.lesson import LessonStatus
+from schemas.auth import AuthUser
+
+ARCHIVED_AT = datetime(2026, 9, 1, tzinfo=timezone.utc)
+
+
+def _lesson(status=LessonStatus.ARCHIVED, archived_at=ARCHIVED_AT):
+    return SimpleNamespace(
+        id=1,
+        title="Fractions",
+        teacher_id=2,
+        status=status,
+        content=None,
+        archived_at=archived_at,
+        created_at=ARCHIVED_AT,
+        updated_at=ARCHIVED_AT,
+    )
+
+
+class FakeDB:
+    """Returns the same lesson from every query"""
+
+    def __init__(self, lesson):
+        self.lesson = lesson
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.lesson)
+
+
+class ArchiveDB:
+    """Answers the archive payload, lesson content and module content reads"""
+
+    def __init__(self, payload, content=None, modules=()):
+        self.scalars = [payload, content]
+        self.modules = list(modules)
+
+    async def scalar(self, statement):
+        return self.scalars.pop(0)
+
+    async def execute(self, statement):
+        return SimpleNamespace(all=lambda: self.modules)
+
+
+def _payload(content, modules):
+    return zlib.compress(json.dumps({"content": content, "modules": modules}).encode())
+
+
+@pytest.fixture
+def restores(monkeypatch):
+    calls = []
+
+    async def restore(db, *, lesson_id):
+        calls.append(lesson_id)
+        return True
+
+    monkeypatch.setattr(crud.lesson, "restore", restore)
+    return calls
+
+
+def _client(user: AuthUser) -> httpx.AsyncClient:
+    async def no_db():
+        yield None
+
+    app = FastAPI()
+    app.include_router(lesson_routes.router, prefix=f"{settings.API_V1_STR}/lessons")
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_db] = no_db
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_get_leaves_archived_content_in_cold_storage(restores):
+    lesson = await crud.lesson.get(FakeDB(_lesson()), id=1)
+    assert lesson.archived_at == ARCHIVED_AT
+    lesson = await crud.lesson.get_lesson_with_details(FakeDB(_lesson()), lesson_id=1)
+    assert lesson.archived_at == ARCHIVED_AT
+    assert restores == []
+
+
+@pytest.mark.asyncio
+async def test_archived_content_is_read_without_restoring(restores):
+    db = ArchiveDB(
+        _payload("lesson text", {"5": "archived five", "6": "archived six"}),
+        modules=[(5, None), (6, "written since"), (7, None)],
+    )
+    content, modules = await crud.lesson.get_archived_content(db, lesson_id=1)
+    assert content == "lesson text"
+    # Stub content wins, as in restore()
+    assert modules == {5: "archived five", 6: "written since", 7: None}
+    assert restores == []
+
+
+@pytest.mark.asyncio
+async def test_archived_content_falls_back_to_a_concurrent_restore():
+    db = ArchiveDB(None, content="lesson text", modules=[(5, "five")])
+    content, modules = await crud.lesson.get_archived_content(db, lesson_id=1)
+    assert (content, modules) == ("lesson text", {5: "five"})
+
+
+@pytest.mark.asyncio
+async def test_restore_after_a_concurrent_purge_or_archive_writes_nothing():
+    calls = []
+
+    class RacedDB:
+        async def execute(self, statement):
+            calls.append("execute")
+            # The archive row was taken by a purge or another restore
+            return SimpleNamespace(scalar_one_or_none=lambda: None)
+
+        async def rollback(self):
+            calls.append("rollback")
+
+        async def commit(self):
+            calls.append("commit")
+
+    assert not await crud.lesson.restore(RacedDB(), lesson_id=1)
+    assert calls == ["execute", "rollback"]
+
+
+@pytest.mark.asyncio
+async def test_get_serves_archived_content_without_restoring(monkeypatch, restores):
+    async def get_lesson(db, *, lesson_id):
+        lesson = _lesson(status=LessonStatus.PUBLISHED)
+        lesson.teacher = None
+        lesson.modules = [
+            SimpleNamespace(
+                id=5,
+                lesson_id=1,
+                title="Halves",
+                order=1,
+                content=None,
+                created_at=ARCHIVED_AT,
+                updated_at=ARCHIVED_AT,
+            )
+        ]
+        return lesson
+
+    async def get_archived_content(db, *, lesson_id):
+        return "lesson text", {5: "five"}
+
+    async def get_student_count(db, *, lesson_id):
+        return 0
+
+    monkeypatch.setattr(crud.lesson, "get_lesson_with_details", get_lesson)
+    monkeypatch.setattr(crud.lesson, "get_archived_content", get_archived_content)
+    monkeypatch.setattr(crud.lesson, "get_student_count", get_student_count)
+    student = AuthUser(id=3, role="student", is_active=True)
+    async with _client(student) as client:
+        response = await client.get(f"{settings.API_V1_STR}/lessons/1")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["content"] == "lesson text"
+    assert [module["content"] for module in body["modules"]] == ["five"]
+    assert restores == []
+
+
+@pytest.mark.asyncio
+async def test_restore_content_only_restores_archived_lessons(restores):
+    assert not await lesson_routes.restore_content(None, _lesson(archived_at=None))
+    assert await lesson_routes.restore_content(None, _lesson())
+    assert restores == [1]
+
+
+@pytest.mark.asyncio
+async def test_refused_reads_do_not_restore(monkeypatch, restores):
+    async def get_lesson(db, *, lesson_id):
+        return _lesson()
+
+    async def not_enrolled(db, *, lesson_id, student_id):
+        return False
+
+    monkeypatch.setattr(crud.lesson, "get_lesson_with_details", get_lesson)
+    monkeypatch.setattr(crud.lesson, "is_enrolled", not_enrolled)
+    student = AuthUser(id=3, role="student", is_active=True)
+    async with _client(student) as client:
+        response = await client.get(f"{settings.API_V1_STR}/lessons/1")
+    assert response.status_code == 403
+    assert restores == []
+
+
+@pytest.mark.asyncio
+async def test_deleting_an_archived_lesson_does_not_restore(monkeypatch, restores):
+    async def get(db, *, id):
+        return _lesson()
+
+    async def remove(db, *, id):
+        return _lesson()
+
+    monkeypatch.setattr(crud.lesson, "get", get)
+    monkeypatch.setattr(crud.lesson, "remove", remove)
+    teacher = AuthUser(id=2, role="teacher", is_active=True)
+    async with _client(teacher) as client:
+        response = await client.delete(f"{settings.API_V1_STR}/lessons/1")
+    assert response.status_code == 200
+    assert restores == []
@@ -0,0 +1,158 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql.dml import Delete
+
+import crud
+from core import invalidation
+from core.config import settings
+from models.asset import Asset
+
+NOT_DELETED = "lessons.deleted_at IS NULL"
+
+
+async def purge_lesson(db, lesson_id: int) -> None:
+    """What the purge_lesson job does, without its pause between batches"""
+    while await crud.lesson.purge(
+        db, lesson_id=lesson_id, batch_size=settings.LESSON_PURGE_BATCH
+    ):
+        pass
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class RecordingSession:
+    """Records statements and finds nothing"""
+
+    def __init__(self):
+        self.statements = []
+        self.added = []
+        self.info = {}
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        empty = SimpleNamespace(all=lambda: [])
+        return SimpleNamespace(
+            rowcount=1,
+            all=lambda: [],
+            scalar_one_or_none=lambda: SimpleNamespace(id=1, updated_at=None),
+            scalars=lambda: empty,
+        )
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def commit(self):
+        self.commits += 1
+
+
+class LessonRows:
+    """
+    The rows of one deleted lesson; each DELETE removes up to its LIMIT
+    """
+
+    def __init__(self, **rows):
+        self.rows = rows
+        self.statements = []
+        self.deleted = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def execute(self, statement):
+        assert isinstance(statement, Delete)
+        self.statements.append(statement)
+        table = statement.table.name
+        limit = statement.compile(dialect=postgresql.dialect()).params.get("param_1")
+        count = min(self.rows.get(table, 0), limit or 1)
+        self.rows[table] = self.rows.get(table, 0) - count
+        if count:
+            self.deleted.append((table, count))
+        return SimpleNamespace(rowcount=count)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_ENABLED", False)
+    monkeypatch.setattr(settings, "LESSON_PURGE_BATCH", 1000)
+
+
+@pytest.mark.asyncio
+async def test_deleted_lessons_are_hidden_from_every_read():
+    db = RecordingSession()
+    await crud.lesson.get(db, id=1)
+    await crud.lesson.get_lesson_with_details(db, lesson_id=1)
+    await crud.lesson.get_multi_visible(db)
+    await crud.lesson.get_teacher_lessons(db, teacher_id=2)
+    await crud.lesson.get_student_lessons(db, student_id=3)
+    await crud.lesson.search(db, q="fractions")
+    for statement in db.statements:
+        assert NOT_DELETED in _sql(statement), _sql(statement)
+
+
+@pytest.mark.asyncio
+async def test_delete_hides_the_lesson_and_leaves_its_rows_to_the_purge():
+    db = RecordingSession()
+    await crud.lesson.remove(db, id=1)
+    assert db.commits == 1
+    assert not any(isinstance(s, Delete) for s in db.statements)
+    assert any(
+        _sql(s).startswith("UPDATE lessons SET deleted_at=now()") for s in db.statements
+    )
+    [purge] = [job for job in db.added if job.kind == "purge_lesson"]
+    assert purge.payload == {"lesson_id": 1}
+    # Caches in every worker forget the lesson once the delete commits
+    assert db.info[invalidation.PENDING]
+
+
+@pytest.mark.asyncio
+async def test_purge_removes_children_in_batches_then_the_lesson():
+    db = LessonRows(module_progress=1500, enrollments=10, modules=3, lessons=1)
+    await purge_lesson(db, 1)
+    assert db.deleted == [
+        ("module_progress", 1000),
+        ("module_progress", 500),
+        ("enrollments", 10),
+        ("modules", 3),
+        ("lessons", 1),
+    ]
+    # One short transaction per batch
+    assert (db.commits, db.rollbacks) == (5, 1)
+
+
+@pytest.mark.asyncio
+async def test_purge_is_idempotent_and_resumes_after_a_crash():
+    # A first run died after the progress rows; the retry carries on
+    db = LessonRows(module_progress=0, enrollments=4, modules=2, lessons=1)
+    await purge_lesson(db, 1)
+    assert db.deleted == [("enrollments", 4), ("modules", 2), ("lessons", 1)]
+
+    # Running it again on a purged lesson deletes and commits nothing
+    db.deleted, db.commits = [], 0
+    await purge_lesson(db, 1)
+    assert (db.deleted, db.commits) == ([], 0)
+
+
+@pytest.mark.asyncio
+async def test_purge_only_deletes_a_lesson_that_is_still_deleted():
+    db = LessonRows()
+    assert await crud.lesson.purge(db, lesson_id=1, batch_size=50) == 0
+    progress, enrollments, modules, lesson = (_sql(s) for s in db.statements)
+    for sql in (progress, enrollments, modules):
+        assert "LIMIT" in sql
+    assert "lessons.deleted_at IS NOT NULL" in lesson
+
+
+def test_assets_go_with_their_modules():
+    [foreign_key] = Asset.__table__.c.module_id.foreign_keys
+    assert foreign_key.column.table.name == "modules"
+    assert foreign_key.ondelete == "CASCADE"
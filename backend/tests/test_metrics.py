@@ -0,0 +1,109 @@
+import re
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from core import metrics
+from core.config import settings
+from core.metrics import MetricsRegistry
+from core.middleware import MetricsMiddleware
+from main import app as main_app
+
+# One sample per line: name, optional labels, value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-z_]+="[^"]*",?)*\})? \S+$')
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/lessons/{lesson_id}")
+    async def read_lesson(lesson_id: int):
+        return {"id": lesson_id}
+
+    return app
+
+
+async def _get(app: FastAPI, *paths: str) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        for path in paths:
+            await c.get(path)
+
+
+def test_histogram_buckets_are_cumulative_and_upper_inclusive():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "test_seconds", "Test latency", ("route",), buckets=(1.0, 0.1)
+    )
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP test_seconds Test latency",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 2',
+        'test_seconds_bucket{route="/a",le="1"} 3',
+        'test_seconds_bucket{route="/a",le="+Inf"} 4',
+        'test_seconds_sum{route="/a"} 5.65',
+        'test_seconds_count{route="/a"} 4',
+    ]
+    assert histogram.count(route="/a") == 4
+
+
+def test_counters_render_with_total_suffix_and_escaped_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("test_things", "Things", ("name",))
+    counter.inc(name='say "hi"\n')
+    counter.inc(2, name="plain")
+    assert registry.render().splitlines()[2:] == [
+        'test_things_total{name="say \\"hi\\"\\n"} 1',
+        'test_things_total{name="plain"} 2',
+    ]
+    with pytest.raises(ValueError):
+        counter.inc(other="label")
+
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template_not_raw_path():
+    route = "/lessons/{lesson_id}"
+    before = metrics.HTTP_REQUESTS.value(method="GET", route=route, status="200")
+    unmatched = metrics.HTTP_REQUESTS.value(
+        method="GET", route="unmatched", status="404"
+    )
+
+    await _get(_app(), "/lessons/1", "/lessons/2", "/nowhere/3")
+
+    assert (
+        metrics.HTTP_REQUESTS.value(method="GET", route=route, status="200")
+        == before + 2
+    )
+    assert (
+        metrics.HTTP_REQUESTS.value(method="GET", route="unmatched", status="404")
+        == unmatched + 1
+    )
+    rendered = metrics.registry.render()
+    assert 'route="/lessons/1"' not in rendered
+    assert 'route="/nowhere/3"' not in rendered
+    assert metrics.HTTP_REQUEST_DURATION.count(method="GET", route=route) >= 2
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_the_text_format(monkeypatch):
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        response = await c.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == (
+            "text/plain; version=0.0.4; charset=utf-8"
+        )
+        lines = response.text.splitlines()
+        assert response.text.endswith("\n")
+        assert "# TYPE edufi_http_requests counter" in lines
+        for line in lines:
+            if not line.startswith("# HELP ") and not line.startswith("# TYPE "):
+                assert SAMPLE.match(line), line
+
+        monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+        assert (await c.get("/metrics")).status_code == 404
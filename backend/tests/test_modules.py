@@ -0,0 +1,210 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.dialects import postgresql
+
+import crud
+from api.deps import get_current_teacher_or_admin_user, get_db
+from api.routes import lessons as lesson_routes
+from core.config import settings
+from schemas.auth import AuthUser
+from schemas.lesson import ModuleBatchItem
+
+URL = f"{settings.API_V1_STR}/lessons/1/modules"
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class FakeSession:
+    """Records statements; every UPDATE reports `rowcount` rows"""
+
+    def __init__(self, rowcount=0):
+        self.rowcount = rowcount
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(
+            rowcount=self.rowcount,
+            scalars=lambda: SimpleNamespace(all=lambda: []),
+        )
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def no_push(monkeypatch):
+    monkeypatch.setattr(settings, "PUSH_ENABLED", False)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Lesson 1 owned by the caller, with modules 10, 11 and 12"""
+    calls = []
+
+    async def get(db, *, id):
+        return SimpleNamespace(id=id, teacher_id=2, archived_at=None)
+
+    async def get_lesson_module_ids(db, *, lesson_id):
+        return [10, 11, 12]
+
+    async def get_lesson_modules(db, *, lesson_id, limit):
+        return []
+
+    async def reorder(db, *, lesson_id, module_ids):
+        calls.append(("reorder", list(module_ids)))
+        return len(module_ids)
+
+    async def upsert_many(db, *, lesson_id, items):
+        calls.append(("upsert_many", [item.id for item in items]))
+        return []
+
+    monkeypatch.setattr(crud.lesson, "get", get)
+    monkeypatch.setattr(crud.module, "get_lesson_module_ids", get_lesson_module_ids)
+    monkeypatch.setattr(crud.module, "get_lesson_modules", get_lesson_modules)
+    monkeypatch.setattr(crud.module, "reorder", reorder)
+    monkeypatch.setattr(crud.module, "upsert_many", upsert_many)
+    return calls
+
+
+def _client() -> httpx.AsyncClient:
+    async def no_db():
+        yield None
+
+    teacher = AuthUser(id=2, role="teacher", is_active=True)
+    app = FastAPI()
+    app.include_router(lesson_routes.router, prefix=f"{settings.API_V1_STR}/lessons")
+    app.dependency_overrides[get_current_teacher_or_admin_user] = lambda: teacher
+    app.dependency_overrides[get_db] = no_db
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_reorder_accepts_every_module_once(calls):
+    async with _client() as client:
+        response = await client.put(f"{URL}/order", json={"module_ids": [12, 10, 11]})
+    assert response.status_code == 200
+    assert calls == [("reorder", [12, 10, 11])]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "module_ids",
+    [
+        [12, 10, 10, 11],  # duplicate position
+        [12, 10],  # module left out
+        [12, 10, 11, 99],  # module of another lesson
+        [12, 10, 99],  # swapped for one
+    ],
+)
+async def test_reorder_refuses_anything_but_a_permutation(calls, module_ids):
+    async with _client() as client:
+        response = await client.put(f"{URL}/order", json={"module_ids": module_ids})
+    assert response.status_code == 400
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_refuses_a_module_listed_twice(calls):
+    modules = [{"id": 10, "title": "A"}, {"id": 10, "title": "B"}]
+    async with _client() as client:
+        response = await client.put(URL, json={"modules": modules})
+    assert response.status_code == 400
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_refuses_modules_of_another_lesson(calls):
+    modules = [{"id": 10, "title": "A"}, {"id": 99, "title": "B"}]
+    async with _client() as client:
+        response = await client.put(URL, json={"modules": modules})
+    assert response.status_code == 404
+    assert "[99]" in response.json()["detail"]
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_updates_and_creates_in_one_call(calls):
+    modules = [{"id": 11, "order": 0}, {"title": "New", "order": 3}]
+    async with _client() as client:
+        response = await client.put(URL, json={"modules": modules})
+    assert response.status_code == 200
+    assert calls == [("upsert_many", [11, None])]
+
+
+@pytest.mark.asyncio
+async def test_reorder_is_one_update_from_values_scoped_to_the_lesson():
+    db = FakeSession(rowcount=2)
+    assert await crud.module.reorder(db, lesson_id=1, module_ids=[12, 10, 11]) == 2
+
+    reorder, touch = db.statements
+    sql = _sql(reorder)
+    assert 'SET "order"=positions.position' in sql
+    assert "FROM (VALUES " in sql and ") AS positions (id, position)" in sql
+    assert "modules.id = positions.id" in sql
+    assert "modules.lesson_id = " in sql
+    # Modules already in place are not rewritten
+    assert 'modules."order" IS DISTINCT FROM positions.position' in sql
+    assert "UPDATE lessons SET updated_at=now()" in _sql(touch)
+    assert db.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_reorder_that_moves_nothing_leaves_the_lesson_alone():
+    db = FakeSession(rowcount=0)
+    assert await crud.module.reorder(db, lesson_id=1, module_ids=[10, 11]) == 0
+    assert len(db.statements) == 1
+    assert db.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_updates_from_values_and_inserts_the_rest():
+    db = FakeSession(rowcount=2)
+    items = [
+        ModuleBatchItem(id=10, title="Halves"),
+        ModuleBatchItem(id=11, order=4),
+        ModuleBatchItem(title="Thirds", order=5),
+        ModuleBatchItem(title="Quarters"),
+    ]
+    await crud.module.upsert_many(db, lesson_id=1, items=items)
+
+    changes, creates, touch, _ = db.statements
+    sql = _sql(changes)
+    assert (
+        "FROM (VALUES " in sql and ") AS changes (id, title, position, content)" in sql
+    )
+    assert "modules.id = changes.id AND modules.lesson_id = " in sql
+    # Omitted fields keep their current value
+    assert "title=coalesce(changes.title, modules.title)" in sql
+    assert '"order"=coalesce(CAST(changes.position AS INTEGER), modules."order")' in sql
+    assert "content=coalesce(changes.content, modules.content)" in sql
+
+    sql = _sql(creates)
+    assert sql.startswith("INSERT INTO modules")
+    params = creates.compile(dialect=postgresql.dialect()).params
+    assert [value for key, value in params.items() if key.startswith("title")] == [
+        "Thirds",
+        "Quarters",
+    ]
+    assert [value for key, value in params.items() if key.startswith("order")] == [
+        5,
+        0,
+    ]
+    assert "UPDATE lessons SET updated_at=now()" in _sql(touch)
+    assert db.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_many_without_updates_only_inserts():
+    db = FakeSession()
+    await crud.module.upsert_many(
+        db, lesson_id=1, items=[ModuleBatchItem(title="Thirds")]
+    )
+    assert _sql(db.statements[0]).startswith("INSERT INTO modules")
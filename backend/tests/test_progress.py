@@ -0,0 +1,123 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from core import progress
+from core.progress import ProgressBuffer, merge
+
+EARLIER = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+LATER = EARLIER + timedelta(minutes=5)
+
+
+def _row(progress_value, completed_at=None, updated_at=EARLIER):
+    return {
+        "student_id": 1,
+        "lesson_id": 10,
+        "module_id": 100,
+        "progress": progress_value,
+        "completed_at": completed_at,
+        "updated_at": updated_at,
+    }
+
+
+class FakeStore:
+    """Stands in for upsert_many, rejecting rows of the given students"""
+
+    def __init__(self, rejected_students=(), down=False):
+        self.rejected_students = set(rejected_students)
+        self.down = down
+        self.rows = []
+
+    async def upsert_many(self, db, *, rows):
+        if self.down:
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+        if any(row["student_id"] in self.rejected_students for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("foreign key violation"))
+        self.rows.extend(rows)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    fake = FakeStore()
+    monkeypatch.setattr(progress, "async_session", session)
+    monkeypatch.setattr(progress.progress_crud, "upsert_many", fake.upsert_many)
+    return fake
+
+
+def test_merge_keeps_highest_progress_and_first_completion():
+    merged = merge(_row(80, completed_at=LATER), _row(40, updated_at=LATER))
+    assert merged["progress"] == 80
+    assert merged["completed_at"] == LATER
+    assert merged["updated_at"] == LATER
+
+    merged = merge(merged, _row(100, completed_at=EARLIER))
+    assert merged["progress"] == 100
+    assert merged["completed_at"] == EARLIER
+
+
+def test_merge_into_nothing_copies_the_update():
+    update = _row(30)
+    merged = merge(None, update)
+    assert merged == update
+    assert merged is not update
+
+
+def test_record_merges_reports_per_student_and_module():
+    buffer = ProgressBuffer()
+    buffer.record(student_id=1, lesson_id=10, module_id=100, progress=60)
+    buffer.record(student_id=1, lesson_id=10, module_id=100, progress=20)
+    buffer.record(student_id=1, lesson_id=10, module_id=101, progress=0, completed=True)
+
+    rows = buffer.overlay(1, 10, stored=[_row(70)])
+    assert [(row["module_id"], row["progress"]) for row in rows] == [
+        (100, 70),
+        (101, 100),
+    ]
+    assert rows[1]["completed_at"] is not None
+    assert buffer.overlay(2, 10, stored=[]) == []
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_and_empties_the_buffer(store):
+    buffer = ProgressBuffer()
+    buffer.record(student_id=1, lesson_id=10, module_id=100, progress=50)
+    buffer.record(student_id=2, lesson_id=10, module_id=100, progress=30)
+
+    assert await buffer.flush() == 2
+    assert len(store.rows) == 2
+    assert await buffer.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_unreachable_database_keeps_rows_for_the_next_flush(store):
+    buffer = ProgressBuffer()
+    buffer.record(student_id=1, lesson_id=10, module_id=100, progress=50)
+    store.down = True
+
+    assert await buffer.flush() == 0
+    buffer.record(student_id=1, lesson_id=10, module_id=100, progress=40)
+    store.down = False
+
+    assert await buffer.flush() == 1
+    assert store.rows[0]["progress"] == 50
+
+
+@pytest.mark.asyncio
+async def test_rejected_rows_are_dropped_and_the_rest_written(store):
+    buffer = ProgressBuffer()
+    for student_id in (1, 2, 3):
+        buffer.record(student_id=student_id, lesson_id=10, module_id=100, progress=50)
+    store.rejected_students = {2}
+    rejected = progress.metrics.PROGRESS_REJECTED.value()
+
+    assert await buffer.flush() == 2
+    assert sorted(row["student_id"] for row in store.rows) == [1, 3]
+    assert progress.metrics.PROGRESS_REJECTED.value() == rejected + 1
+    # The bad row is gone rather than failing every later flush
+    assert await buffer.flush() == 0
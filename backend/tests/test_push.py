@@ -0,0 +1,118 @@
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+import crud
+from api.deps import get_current_active_user, get_db
+from api.routes import lessons as lesson_routes
+from core import push
+from core.config import settings
+from core.push import RESYNC, Hub, Subscription
+from models.lesson import LessonStatus
+from schemas.auth import AuthUser
+
+
+def _message(n: int):
+    return {"lesson_id": 1, "kind": "module.updated", "module_id": n}
+
+
+def _drain(subscription: Subscription):
+    messages = []
+    while not subscription.queue.empty():
+        messages.append(subscription.queue.get_nowait())
+    return messages
+
+
+def test_a_full_queue_is_replaced_by_one_resync():
+    subscription = Subscription(1, size=2)
+    assert subscription.offer(_message(1))
+    assert subscription.offer(_message(2))
+    assert not subscription.offer(_message(3))
+    assert _drain(subscription) == [{"lesson_id": 1, "kind": RESYNC}]
+
+    # The client catches up and gets messages again
+    assert subscription.offer(_message(4))
+    assert _drain(subscription) == [_message(4)]
+
+
+def test_publish_reaches_only_the_lesson_subscribers():
+    hub = Hub(max_subscribers=10, queue_size=1)
+    first, second = hub.subscribe(1), hub.subscribe(1)
+    other = hub.subscribe(2)
+    second.offer(_message(0))
+
+    hub.publish(1, _message(1))
+    assert _drain(first) == [_message(1)]
+    # The slow subscriber resyncs without holding up the other one
+    assert _drain(second) == [{"lesson_id": 1, "kind": RESYNC}]
+    assert _drain(other) == []
+
+
+def test_resync_all_reaches_every_subscriber():
+    hub = Hub(max_subscribers=10, queue_size=4)
+    subscriptions = [hub.subscribe(1), hub.subscribe(2)]
+    hub.resync_all()
+    for subscription in subscriptions:
+        assert [m["kind"] for m in _drain(subscription)] == [RESYNC]
+
+
+def test_subscriber_cap():
+    hub = Hub(max_subscribers=2, queue_size=4)
+    first = hub.subscribe(1)
+    assert not hub.full()
+    hub.subscribe(2)
+    assert hub.full()
+    hub.unsubscribe(first)
+    assert not hub.full()
+    # Unsubscribing twice does not free a second slot
+    hub.unsubscribe(first)
+    assert hub.count == 1
+
+
+@pytest.mark.asyncio
+async def test_closing_the_stream_unsubscribes():
+    hub = Hub(max_subscribers=10, queue_size=4)
+    events = push.stream(hub, 1)
+    # Nothing is subscribed until the response starts
+    assert hub.count == 0
+
+    assert (await events.__anext__()).startswith("retry: ")
+    assert hub.count == 1
+    hub.publish(1, _message(5))
+    event = await events.__anext__()
+    assert event.startswith("event: module.updated\n")
+    assert json.loads(event.split("data: ", 1)[1]) == _message(5)
+
+    # What the server does when the client disconnects
+    await events.aclose()
+    assert hub.count == 0
+    assert hub._lessons == {}
+
+
+@pytest.mark.asyncio
+async def test_streams_are_refused_once_the_hub_is_full(monkeypatch):
+    async def get(db, *, id):
+        return SimpleNamespace(id=id, status=LessonStatus.PUBLISHED)
+
+    async def no_db():
+        yield None
+
+    hub = Hub(max_subscribers=1, queue_size=4)
+    hub.subscribe(1)
+    monkeypatch.setattr(push, "hub", hub)
+    monkeypatch.setattr(settings, "PUSH_ENABLED", True)
+    monkeypatch.setattr(crud.lesson, "get", get)
+
+    student = AuthUser(id=3, role="student", is_active=True)
+    app = FastAPI()
+    app.include_router(lesson_routes.router, prefix=f"{settings.API_V1_STR}/lessons")
+    app.dependency_overrides[get_current_active_user] = lambda: student
+    app.dependency_overrides[get_db] = no_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        response = await c.get(f"{settings.API_V1_STR}/lessons/1/stream")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(settings.ADMISSION_RETRY_AFTER)
@@ -0,0 +1,42 @@
+import pytest
+
+from core.query_stats import QueryStats, statement_shape, track_queries
+
+
+def test_statement_shape_ignores_parameters():
+    assert statement_shape(
+        "SELECT * FROM lessons WHERE id = $1 LIMIT 10"
+    ) == statement_shape("SELECT *  FROM lessons\n WHERE id = $2 LIMIT 20")
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT 1 WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT 1 WHERE id IN ($1, $2)"
+    )
+
+
+def test_repeated_reports_shapes_over_threshold():
+    stats = QueryStats("GET /lessons")
+    for id in range(5):
+        stats.record(f"SELECT * FROM modules WHERE lesson_id = {id}", 0.001)
+    stats.record("SELECT * FROM lessons", 0.001)
+
+    assert stats.count == 6
+    assert stats.repeated(5) == [("SELECT * FROM modules WHERE lesson_id = ?", 5)]
+    assert 'desc="6 queries"' in stats.server_timing()
+
+
+def test_query_budget_passes_within_budget(query_budget):
+    with query_budget(2) as captured:
+        with track_queries("GET /lessons") as stats:
+            stats.record("SELECT 1", 0.0)
+            stats.record("SELECT 2", 0.0)
+    assert [s.label for s in captured] == ["GET /lessons"]
+
+
+def test_query_budget_fails_over_budget(query_budget):
+    with pytest.raises(AssertionError, match="ran 3 queries"):
+        with query_budget(2):
+            with track_queries("GET /lessons") as stats:
+                for _ in range(3):
+                    stats.record("SELECT 1", 0.0)
@@ -0,0 +1,147 @@
+import importlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from api import deps
+from core import invalidation, revocation
+from core.revocation import TokenVersions
+from core.security import create_access_token
+
+# crud re-exports the CRUDUser instance as crud.user, shadowing the module
+crud_user = importlib.import_module("crud.user")
+
+NOW = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+class FakeEngine:
+    """Answers refresh()'s query with fixed (id, token_version, now) rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @asynccontextmanager
+    async def connect(self):
+        rows = self.rows
+
+        class Conn:
+            async def execute(self, statement):
+                return SimpleNamespace(all=lambda: rows, scalar_one=lambda: NOW)
+
+        yield Conn()
+
+
+def _token(ver: int) -> str:
+    claims = {"role": "student", "active": True, "ver": ver}
+    return create_access_token(7, claims=claims)
+
+
+def test_versions_are_unknown_until_refreshed():
+    versions = TokenVersions()
+    assert not versions.loaded
+    assert versions.age() == float("inf")
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_bumped_versions():
+    versions = TokenVersions()
+    await versions.refresh(FakeEngine([(7, 3, NOW)]))
+
+    assert versions.loaded
+    assert versions.age() < 1
+    assert not versions.is_current(7, 2)
+    assert versions.is_current(7, 3)
+    # Users never revoked are not kept at all
+    assert versions.is_current(8, 0)
+
+
+def test_bump_never_goes_back():
+    versions = TokenVersions()
+    versions.bump(7, 3)
+    versions.bump(7, 2)
+    assert not versions.is_current(7, 2)
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_refused_before_versions_load(monkeypatch):
+    monkeypatch.setattr(deps, "token_versions", TokenVersions())
+    with pytest.raises(HTTPException) as error:
+        await deps.get_current_user(_token(0))
+    assert error.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_refused_while_versions_are_stale(monkeypatch):
+    versions = TokenVersions()
+    await versions.refresh(FakeEngine([]))
+    monkeypatch.setattr(deps, "token_versions", versions)
+    stale = versions._refreshed_at + deps.settings.TOKEN_REVOCATION_MAX_STALENESS
+    monkeypatch.setattr(revocation.time, "monotonic", lambda: stale + 1)
+    with pytest.raises(HTTPException) as error:
+        await deps.get_current_user(_token(0))
+    assert error.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected(monkeypatch):
+    versions = TokenVersions()
+    await versions.refresh(FakeEngine([(7, 1, NOW)]))
+    monkeypatch.setattr(deps, "token_versions", versions)
+
+    with pytest.raises(HTTPException) as error:
+        await deps.get_current_user(_token(0))
+    assert error.value.status_code == 401
+    user = await deps.get_current_user(_token(1))
+    assert user.id == 7
+
+
+class FakeSession:
+    """Just enough of AsyncSession for CRUDUser.remove"""
+
+    def __init__(self, user):
+        self.user = user
+        self.info = {}
+        self.deleted = []
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalar_one_or_none=lambda: self.user)
+
+    async def get(self, model, id):
+        return self.user
+
+    async def delete(self, obj):
+        self.deleted.append(obj)
+
+    async def commit(self):
+        # What the after_commit hook does in the writing worker
+        for message in self.info.pop(invalidation.PENDING, ()):
+            invalidation._on_message(message)
+
+
+@pytest.mark.asyncio
+async def test_removing_a_user_revokes_their_tokens_in_every_worker(monkeypatch):
+    sent = []
+
+    async def send(db, channel, message):
+        sent.append((channel, message))
+
+    monkeypatch.setattr(invalidation.listen, "send", send)
+    writer = TokenVersions()
+    monkeypatch.setattr(crud_user, "token_versions", writer)
+    db = FakeSession(SimpleNamespace(id=7, token_version=2))
+
+    await crud_user.user.remove(db, id=7)
+
+    assert db.deleted
+    assert sent == [(invalidation.CHANNEL, {"table": "users", "id": 7, "version": 3})]
+    assert not writer.is_current(7, 2)
+
+    # Another worker applies the notification as the listener delivers it
+    other = TokenVersions()
+    monkeypatch.setattr(crud_user, "token_versions", other)
+    invalidation._on_message(sent[0][1])
+    assert not other.is_current(7, 2)
+    assert other.is_current(7, 3)
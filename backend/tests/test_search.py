@@ -0,0 +1,122 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+
+import crud
+from models.base import LessonStatus
+from models.lesson import (
+    MODULE_SEARCH_TRIGGER_FUNCTION,
+    MODULE_SEARCH_TRIGGERS,
+    MODULE_SEARCH_VECTOR_FUNCTION,
+    SEARCH_CONFIG,
+    Lesson,
+)
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _weights(expression: str) -> dict:
+    """Map each field folded into a tsvector expression to its weight"""
+    fields = re.findall(
+        r"coalesce\((?:string_agg\((\w+), ' '\)|(\w+)), ''\)\), '([A-D])'\)",
+        expression,
+    )
+    return {aggregated or field: weight for aggregated, field, weight in fields}
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(all=lambda: [])
+
+
+def test_search_vector_is_recomputed_from_the_lesson_row_on_every_write():
+    ddl = str(CreateTable(Lesson.__table__).compile(dialect=postgresql.dialect()))
+    column = re.search(
+        r"search_vector TSVECTOR GENERATED ALWAYS AS \((.*)\) STORED", ddl
+    )
+    assert column, ddl
+    # Title and body edits change the vector; module text comes via the trigger
+    assert "coalesce(module_search_vector, ''::tsvector)" in column.group(1)
+    assert _weights(column.group(1)) == {
+        "title": "A",
+        "description": "B",
+        "content": "C",
+    }
+
+
+def test_titles_outrank_descriptions_outrank_body_text():
+    weights = {
+        **{
+            f"module {k}": v for k, v in _weights(MODULE_SEARCH_VECTOR_FUNCTION).items()
+        },
+        **_weights(str(Lesson.__table__.c.search_vector.computed.sqltext)),
+    }
+    assert weights == {
+        "title": "A",
+        "description": "B",
+        "module title": "B",
+        "content": "C",
+        "module content": "D",
+    }
+
+
+def test_module_edits_refresh_their_lesson_once_per_statement():
+    insert, update, delete = MODULE_SEARCH_TRIGGERS
+    for trigger, event in ((insert, "INSERT"), (update, "UPDATE"), (delete, "DELETE")):
+        assert f"AFTER {event} ON modules" in trigger
+        assert "FOR EACH STATEMENT" in trigger
+
+    # Title and content edits refresh the lesson; a reorder alone does not
+    body = MODULE_SEARCH_TRIGGER_FUNCTION
+    changed = body[
+        body.index("WITH changed AS") : body.index(
+            "UPDATE lessons", body.index("WITH changed AS")
+        )
+    ]
+    assert "new_modules.title IS DISTINCT FROM old_modules.title" in changed
+    assert "new_modules.content IS DISTINCT FROM old_modules.content" in changed
+    assert "order" not in changed
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_best_match_first_and_hides_deleted_lessons():
+    db = FakeSession()
+    await crud.lesson.search(db, q="fractions", skip=20, limit=10)
+    sql = _sql(db.statements[0])
+
+    matches = sql[sql.index("JOIN (SELECT") : sql.index(") AS anon_1")]
+    assert "lessons.search_vector @@ websearch_to_tsquery(" in matches
+    assert "lessons.deleted_at IS NULL" in matches
+    assert "ts_rank_cd(lessons.search_vector, websearch_to_tsquery(" in matches
+    assert "ORDER BY rank DESC, lessons.id" in matches
+    assert "LIMIT" in matches and "OFFSET" in matches
+    # The page keeps the ranking, ties broken by id
+    assert sql.rstrip().endswith("ORDER BY anon_1.rank DESC, lessons.id")
+    # Highlighting runs on the page only
+    assert "ts_headline(" not in matches
+    assert sql.count("ts_headline(") == 2
+
+    params = db.statements[0].compile(dialect=postgresql.dialect()).params
+    assert SEARCH_CONFIG in params.values()
+    assert "fractions" in params.values()
+    assert 10 in params.values() and 20 in params.values()
+
+
+@pytest.mark.asyncio
+async def test_student_search_only_matches_published_lessons():
+    db = FakeSession()
+    await crud.lesson.search(db, q="fractions", published_only=True)
+    statement = db.statements[0]
+    matches = _sql(statement)
+    assert "lessons.status = " in matches
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert LessonStatus.PUBLISHED in params.values()
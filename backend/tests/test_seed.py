@@ -0,0 +1,90 @@
+from collections import Counter
+
+import pytest
+
+from scripts.seed import COLUMNS, Plan, generate
+
+
+def _plan(**overrides) -> Plan:
+    fields = dict(
+        seed=7,
+        users=120,
+        lessons=30,
+        modules_per_lesson=3,
+        enrollments=400,
+        batch_size=40,
+        hashed_password="not-a-real-hash",
+        user_base=1000,
+        lesson_base=50,
+        module_base=200,
+        enrollment_base=5000,
+    )
+    fields.update(overrides)
+    return Plan(**fields)
+
+
+def _table(plan: Plan, table: str, order=None):
+    batches = list(range(plan.batches(table)))
+    records = []
+    for batch in order(batches) if order else batches:
+        records.extend(generate(plan, table, batch))
+    return [dict(zip(COLUMNS[table], record)) for record in records]
+
+
+@pytest.mark.parametrize("table", list(COLUMNS))
+def test_same_seed_gives_the_same_rows_in_any_batch_order(table):
+    plan = _plan()
+    forward = _table(plan, table)
+    backward = _table(plan, table, order=lambda batches: reversed(batches))
+    assert sorted(forward, key=lambda row: row["id"]) == sorted(
+        backward, key=lambda row: row["id"]
+    )
+    assert _table(_plan(), table) == forward
+
+
+def test_another_seed_gives_other_rows():
+    assert _table(_plan(), "lessons") != _table(_plan(seed=8), "lessons")
+
+
+@pytest.mark.parametrize("table", list(COLUMNS))
+def test_row_counts_and_ids_continue_after_existing_rows(table):
+    plan = _plan()
+    rows = _table(plan, table)
+    ids = sorted(row["id"] for row in rows)
+    assert len(ids) == plan.rows(table)
+    base = {
+        "users": plan.user_base,
+        "lessons": plan.lesson_base,
+        "modules": plan.module_base,
+        "enrollments": plan.enrollment_base,
+    }[table]
+    assert ids == list(range(base + 1, base + len(ids) + 1))
+
+
+def test_emails_are_unique():
+    emails = Counter(row["email"] for row in _table(_plan(), "users"))
+    assert emails.most_common(1)[0][1] == 1
+
+
+def test_enrollments_are_unique_and_point_at_students_and_lessons():
+    plan = _plan()
+    roles = {row["id"]: row["role"] for row in _table(plan, "users")}
+    lesson_ids = {row["id"] for row in _table(plan, "lessons")}
+    enrollments = _table(plan, "enrollments")
+
+    pairs = Counter((row["student_id"], row["lesson_id"]) for row in enrollments)
+    assert pairs.most_common(1)[0][1] == 1
+    assert {roles[row["student_id"]] for row in enrollments} == {"STUDENT"}
+    assert {row["lesson_id"] for row in enrollments} <= lesson_ids
+
+
+def test_lessons_and_modules_point_at_teachers_and_lessons():
+    plan = _plan()
+    roles = {row["id"]: row["role"] for row in _table(plan, "users")}
+    lessons = _table(plan, "lessons")
+    modules = _table(plan, "modules")
+
+    assert {roles[row["teacher_id"]] for row in lessons} == {"TEACHER"}
+    per_lesson = Counter(row["lesson_id"] for row in modules)
+    assert set(per_lesson) == {row["id"] for row in lessons}
+    assert set(per_lesson.values()) == {plan.modules_per_lesson}